@@ -13,4 +13,13 @@ def create_app():
     from .routes import routes_bp
     app.register_blueprint(routes_bp)
 
+    # 임베딩 모델 선로드 (백그라운드, 첫 리뷰 요청 지연 방지)
+    # 공유 임베딩 서버를 쓰는 경우 모델은 서버 프로세스에만 로드
+    if os.getenv('EMBEDDING_WARMUP', 'false').lower() in ('1', 'true', 'yes'):
+        from .embedding_server import get_embedding_client
+        if get_embedding_client() is None:
+            import threading
+            from .models.codebert_model import warm_up
+            threading.Thread(target=warm_up, name='embedding-warmup', daemon=True).start()
+
     return app
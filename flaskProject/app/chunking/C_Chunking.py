@@ -1,43 +1,41 @@
-from tree_sitter import Language, Parser
 import tree_sitter_c
 
+from .records import CodeChunk, to_source
+from .registry import get_parser, register_language
+from .traversal import iter_nodes
+
+# C의 주요 코드 구조들
+CODE_ELEMENT_TYPES = frozenset([
+    'function_definition',     # 함수 정의
+    'struct_specifier',        # 구조체
+    'enum_specifier',          # 열거형
+    'union_specifier',         # 공용체
+    # 'declaration',             # 전역 변수/상수 선언
+    'macro_definition'         # 매크로 정의
+])
+# 선언이 나올 수 없는 노드는 하위 탐색 생략
+SKIP_TYPES = frozenset(['string_literal', 'char_literal', 'comment', 'preproc_include'])
+
+def iter_code_elements(node):
+    return iter_nodes(node, CODE_ELEMENT_TYPES, SKIP_TYPES)
+
 def get_code_elements(node):
-    elements = []
-    # C의 주요 코드 구조들
-    if node.type in [
-        'function_definition',     # 함수 정의
-        'struct_specifier',        # 구조체
-        'enum_specifier',          # 열거형
-        'union_specifier',         # 공용체
-        # 'declaration',             # 전역 변수/상수 선언
-        'macro_definition'         # 매크로 정의
-    ]:
-        elements.append({
-            'type': node.type,
-            'node': node
-        })
-    
-    for child in node.children:
-        elements.extend(get_code_elements(child))
-    return elements
-
-def node_text(code_bytes, node):
-    return code_bytes[node.start_byte:node.end_byte].decode('utf8')
-
-def extract_code_elements(code_string):
-    C_LANGUAGE = Language(tree_sitter_c.language())
-    parser = Parser(C_LANGUAGE)
-    
-    tree = parser.parse(bytes(code_string, "utf8"))
-    root_node = tree.root_node
-    code_elements = get_code_elements(root_node)
-    
-    code_bytes = bytes(code_string, 'utf8')
-    
-    elements = [{
-        'type': element['type'],
-        'code': node_text(code_bytes, element['node'])
-    } for element in code_elements]
-    
-    return elements
+    return [{
+        'type': element.type,
+        'node': element
+    } for element in iter_code_elements(node)]
+
+def iter_chunks(code, path='', language='c'):
+    """CodeChunk 레코드를 하나씩 생성 (텍스트는 필요할 때 디코딩)"""
+    code_bytes, source = to_source(code)
+    tree = get_parser('c').parse(code_bytes)
+
+    for node in iter_code_elements(tree.root_node):
+        yield CodeChunk.from_node(node, source, path, language)
+
+def iter_cpp_chunks(code, path=''):
+    return iter_chunks(code, path, language='cpp')
 
+register_language('c', tree_sitter_c.language, iter_chunks, ['.c', '.h'])
+# C++ 는 별도 문법 등록 전까지 C 문법/청커로 처리
+register_language('cpp', tree_sitter_c.language, iter_cpp_chunks, ['.cpp', '.hpp'])
@@ -1,4 +1,6 @@
 import os
+import base64
+import re
 import stat
 import sys
 from pathlib import Path
@@ -6,53 +8,160 @@ import gitlab
 import git
 import json
 import shutil
+import tempfile
+from contextlib import nullcontext
 from typing import Dict, List, Optional
 
-from .Python_Chunking import extract_functions as python_extract
-from .Java_Chunking import extract_functions as java_extract
-from .JavaScript_Chunking import extract_functions as javascript_extract
-from .C_Chunking import extract_code_elements as c_extract
+# 언어별 청커 모듈은 import 시 레지스트리에 등록됨
+from . import Python_Chunking, Java_Chunking, JavaScript_Chunking, C_Chunking  # noqa: F401
+from ..locks import file_lock
+from .records import CodeChunk
+from .registry import get_chunker, registered_extensions
+from .remote_files import GitLabFileFetcher, get_gitlab_session
+
+
+# 프로젝트별 로컬 미러 캐시 설정
+GIT_MIRROR_PATH = os.getenv('GIT_MIRROR_PATH', './gitMirror')
+GIT_FETCH_DEPTH = int(os.getenv('GIT_FETCH_DEPTH', '50'))
+GIT_BLOBLESS = os.getenv('GIT_BLOBLESS', 'false').lower() in ('1', 'true', 'yes')
 
 
 class GitLabCodeChunker:
-    def __init__(self, gitlab_url: str, gitlab_token: str, project_id: str, local_path: str, branch: str):
+    def __init__(self, gitlab_url: str, gitlab_token: str, project_id: str, local_path: str, branch: str,
+                 mirror_path: str = GIT_MIRROR_PATH, fetch_depth: int = GIT_FETCH_DEPTH,
+                 blobless: bool = GIT_BLOBLESS, keep_worktree: bool = True):
         self.gitlab_url = gitlab_url
         self.gitlab_token = gitlab_token
         self.project_id = project_id
         self.branch = branch
         self.local_path = Path(local_path)
-        self.gl = gitlab.Gitlab(gitlab_url, private_token=gitlab_token)
+        # 요청 간 keep-alive 커넥션 풀 공유
+        self.gl = gitlab.Gitlab(gitlab_url, private_token=gitlab_token, session=get_gitlab_session())
         self.project_path = None
+        # clone 없이 API 로 가져온 파일이 있는 임시 디렉토리
+        self.fetch_path = None
 
-        # 지원하는 파일 확장자
-        self.file_extensions = {
-            'python': ['.py'],
-            'java': ['.java'],
-            'javascript': ['.js', '.jsx'],
-            'c': ['.c', '.h'],
-            'cpp': ['.cpp', '.hpp']
-        }
+        # 미러/워크트리 재사용 옵션
+        self.mirror_path = Path(mirror_path) / str(project_id)
+        self.fetch_depth = fetch_depth
+        self.blobless = blobless
+        self.keep_worktree = keep_worktree
+        self.mirror = None
+        self.project = None
+
+        # 지원하는 파일 확장자 (레지스트리에 등록된 언어 기준)
+        self.file_extensions = registered_extensions()
+
+    def get_project(self):
+        """GitLab 프로젝트 정보 (인스턴스 당 한 번 조회)"""
+        if self.project is None:
+            self.project = self.gl.projects.get(self.project_id)
+        return self.project
+
+    def worktree_lock(self):
+        """
+        브랜치 워크트리 체크아웃 ~ 인덱싱/검색 구간을 스레드/프로세스 간 직렬화
+        (다른 리뷰가 사용 중인 워크트리를 checkout --force / clean 하지 않도록)
+        """
+        branch = self.branch or self.get_project().default_branch
+        return file_lock(self.local_path / branch_dir_name(branch) / '.lock')
+
+    def mirror_lock(self):
+        """프로젝트 bare 미러 생성/fetch/워크트리 등록을 직렬화 (브랜치가 달라도 미러는 공유)"""
+        return file_lock(self.mirror_path / '.lock')
 
     def clone_project(self) -> str:
-        """GitLab 프로젝트를 로컬에 클론"""
+        """
+        GitLab 프로젝트 미러를 갱신하고 요청 브랜치만 워크트리로 체크아웃
+        같은 브랜치를 동시에 체크아웃하지 않도록 worktree_lock 안에서 호출
+        """
         try:
             # GitLab 프로젝트 정보 가져오기
-            project = self.gl.projects.get(self.project_id)
+            project = self.get_project()
+            branch = self.branch or project.default_branch
 
-            # 클론 URL 생성
-            clone_url = project.http_url_to_repo.replace('https://', f'https://oauth2:{self.gitlab_token}@')
+            # 원격 URL 에는 토큰을 넣지 않음 (미러 git config 에 토큰이 남지 않도록 요청마다 헤더로 전달)
+            clone_url = project.http_url_to_repo
 
-            # 로컬 경로 생성
-            self.project_path = self.local_path / project.path
-            self.project_path.mkdir(parents=True, exist_ok=True)
+            # 1) 프로젝트별 bare 미러 준비 후 요청 브랜치만 얕게 fetch
+            with self.mirror_lock():
+                self.mirror = self._open_mirror(project.path, clone_url)
+                fetch_args = ['origin', f'+refs/heads/{branch}:refs/heads/{branch}']
+                if self.fetch_depth > 0:
+                    fetch_args.append(f'--depth={self.fetch_depth}')
+                if self.blobless:
+                    fetch_args.append('--filter=blob:none')
+                self.mirror.git.fetch(*fetch_args, env=self._git_auth_env())
+                commit_sha = self.mirror.commit(f'refs/heads/{branch}').hexsha
 
-            git.Repo.clone_from(clone_url, str(self.project_path))
+            # 2) 브랜치별 워크트리 재사용 (없으면 생성)
+            self.project_path = self.local_path / branch_dir_name(branch) / project.path
+            self._checkout_worktree(commit_sha)
             return str(self.project_path)
 
         except Exception as e:
             print(f"클론 중 에러 발생: {e}")
             return None
 
+    def fetch_review_files(self, changed_paths: List[str], cache=None):
+        """clone 없이 변경 파일과 같은 디렉토리의 관련 파일만 API 로 가져옴, (경로, 변경 파일, 관련 파일) 반환"""
+        # 브랜치를 알면 프로젝트 조회 요청 없이 바로 tree/blob API 호출
+        project = self.gl.projects.get(self.project_id, lazy=bool(self.branch))
+        branch = self.branch or project.default_branch
+        fetcher = GitLabFileFetcher(project, branch, self.get_file_language, cache=cache)
+
+        self.local_path.mkdir(parents=True, exist_ok=True)
+        self.fetch_path = Path(tempfile.mkdtemp(prefix='fetch-', dir=self.local_path))
+        self.project_path = self.fetch_path
+        changed, related = fetcher.fetch_review_files(changed_paths, self.fetch_path)
+        return str(self.fetch_path), changed, related
+
+    def _open_mirror(self, project_name: str, clone_url: str) -> git.Repo:
+        mirror_dir = self.mirror_path / f'{project_name}.git'
+        if mirror_dir.exists():
+            mirror = git.Repo(mirror_dir)
+            # 프로젝트 URL 변경 반영 (이전 버전에서 저장된 토큰 포함 URL 도 덮어씀)
+            mirror.remote('origin').set_url(clone_url)
+        else:
+            mirror = git.Repo.init(mirror_dir, bare=True, mkdir=True)
+            mirror.create_remote('origin', clone_url)
+
+        if self.blobless:
+            # partial clone: blob 은 체크아웃 시 필요한 것만 지연 다운로드
+            with mirror.config_writer() as config:
+                config.set_value('remote "origin"', 'promisor', 'true')
+                config.set_value('remote "origin"', 'partialclonefilter', 'blob:none')
+        return mirror
+
+    def _checkout_worktree(self, commit_sha: str):
+        worktree = self.project_path.resolve()
+        if (worktree / '.git').exists():
+            repo = git.Repo(worktree)
+            # blobless 미러는 체크아웃 중 필요한 blob 을 원격에서 받아 미러에 쓰므로 fetch 와 직렬화
+            with (self.mirror_lock() if self.blobless else nullcontext()):
+                repo.git.checkout('--force', '--detach', commit_sha, env=self._git_auth_env())
+            repo.git.clean('-fdx')
+            repo.close()
+        else:
+            worktree.parent.mkdir(parents=True, exist_ok=True)
+            if worktree.exists():
+                shutil.rmtree(worktree, onerror=remove_readonly)
+            # 워크트리 등록 정보는 미러 안에 있으므로 미러 잠금 안에서 추가
+            with self.mirror_lock():
+                self.mirror.git.worktree('prune')
+                self.mirror.git.worktree('add', '--force', '--detach', str(worktree), commit_sha,
+                                         env=self._git_auth_env())
+
+    def _git_auth_env(self) -> Dict[str, str]:
+        """git 명령에만 적용되는 인증 헤더 설정 (명령행/설정 파일에 토큰을 남기지 않음)"""
+        credentials = base64.b64encode(f'oauth2:{self.gitlab_token}'.encode('utf-8')).decode('ascii')
+        return {
+            'GIT_CONFIG_COUNT': '1',
+            'GIT_CONFIG_KEY_0': 'http.extraHeader',
+            'GIT_CONFIG_VALUE_0': f'Authorization: Basic {credentials}',
+            'GIT_TERMINAL_PROMPT': '0',
+        }
+
     def get_file_language(self, file_path: str) -> Optional[str]:
         """파일 확장자를 기반으로 언어 감지"""
         ext = Path(file_path).suffix.lower()
@@ -61,86 +170,82 @@ class GitLabCodeChunker:
                 return lang
         return None
 
-    def chunk_file(self, file_path: str, language: str) -> List[Dict]:
-        """파일을 청크로 분할"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    content = f.read()
-            except Exception as e:
-                print(f"파일 읽기 실패: {file_path} - {e}")
-                return []
+    def chunk_file(self, file_path: str, language: str) -> List[CodeChunk]:
+        """파일을 청크 레코드로 분할"""
+        return chunk_source_file(file_path, language)
 
-        try:
-            if language == 'python':
-                chunks = python_extract(content)
-            elif language == 'java':
-                chunks = java_extract(content)
-            elif language == 'javascript':
-                chunks = javascript_extract(content)
-            elif language in ['c', 'cpp']:
-                chunks = c_extract(content)
-            else:
-                return []
-
-            return chunks
-        except Exception as e:
-            print(f"청크화 실패: {file_path} - {e}")
+    def chunk_code(self, content: str, language: str, path: str = '') -> List[CodeChunk]:
+        """파일이 아닌 코드 문자열(삭제된 코드 등)을 청크 레코드로 분할"""
+        chunker = get_chunker(language)
+        if chunker is None:
             return []
-
-    def chunk_code(self, content: str, language: str) -> List[Dict]:
         try:
-            if language == 'python':
-                chunks = python_extract(content)
-            elif language == 'java':
-                chunks = java_extract(content)
-            elif language == 'javascript':
-                chunks = javascript_extract(content)
-            elif language in ['c', 'cpp']:
-                chunks = c_extract(content)
-            else:
-                return []
-
-            return chunks
+            return list(chunker(content, path))
         except Exception as e:
             print(f"청크화 실패: {e}")
             return []
 
     def cleanup_project_directory(self):
         try:
+            if self.mirror is not None:
+                self.mirror.close()
+
+            # API 로 가져온 파일은 리뷰마다 새로 받으므로 항상 삭제 (blob 캐시는 유지)
+            if self.fetch_path is not None:
+                shutil.rmtree(self.fetch_path, onerror=remove_readonly)
+                self.fetch_path = None
+                return
+
+            # 기본적으로 워크트리는 다음 리뷰에서 재사용
+            if self.keep_worktree:
+                return
+
             if self.project_path and self.project_path.exists():
-                # Git 저장소 객체 정리
-                try:
-                    repo = git.Repo(self.project_path)
-                    repo.close()
-                except:
-                    pass
-
-                import time
-                time.sleep(1)
-
-                # Windows에서 읽기 전용 속성 제거
-                def remove_readonly(func, path, excinfo):
-                    os.chmod(path, stat.S_IWRITE)
-                    func(path)
-
-                # projectID 경로 찾기 (project_path의 상위 디렉토리)
-                project_id_path = self.project_path.parent
-
-                # projectID 경로와 그 아래 모든 것을 삭제
-                if project_id_path.exists():
-                    shutil.rmtree(project_id_path, onerror=remove_readonly)
-                    print(f"projectID 디렉토리 삭제 완료: {project_id_path}")
-
-                print(f"프로젝트 디렉토리 정리 완료")
+                # 같은 브랜치 리뷰가 사용 중이면 끝날 때까지 기다린 뒤 삭제
+                with self.worktree_lock():
+                    if self.mirror is not None:
+                        with self.mirror_lock():
+                            self.mirror.git.worktree('remove', '--force', str(self.project_path.resolve()))
+                    if self.project_path.exists():
+                        shutil.rmtree(self.project_path, onerror=remove_readonly)
+                print(f"프로젝트 워크트리 정리 완료: {self.project_path}")
         except Exception as e:
             print(f"디렉토리 정리 중 에러 발생: {e}")
 
+
+def chunk_source_file(file_path: str, language: str, path: Optional[str] = None) -> List[CodeChunk]:
+    """파일을 읽어 언어별 청커로 분할 (프로세스 풀 워커에서도 사용)"""
+    chunker = get_chunker(language)
+    if chunker is None:
+        return []
+
+    # 디코딩 없이 바이트 그대로 파싱, 청크 텍스트는 필요할 때만 디코딩
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"파일 읽기 실패: {file_path} - {e}")
+        return []
+
+    try:
+        return list(chunker(content, path or file_path))
+    except Exception as e:
+        print(f"청크화 실패: {file_path} - {e}")
+        return []
+
+
+def branch_dir_name(branch: str) -> str:
+    """브랜치 이름 → 워크트리/잠금 디렉토리 이름"""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', branch)
+
+
+# Windows에서 읽기 전용 속성 제거
+def remove_readonly(func, path, excinfo):
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
 """
-프로젝트 클론 
+미러 fetch / 워크트리 체크아웃
     ↓
 파일 순회
     ↓
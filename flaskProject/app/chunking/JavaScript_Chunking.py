@@ -1,47 +1,44 @@
-from tree_sitter import Language, Parser
 import tree_sitter_javascript
 
+from .records import CodeChunk, to_source
+from .registry import get_parser, register_language
+from .traversal import iter_nodes
 
-def get_function_nodes(node, code_bytes):  # code_bytes 매개변수 추가
-    functions = []
-    if node.type in [
-        'function_declaration',
-        'method_definition',
-        'arrow_function',
-        'function',
-        'jsx_element',  # JSX 요소
-        'jsx_fragment'  # JSX 프래그먼트
-    ]:
-        function_text = node_text(code_bytes, node).strip()
-        if function_text and function_text != "function":
-            functions.append(node)
-    for child in node.children:
-        functions.extend(get_function_nodes(child, code_bytes))  # code_bytes 전달
-    return functions
+FUNCTION_TYPES = frozenset([
+    'function_declaration',
+    'method_definition',
+    'arrow_function',
+    'function_expression',  # var a = function() {}, IIFE
+    'function',             # 이전 문법 버전의 함수 표현식 (현재 문법에서는 익명 키워드 토큰)
+    'jsx_element',  # JSX 요소
+    'jsx_fragment'  # JSX 프래그먼트
+])
+# 함수가 나올 수 없는 노드는 하위 탐색 생략 (template_string 은 ${} 안에 함수가 올 수 있어 제외)
+SKIP_TYPES = frozenset(['string', 'comment', 'regex', 'import_statement'])
 
 
-def get_class_nodes(node):
-    classes = []
-    if node.type == 'class_declaration':
-        classes.append(node)
-    for child in node.children:
-        classes.extend(get_class_nodes(child))
-    return classes
+def iter_function_nodes(node):
+    # 'function' 키워드 토큰(익명 노드)은 텍스트 디코딩 없이 is_named 로 제외
+    for function_node in iter_nodes(node, FUNCTION_TYPES, SKIP_TYPES):
+        if function_node.is_named:
+            yield function_node
+
 
+def get_function_nodes(node):
+    return list(iter_function_nodes(node))
 
-def node_text(code_bytes, node):
-    return code_bytes[node.start_byte:node.end_byte].decode('utf8')
+
+def get_class_nodes(node):
+    return list(iter_nodes(node, ('class_declaration',), SKIP_TYPES))
 
 
-def extract_functions(code_string):
-    LANGUAGE = Language(tree_sitter_javascript.language())
-    parser = Parser(LANGUAGE)
+def iter_chunks(code, path=''):
+    """CodeChunk 레코드를 하나씩 생성 (텍스트는 필요할 때 디코딩)"""
+    code_bytes, source = to_source(code)
+    tree = get_parser('javascript').parse(code_bytes)
 
-    code_bytes = bytes(code_string, 'utf8')  # code_bytes를 먼저 생성
-    tree = parser.parse(code_bytes)
-    root_node = tree.root_node
-    function_nodes = get_function_nodes(root_node, code_bytes)  # code_bytes 전달
+    for node in iter_function_nodes(tree.root_node):
+        yield CodeChunk.from_node(node, source, path, 'javascript')
 
-    methods = [node_text(code_bytes, node) for node in function_nodes]
 
-    return methods
\ No newline at end of file
+register_language('javascript', tree_sitter_javascript.language, iter_chunks, ['.js', '.jsx'])
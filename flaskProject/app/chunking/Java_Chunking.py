@@ -1,56 +1,50 @@
 """
-extract_functions 에 코드값 전송하면 메서드별 코드 배열로 반환함
+iter_chunks 에 코드값 전송하면 메서드별 CodeChunk 레코드를 생성함
 """
 
-from tree_sitter import Language, Parser
 import tree_sitter_java
 
+from .records import CodeChunk, to_source
+from .registry import get_parser, register_language
+from .traversal import iter_nodes
+
+# Java의 주요 코드 구조들
+CODE_ELEMENT_TYPES = frozenset([
+    'method_declaration',      # 메서드
+    'class_declaration',       # 클래스
+    'enum_declaration',        # 열거형
+    'interface_declaration',   # 인터페이스
+    'constructor_declaration', # 생성자
+    'record_declaration',      # 레코드 (Java 16+)
+    # 'field_declaration',       # 필드 선언
+    # 'annotation_type_declaration'  # 어노테이션 타입
+])
+FUNCTION_TYPES = frozenset(['method_declaration'])
+# 선언이 나올 수 없는 노드는 하위 탐색 생략
+SKIP_TYPES = frozenset(['string_literal', 'line_comment', 'block_comment', 'import_declaration', 'package_declaration'])
+
 def get_code_elements(node):
-    elements = []
-    # Java의 주요 코드 구조들
-    if node.type in [
-        'method_declaration',      # 메서드
-        'class_declaration',       # 클래스
-        'enum_declaration',        # 열거형
-        'interface_declaration',   # 인터페이스
-        'constructor_declaration', # 생성자
-        'record_declaration',      # 레코드 (Java 16+)
-        # 'field_declaration',       # 필드 선언
-        # 'annotation_type_declaration'  # 어노테이션 타입
-    ]:
-        elements.append({
-            'type': node.type,
-            'node': node
-        })
-    
-    for child in node.children:
-        elements.extend(get_code_elements(child))
-    return elements
+    return [{
+        'type': element.type,
+        'node': element
+    } for element in iter_nodes(node, CODE_ELEMENT_TYPES, SKIP_TYPES)]
+
+def iter_function_nodes(node):
+    return iter_nodes(node, FUNCTION_TYPES, SKIP_TYPES)
 
 def get_function_nodes(node):
-    functions = []
-    if node.type == 'method_declaration': 
-        functions.append(node)
-    for child in node.children:
-        functions.extend(get_function_nodes(child))
-    return functions
+    return list(iter_function_nodes(node))
 
-def node_text(code_bytes, node):
-    return code_bytes[node.start_byte:node.end_byte].decode('utf8')
+def iter_chunks(code, path=''):
+    """CodeChunk 레코드를 하나씩 생성 (텍스트는 필요할 때 디코딩)"""
+    code_bytes, source = to_source(code)
+    tree = get_parser('java').parse(code_bytes)
+
+    for node in iter_function_nodes(tree.root_node):
+        yield CodeChunk.from_node(node, source, path, 'java')
 
-def extract_functions(code_string):
-    # Language 초기화 시 두 번째 매개변수 'java' 추가
-    PY_LANGUAGE = Language(tree_sitter_java.language())  
-    parser = Parser(PY_LANGUAGE)
-    
-    tree = parser.parse(bytes(code_string, "utf8"))
-    root_node = tree.root_node
-    function_nodes = get_function_nodes(root_node)
- 
-    code_bytes = bytes(code_string, 'utf8')  # 'code' -> 'code_string'
-    methods = [node_text(code_bytes, node) for node in function_nodes]
 
-    return methods
+register_language('java', tree_sitter_java.language, iter_chunks, ['.java'])
 
 # def extract_functions(code_string):
 #     PY_LANGUAGE = Language(tree_sitter_java.language())  
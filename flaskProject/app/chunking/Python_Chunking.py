@@ -1,34 +1,30 @@
 """
-extract_functions 에 코드값 전송하면 메서드별 코드 배열로 반환함
+iter_chunks 에 코드값 전송하면 메서드별 CodeChunk 레코드를 생성함
 """
 
-from tree_sitter import Language, Parser
 import tree_sitter_python
 
+from .records import CodeChunk, to_source
+from .registry import get_parser, register_language
+from .traversal import iter_nodes
+
+FUNCTION_TYPES = frozenset(['function_definition'])
+# 함수 정의가 나올 수 없는 노드는 하위 탐색 생략
+SKIP_TYPES = frozenset(['string', 'comment'])
+
+def iter_function_nodes(node):
+    return iter_nodes(node, FUNCTION_TYPES, SKIP_TYPES)
+
 def get_function_nodes(node):
-    functions = []
-    if node.type == 'function_definition':
-        functions.append(node)
-    for child in node.children:
-        functions.extend(get_function_nodes(child))
-    return functions
-
-def node_text(code_bytes, node):
-    return code_bytes[node.start_byte:node.end_byte].decode('utf8')
-
-def extract_functions(code_string):
-    
-    # Tree-sitter 파서 초기화
-    PY_LANGUAGE = Language(tree_sitter_python.language())
-    parser = Parser(PY_LANGUAGE)
-    
-    tree = parser.parse(bytes(code_string, "utf8"))
-
-    root_node = tree.root_node
-
-    function_nodes = get_function_nodes(root_node)
- 
-    code_bytes = bytes(code_string, 'utf8')
-    methods = [node_text(code_bytes, node) for node in function_nodes]
-
-    return methods
+    return list(iter_function_nodes(node))
+
+def iter_chunks(code, path=''):
+    """CodeChunk 레코드를 하나씩 생성 (텍스트는 필요할 때 디코딩)"""
+    code_bytes, source = to_source(code)
+    tree = get_parser('python').parse(code_bytes)
+
+    for node in iter_function_nodes(tree.root_node):
+        yield CodeChunk.from_node(node, source, path, 'python')
+
+
+register_language('python', tree_sitter_python.language, iter_chunks, ['.py'])
@@ -0,0 +1,129 @@
+"""
+git diff 의 모든 hunk 를 라인 범위와 함께 파싱하고,
+변경된 라인을 새 파일 AST 의 가장 안쪽 함수/클래스 청크에 매핑
+"""
+import re
+from collections import namedtuple
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+# added_lines / removed_lines: (라인 번호, 내용) 목록 (각각 새 파일 / 이전 파일 기준)
+# deletion_gaps: 추가 없이 삭제만 된 위치의 새 파일 기준 (앞 라인, 뒤 라인)
+Hunk = namedtuple('Hunk', ['old_start', 'old_count', 'new_start', 'new_count',
+                           'added_lines', 'removed_lines', 'deletion_gaps'])
+
+
+def parse_hunks(diff_string):
+    """diff 문자열을 Hunk 목록으로 파싱"""
+    hunks = []
+    current = None
+    old_line = new_line = 0
+    # 진행 중인 삭제 구간과 그 직전 라인이 추가였는지 여부
+    deleting = False
+    after_add = False
+    prev = ''
+
+    def close_deletion():
+        # 추가 라인과 붙어 있지 않은 순수 삭제만 위치 정보로 기록
+        if current is not None and deleting and not after_add:
+            current.deletion_gaps.append((new_line - 1, new_line))
+
+    for line in diff_string.split('\n'):
+        header = HUNK_HEADER.match(line)
+        if header:
+            close_deletion()
+            deleting = False
+            old_start, old_count, new_start, new_count = header.groups()
+            current = Hunk(int(old_start), int(old_count or 1), int(new_start), int(new_count or 1), [], [], [])
+            hunks.append(current)
+            old_line, new_line = current.old_start, current.new_start
+            prev = ''
+            continue
+        if current is None or line.startswith('\\'):
+            # 첫 hunk 이전 헤더, "\ No newline at end of file"
+            continue
+
+        if line.startswith('+'):
+            deleting = False    # 삭제 직후 추가 → 교체
+            current.added_lines.append((new_line, line[1:]))
+            new_line += 1
+        elif line.startswith('-'):
+            if not deleting:
+                deleting = True
+                after_add = prev == '+'
+            current.removed_lines.append((old_line, line[1:]))
+            old_line += 1
+        else:
+            close_deletion()
+            deleting = False
+            old_line += 1
+            new_line += 1
+        prev = line[:1]
+
+    close_deletion()
+    return hunks
+
+
+def changed_lines(hunk):
+    """새 파일 기준으로 추가/수정된 라인 번호"""
+    return [line_no for line_no, _ in hunk.added_lines]
+
+
+class ChunkIntervalIndex:
+    """라인 → 그 라인을 감싸는 가장 안쪽 청크 조회용 인덱스"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        last_line = max((chunk.end_line for chunk in self.chunks), default=0)
+        self._innermost = [None] * (last_line + 1)
+        # 바깥(범위가 큰) 청크부터 칠하면 안쪽 청크가 덮어써 가장 안쪽이 남음
+        order = sorted(range(len(self.chunks)),
+                       key=lambda i: self.chunks[i].end_byte - self.chunks[i].start_byte,
+                       reverse=True)
+        for i in order:
+            chunk = self.chunks[i]
+            for line_no in range(chunk.start_line, chunk.end_line + 1):
+                self._innermost[line_no] = i
+
+    def find(self, line_no):
+        if 0 <= line_no < len(self._innermost):
+            i = self._innermost[line_no]
+            if i is not None:
+                return self.chunks[i]
+        return None
+
+    def find_spanning(self, before, after):
+        """before~after 라인을 모두 감싸는 가장 안쪽 청크 (삭제 위치 매핑용)"""
+        chunk = self.find(before)
+        if chunk is not None and chunk.end_line >= after:
+            return chunk
+        spanning = [c for c in self.chunks if c.start_line <= before and c.end_line >= after]
+        return min(spanning, key=lambda c: c.end_byte - c.start_byte, default=None)
+
+
+def affected_chunks(chunks, hunks):
+    """
+    변경 라인을 감싸는 청크(중복 제거, 파일 순서)와
+    어떤 청크에도 속하지 않는 변경이 있는 hunk 목록을 반환
+    """
+    index = ChunkIntervalIndex(chunks)
+    affected = {}
+    orphan_hunks = []
+
+    for hunk in hunks:
+        found = [index.find(line_no) for line_no in changed_lines(hunk)]
+        found += [index.find_spanning(before, after) for before, after in hunk.deletion_gaps]
+        for chunk in found:
+            if chunk is not None:
+                affected[(chunk.start_byte, chunk.end_byte)] = chunk
+        if None in found:
+            orphan_hunks.append(hunk)
+
+    ordered = sorted(affected.values(), key=lambda chunk: chunk.start_byte)
+    return ordered, orphan_hunks
+
+
+def hunk_text(hunk):
+    """함수 밖 변경용 질의 텍스트 (추가 라인, 없으면 삭제 라인)"""
+    lines = hunk.added_lines or hunk.removed_lines
+    return '\n'.join(content for _, content in lines)
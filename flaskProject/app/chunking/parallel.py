@@ -0,0 +1,135 @@
+"""
+여러 파일을 프로세스 풀에서 병렬로 청크화
+결과는 (path, language, chunks) 형태로 완료된 순서대로 반환됨
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .GetCode import chunk_source_file
+
+CHUNK_WORKERS = int(os.getenv('CHUNK_WORKERS', str(os.cpu_count() or 1)))
+# 파일 수가 이보다 적으면 풀을 쓰지 않고 현재 프로세스에서 처리
+PARALLEL_MIN_FILES = int(os.getenv('CHUNK_PARALLEL_MIN_FILES', '32'))
+
+_pool = None
+_pool_workers = 0
+_pool_users = {}    # 풀 → 사용 중인 chunk_files_parallel 수
+_pool_lock = threading.Lock()
+
+
+def get_chunk_pool(max_workers=None):
+    """프로세스 당 하나의 청크화 풀을 재사용 (워커 기동 비용 절감)"""
+    global _pool, _pool_workers
+    max_workers = max_workers or CHUNK_WORKERS
+    retired = None
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            # 이전 풀은 사용 중인 작업이 끝난 뒤 종료 (release_chunk_pool)
+            if _pool is not None and not _pool_users.get(_pool):
+                retired = _pool
+            # Flask 스레드/torch 가 로드된 부모 프로세스를 fork 하지 않도록 spawn 사용
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pool_workers = max_workers
+        pool = _pool
+    if retired is not None:
+        retired.shutdown(wait=True)
+    return pool
+
+
+def acquire_chunk_pool(max_workers=None):
+    """사용 중 표시 후 풀 반환 (끝나면 release_chunk_pool)"""
+    while True:
+        pool = get_chunk_pool(max_workers)
+        with _pool_lock:
+            # 그 사이 다른 스레드가 교체한 경우 다시 조회
+            if pool is _pool:
+                _pool_users[pool] = _pool_users.get(pool, 0) + 1
+                return pool
+
+
+def release_chunk_pool(pool):
+    with _pool_lock:
+        _pool_users[pool] -= 1
+        retired = not _pool_users[pool] and pool is not _pool
+        if not _pool_users[pool]:
+            del _pool_users[pool]
+    if retired:
+        pool.shutdown(wait=True)
+
+
+def replace_broken_pool(pool, max_workers=None):
+    """워커가 비정상 종료해 깨진 풀(BrokenProcessPool)을 버리고 새 풀을 사용 중으로 반환"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    release_chunk_pool(pool)
+    return acquire_chunk_pool(max_workers)
+
+
+def _chunk_one(task):
+    path, file_path, language = task
+    return path, language, chunk_source_file(file_path, language, path)
+
+
+def chunk_files_parallel(files, max_workers=None):
+    """
+    files: (path, file_path, language) 목록 또는 생성기 (필요한 만큼만 읽음)
+        path 는 결과에 그대로 돌려주는 식별자(보통 리포지토리 상대 경로)
+    """
+    files = iter(files)
+    max_workers = max_workers or CHUNK_WORKERS
+
+    # 파일 수를 세려고 전체를 읽지 않고 기준 개수만큼만 먼저 확인
+    head = list(itertools.islice(files, PARALLEL_MIN_FILES))
+    if max_workers <= 1 or len(head) < PARALLEL_MIN_FILES:
+        for task in itertools.chain(head, files):
+            yield _chunk_one(task)
+        return
+
+    pool = acquire_chunk_pool(max_workers)
+    # 동시에 제출하는 작업 수를 제한해 결과가 메모리에 쌓이지 않도록 함
+    max_pending = max_workers * 4
+    tasks = itertools.chain(head, files)
+    pending = {}    # future → (작업, 재시도 여부)
+
+    def submit(task, retried=False):
+        nonlocal pool
+        try:
+            future = pool.submit(_chunk_one, task)
+        except BrokenProcessPool:
+            pool = replace_broken_pool(pool, max_workers)
+            future = pool.submit(_chunk_one, task)
+        pending[future] = (task, retried)
+
+    try:
+        for task in itertools.islice(tasks, max_pending):
+            submit(task)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, retried = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # 풀이 깨지면 진행 중이던 작업은 새 풀에서 한 번 더 실행
+                    if not retried:
+                        submit(task, retried=True)
+                        continue
+                    # 다시 실패하면 (워커를 죽이는 파일 등) 빈 결과로 건너뜀
+                    print(f"청크화 워커 비정상 종료로 건너뜀: {task[0]}")
+                    result = task[0], task[2], []
+                yield result
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    submit(next_task)
+    finally:
+        release_chunk_pool(pool)
@@ -0,0 +1,97 @@
+"""
+청크 레코드: 경로/언어/종류/이름/바이트·라인 범위 + 파일 원본 memoryview 위의 지연 디코딩 텍스트
+파일 하나의 청크들은 같은 버퍼를 공유하므로 청크마다 문자열을 복사하지 않음
+"""
+
+
+class CodeChunk:
+    __slots__ = ('path', 'language', 'kind', 'name',
+                 'start_byte', 'end_byte', 'start_line', 'end_line',
+                 '_source', '_offset', '_text')
+
+    def __init__(self, path, language, kind, name, start_byte, end_byte, start_line, end_line,
+                 source, offset=0):
+        self.path = path
+        self.language = language
+        self.kind = kind
+        self.name = name
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+        self.start_line = start_line    # 1부터 시작
+        self.end_line = end_line
+        # 파일 전체(또는 청크 범위) 버퍼의 memoryview
+        self._source = source if isinstance(source, memoryview) else memoryview(source)
+        self._offset = offset           # _source[0] 의 파일 내 바이트 위치
+        self._text = None
+
+    @classmethod
+    def from_node(cls, node, source, path, language):
+        """tree-sitter 노드로부터 레코드 생성 (source 는 파일 전체 memoryview)"""
+        return cls(
+            path=path,
+            language=language,
+            kind=node.type,
+            name=node_name(node, source),
+            start_byte=node.start_byte,
+            end_byte=node.end_byte,
+            start_line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            source=source,
+        )
+
+    @property
+    def view(self):
+        """청크 범위의 memoryview (복사 없음)"""
+        return self._source[self.start_byte - self._offset:self.end_byte - self._offset]
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = str(self.view, 'utf-8', 'replace')
+        return self._text
+
+    def metadata(self):
+        return {
+            'path': self.path,
+            'language': self.language,
+            'kind': self.kind,
+            'name': self.name,
+            'start_byte': self.start_byte,
+            'end_byte': self.end_byte,
+            'start_line': self.start_line,
+            'end_line': self.end_line,
+        }
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"CodeChunk({self.path}:{self.start_line}-{self.end_line} {self.kind} {self.name!r})"
+
+    def __reduce__(self):
+        # 프로세스 간 전달 시에는 청크 범위 바이트만 직렬화
+        return (CodeChunk, (self.path, self.language, self.kind, self.name,
+                            self.start_byte, self.end_byte, self.start_line, self.end_line,
+                            bytes(self.view), self.start_byte))
+
+
+def to_source(code):
+    """str/bytes 입력을 파서용 bytes 와 공유 memoryview 로 변환"""
+    code_bytes = code.encode('utf8') if isinstance(code, str) else bytes(code)
+    return code_bytes, memoryview(code_bytes)
+
+
+def node_name(node, source):
+    """함수/클래스 이름 추출 (name 필드, 없으면 C 스타일 declarator 체인)"""
+    name_node = node.child_by_field_name('name')
+    if name_node is None:
+        declarator = node.child_by_field_name('declarator')
+        while declarator is not None and declarator.type not in ('identifier', 'field_identifier'):
+            declarator = declarator.child_by_field_name('declarator')
+        name_node = declarator
+    if name_node is None and node.parent is not None and node.parent.type == 'variable_declarator':
+        # const f = () => {} 형태
+        name_node = node.parent.child_by_field_name('name')
+    if name_node is None:
+        return ''
+    return str(source[name_node.start_byte:name_node.end_byte], 'utf-8', 'replace')
@@ -0,0 +1,60 @@
+"""
+언어별 tree-sitter 문법/파서/청커 레지스트리
+Language 는 프로세스 당 한 번, Parser 는 스레드 당 한 번만 생성해 재사용함
+
+새 언어 추가 예시:
+    register_language('typescript', tree_sitter_typescript.language_typescript, iter_chunks, ['.ts', '.tsx'])
+"""
+import threading
+
+from tree_sitter import Language, Parser
+
+_grammars = {}      # 언어 이름 → tree-sitter language 포인터를 반환하는 함수
+_extensions = {}    # 언어 이름 → 확장자 목록
+_chunkers = {}      # 언어 이름 → iter_chunks(source, path) 함수 (CodeChunk 레코드 생성)
+_languages = {}     # 언어 이름 → 생성된 Language (불변이라 스레드 간 공유)
+_generation = 0     # 등록이 바뀔 때마다 증가 → 스레드별 파서 캐시 무효화
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def register_language(name, language_factory, chunker, extensions=()):
+    """문법과 청커를 등록 (같은 이름이면 덮어씀)"""
+    global _generation
+    with _lock:
+        _grammars[name] = language_factory
+        _extensions[name] = list(extensions)
+        _chunkers[name] = chunker
+        _languages.pop(name, None)
+        _generation += 1
+
+
+def get_language(name):
+    language = _languages.get(name)
+    if language is None:
+        with _lock:
+            language = _languages.get(name)
+            if language is None:
+                language = Language(_grammars[name]())
+                _languages[name] = language
+    return language
+
+
+def get_parser(name):
+    """현재 스레드 전용 Parser 반환 (Parser 는 스레드 안전하지 않음)"""
+    parsers = getattr(_local, 'parsers', None)
+    if parsers is None or _local.generation != _generation:
+        parsers = _local.parsers = {}
+        _local.generation = _generation
+    parser = parsers.get(name)
+    if parser is None:
+        parser = parsers[name] = Parser(get_language(name))
+    return parser
+
+
+def get_chunker(name):
+    return _chunkers.get(name)
+
+
+def registered_extensions():
+    return {name: list(extensions) for name, extensions in _extensions.items()}
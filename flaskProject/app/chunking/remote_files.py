@@ -0,0 +1,215 @@
+"""
+clone 없이 GitLab API 로 리뷰에 필요한 파일만 가져오기
+- 변경 파일과 같은 디렉토리(패키지)의 같은 언어 파일을 tree API 로 조회
+- 파일 내용은 blob SHA 로 로컬 캐시 (같은 SHA 는 다시 받지 않음)
+- keep-alive 커넥션 풀을 쓰는 requests 세션을 프로세스 전체에서 공유, 요청은 스레드 풀로 동시에
+"""
+import fnmatch
+import os
+import posixpath
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from gitlab.exceptions import GitlabError
+from requests.adapters import HTTPAdapter
+
+from .scanner import GENERATED_FILE_PATTERNS, SNIFF_BYTES, sniff_content
+
+# GitLab 호스트 당 유지할 커넥션 수
+GITLAB_POOL_SIZE = int(os.getenv('GITLAB_POOL_SIZE', '16'))
+GITLAB_FETCH_WORKERS = int(os.getenv('GITLAB_FETCH_WORKERS', '8'))
+GITLAB_BLOB_CACHE_PATH = os.getenv('GITLAB_BLOB_CACHE_PATH', './blobCache')
+# blob 캐시 최대 크기, 넘으면 오래 쓰지 않은 blob 부터 90% 까지 삭제
+GITLAB_BLOB_CACHE_MAX_BYTES = int(os.getenv('GITLAB_BLOB_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# 변경 파일 디렉토리 당 함께 가져올 관련 파일 수
+GITLAB_RELATED_MAX_FILES = int(os.getenv('GITLAB_RELATED_MAX_FILES', '20'))
+# 이보다 큰 관련 파일은 저장하지 않음 (변경 파일은 크기와 무관하게 저장)
+GITLAB_RELATED_MAX_BYTES = int(os.getenv('GITLAB_RELATED_MAX_BYTES', str(256 * 1024)))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_gitlab_session():
+    """gitlab.Gitlab(session=...) 에 넘길 프로세스 공용 keep-alive 세션"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=GITLAB_POOL_SIZE, pool_maxsize=GITLAB_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+class BlobCache:
+    """blob SHA → 파일 내용 (내용 주소 기반이라 만료 없이 재사용, 최대 크기를 넘으면 LRU 삭제)"""
+
+    def __init__(self, path=GITLAB_BLOB_CACHE_PATH, max_bytes=GITLAB_BLOB_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None   # 첫 저장 시 디스크 사용량 계산
+        self._lock = threading.Lock()
+
+    def _blob_path(self, sha):
+        return self.path / sha[:2] / sha[2:]
+
+    def get(self, sha):
+        blob_path = self._blob_path(sha)
+        try:
+            data = blob_path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        # LRU: 읽은 blob 의 수정 시간 갱신
+        try:
+            os.utime(blob_path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, sha, data):
+        blob_path = self._blob_path(sha)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        # 동시에 같은 blob 을 쓰는 경우를 고려해 임시 파일 후 교체 ('.' 으로 시작하는 임시 파일은 삭제 대상 제외)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=blob_path.parent)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, blob_path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._iter_blobs())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _iter_blobs(self):
+        """(경로, 수정 시간, 크기)"""
+        for sub_dir in self.path.iterdir():
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir):
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, entry_stat.st_mtime, entry_stat.st_size
+
+    def _evict(self):
+        # 여러 캐시 인스턴스가 같은 디렉토리를 쓰므로 삭제 전에 실제 사용량을 다시 계산
+        blobs = sorted(self._iter_blobs(), key=lambda blob: blob[1])
+        self._size = sum(size for _, _, size in blobs)
+        target = self.max_bytes * 0.9
+        for blob_path, _, size in blobs:
+            if self._size <= target:
+                break
+            try:
+                os.remove(blob_path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def is_generated_name(path):
+    name = posixpath.basename(path)
+    return name.startswith('.') or any(fnmatch.fnmatch(name, pattern) for pattern in GENERATED_FILE_PATTERNS)
+
+
+class GitLabFileFetcher:
+    """
+    project: python-gitlab Project (lazy 객체도 가능)
+    language_of: 파일 경로 → 언어 (지원하지 않으면 None)
+    """
+
+    def __init__(self, project, ref, language_of, cache=None, max_workers=GITLAB_FETCH_WORKERS,
+                 related_max_files=GITLAB_RELATED_MAX_FILES, related_max_bytes=GITLAB_RELATED_MAX_BYTES):
+        self.project = project
+        self.ref = ref
+        self.language_of = language_of
+        self.cache = cache or BlobCache()
+        self.max_workers = max_workers
+        self.related_max_files = related_max_files
+        self.related_max_bytes = related_max_bytes
+
+    def list_directory(self, dir_path):
+        """디렉토리 바로 아래 파일의 {경로: blob SHA}"""
+        try:
+            entries = self.project.repository_tree(path=dir_path, ref=self.ref, all=True)
+        except GitlabError as e:
+            # 삭제된 파일만 있던 디렉토리 등
+            print(f"디렉토리 목록 조회 실패: {dir_path or '/'} - {e}")
+            return {}
+        return {entry['path']: entry['id'] for entry in entries if entry['type'] == 'blob'}
+
+    def fetch_blob(self, sha):
+        data = self.cache.get(sha)
+        if data is None:
+            data = self.project.repository_raw_blob(sha)
+            self.cache.put(sha, data)
+        return data
+
+    def select_files(self, changed_paths, listings):
+        """변경 파일 + 디렉토리별 관련 파일 (경로 순, 같은 언어만) → {경로: blob SHA}"""
+        selected = {}
+        for path in changed_paths:
+            sha = listings.get(posixpath.dirname(path), {}).get(path)
+            if sha:
+                selected[path] = sha
+
+        for files in listings.values():
+            related = [path for path in sorted(files)
+                       if path not in selected and self.language_of(path) and not is_generated_name(path)]
+            for path in related[:self.related_max_files]:
+                selected[path] = files[path]
+        return selected
+
+    def fetch_review_files(self, changed_paths, destination):
+        """
+        변경 파일과 관련 파일을 destination 아래 같은 상대 경로로 저장
+        (변경 파일 목록, 관련 파일 목록) 반환
+        """
+        changed_paths = list(dict.fromkeys(changed_paths))
+        changed_set = set(changed_paths)
+        directories = sorted({posixpath.dirname(path) for path in changed_paths})
+        destination = Path(destination)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='gitlab-fetch') as pool:
+            listings = dict(zip(directories, pool.map(self.list_directory, directories)))
+            selected = self.select_files(changed_paths, listings)
+
+            def fetch(item):
+                path, sha = item
+                data = self.fetch_blob(sha)
+                # 관련 파일은 참고용이므로 큰 파일, 바이너리 / minified / 자동 생성 파일은 제외
+                if path not in changed_set and (len(data) > self.related_max_bytes
+                                                or sniff_content(data[:SNIFF_BYTES])):
+                    return None
+                file_path = destination / path
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(data)
+                return path
+
+            written = [path for path in pool.map(fetch, selected.items()) if path]
+
+        changed = [path for path in written if path in changed_set]
+        related = [path for path in written if path not in changed_set]
+        return changed, related
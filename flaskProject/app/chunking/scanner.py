@@ -0,0 +1,272 @@
+"""
+인덱싱 대상 소스 파일 스캐너
+- os.scandir 로 순회하며 제외 디렉토리는 내려가지 않음 (숨김 폴더, node_modules, dist, vendor ...)
+- .gitignore (하위 디렉토리 포함) 규칙 적용
+- 크기 제한, 바이너리 / 압축(minified) / 자동 생성 파일은 파싱 전에 앞부분만 읽어 제외
+"""
+import fnmatch
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_EXCLUDE_DIRS = (
+    'node_modules', 'bower_components', 'jspm_packages', 'vendor', 'vendors', 'third_party', 'thirdparty',
+    'dist', 'build', 'target', 'coverage', 'site-packages', 'venv', '__pycache__', 'generated',
+)
+# 쉼표로 구분, 기본 목록에 추가
+EXCLUDE_DIRS = frozenset(DEFAULT_EXCLUDE_DIRS) | frozenset(
+    name.strip() for name in os.getenv('SCAN_EXCLUDE_DIRS', '').split(',') if name.strip()
+)
+# 리포지토리 상대 경로 glob (예: "docs/*,*/fixtures/*")
+EXCLUDE_GLOBS = tuple(
+    pattern.strip() for pattern in os.getenv('SCAN_EXCLUDE_GLOBS', '').split(',') if pattern.strip()
+)
+MAX_FILE_BYTES = int(os.getenv('SCAN_MAX_FILE_BYTES', str(1024 * 1024)))
+# 이보다 긴 라인이 있으면 minified 로 판단
+MAX_LINE_LENGTH = int(os.getenv('SCAN_MAX_LINE_LENGTH', '1000'))
+RESPECT_GITIGNORE = os.getenv('SCAN_RESPECT_GITIGNORE', 'true').lower() in ('1', 'true', 'yes')
+
+# 판별에 읽는 파일 앞부분 크기
+SNIFF_BYTES = 8192
+
+GENERATED_FILE_PATTERNS = (
+    '*.min.js', '*-min.js', '*.bundle.js', '*.chunk.js', '*.min.jsx',
+    '*_pb2.py', '*_pb2_grpc.py', '*.pb.c', '*.pb.h', '*.pb-c.c', '*.pb-c.h',
+    '*.generated.*', '*_generated.*',
+)
+GENERATED_MARKERS = re.compile(
+    rb'@generated|do not edit|code generated by|auto-generated|autogenerated|generated by the protocol buffer',
+    re.IGNORECASE
+)
+
+
+def _glob_to_regex(pattern):
+    """gitignore glob → 정규식 (**, *, ?, [...] 지원)"""
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == n:
+            out.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape('['))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end + 1
+        elif pattern[i] == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+
+class IgnoreRule:
+    __slots__ = ('base', 'regex', 'negate', 'dir_only')
+
+    def __init__(self, base, pattern):
+        self.base = base            # .gitignore 가 있는 디렉토리 (리포지토리 상대, 루트는 '')
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # 슬래시가 있으면 .gitignore 위치 기준, 없으면 모든 깊이의 이름과 비교
+        anchored = '/' in pattern
+        body = _glob_to_regex(pattern.lstrip('/'))
+        self.regex = re.compile(('^' if anchored else '^(?:.*/)?') + body + '$')
+
+    def matches(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return self.regex.match(rel_path) is not None
+
+
+def parse_gitignore(path, base=''):
+    rules = []
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.rstrip('\n').rstrip()
+                if not line or line.startswith('#'):
+                    continue
+                rules.append(IgnoreRule(base, line))
+    except OSError as e:
+        print(f".gitignore 읽기 실패: {path} - {e}")
+    return rules
+
+
+def is_ignored(rules, rel_path, is_dir):
+    # 마지막으로 일치한 규칙이 결정 (! 규칙은 다시 포함)
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(rel_path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def sniff_content(head, max_line_length=MAX_LINE_LENGTH):
+    """파일 앞부분으로 binary / minified / generated 판별, 해당 없으면 None"""
+    if b'\0' in head:
+        return 'binary'
+    lines = head.split(b'\n')
+    # 마지막 라인은 잘렸을 수 있으므로 제외하고 판단
+    complete = lines[:-1] if len(lines) > 1 else lines
+    if any(len(line) > max_line_length for line in complete):
+        return 'minified'
+    if GENERATED_MARKERS.search(head[:2048]):
+        return 'generated'
+    return None
+
+
+class RepositoryScanner:
+    """
+    language_of: 파일 경로 → 언어 (지원하지 않으면 None)
+    skipped: 제외 사유별 개수
+    """
+
+    def __init__(self, root, language_of, exclude_dirs=EXCLUDE_DIRS, exclude_globs=EXCLUDE_GLOBS,
+                 max_file_bytes=MAX_FILE_BYTES, respect_gitignore=RESPECT_GITIGNORE):
+        self.root = Path(root)
+        self.language_of = language_of
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.exclude_globs = tuple(exclude_globs)
+        self.max_file_bytes = max_file_bytes
+        self.respect_gitignore = respect_gitignore
+        self.skipped = Counter()
+
+    def scan(self):
+        """인덱싱 대상 (상대 경로, 언어) 생성 (경로 순)"""
+        root_rules = self._load_rules(self.root, '', [])
+        stack = [(str(self.root), '', root_rules)]
+        while stack:
+            dir_path, rel_dir, rules = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                print(f"디렉토리 읽기 실패: {dir_path} - {e}")
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    reason = self._check_dir(entry.name, rel_path, rules)
+                    if reason:
+                        self.skipped[reason] += 1
+                    else:
+                        subdirs.append((entry.path, rel_path))
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+
+                language = self.language_of(entry.name)
+                if not language:
+                    continue
+                reason = self._check_file(entry, rel_path, rules)
+                if reason:
+                    self.skipped[reason] += 1
+                    continue
+                yield rel_path, language
+
+            # 경로 순서를 유지하도록 역순으로 스택에 추가
+            for sub_path, sub_rel in reversed(subdirs):
+                stack.append((sub_path, sub_rel, self._load_rules(Path(sub_path), sub_rel, rules)))
+
+    def accepts(self, rel_path):
+        """변경된 파일 하나가 인덱싱 대상인지 (증분 인덱싱용)"""
+        parts = rel_path.split('/')
+        rules = self._load_rules(self.root, '', [])
+        for depth in range(1, len(parts)):
+            rel_dir = '/'.join(parts[:depth])
+            if self._check_dir(parts[depth - 1], rel_dir, rules):
+                return False
+            rules = self._load_rules(self.root / rel_dir, rel_dir, rules)
+
+        file_path = self.root / rel_path
+        try:
+            entry_stat = file_path.stat()
+        except OSError:
+            return False
+        return self._check_file(_PathEntry(file_path, entry_stat), rel_path, rules) is None
+
+    def _load_rules(self, dir_path, rel_dir, parent_rules):
+        if not self.respect_gitignore:
+            return parent_rules
+        gitignore = Path(dir_path) / '.gitignore'
+        if not gitignore.is_file():
+            return parent_rules
+        return parent_rules + parse_gitignore(gitignore, rel_dir)
+
+    def _check_dir(self, name, rel_path, rules):
+        if name.startswith('.'):
+            return 'hidden'
+        if name in self.exclude_dirs:
+            return 'excluded_dir'
+        if self._matches_glob(rel_path):
+            return 'excluded_glob'
+        if rules and is_ignored(rules, rel_path, True):
+            return 'gitignore'
+        return None
+
+    def _check_file(self, entry, rel_path, rules):
+        if entry.name.startswith('.'):
+            return 'hidden'
+        if self._matches_glob(rel_path):
+            return 'excluded_glob'
+        if rules and is_ignored(rules, rel_path, False):
+            return 'gitignore'
+        if any(fnmatch.fnmatch(entry.name, pattern) for pattern in GENERATED_FILE_PATTERNS):
+            return 'generated'
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            return 'unreadable'
+        if size > self.max_file_bytes:
+            return 'too_large'
+        try:
+            with open(entry.path, 'rb') as f:
+                head = f.read(SNIFF_BYTES)
+        except OSError:
+            return 'unreadable'
+        return sniff_content(head)
+
+    def _matches_glob(self, rel_path):
+        return any(fnmatch.fnmatch(rel_path, pattern) for pattern in self.exclude_globs)
+
+
+class _PathEntry:
+    """os.DirEntry 와 같은 속성만 제공 (accepts 용)"""
+    __slots__ = ('name', 'path', '_stat')
+
+    def __init__(self, path, entry_stat):
+        self.name = path.name
+        self.path = str(path)
+        self._stat = entry_stat
+
+    def stat(self):
+        return self._stat
@@ -0,0 +1,25 @@
+"""
+TreeCursor 기반 반복(비재귀) AST 순회
+재귀 + 리스트 extend 대신 제너레이터로 필요한 노드만 하나씩 반환함
+"""
+
+
+def iter_nodes(root, target_types, skip_types=()):
+    """
+    root 아래 노드를 전위 순회하며 type 이 target_types 에 속한 노드를 생성
+    skip_types 에 속한 노드(문자열, 주석 등)는 하위로 내려가지 않음
+    """
+    cursor = root.walk()
+    while True:
+        node = cursor.node
+        node_type = node.type
+        if node_type in target_types:
+            yield node
+
+        if node_type not in skip_types and cursor.goto_first_child():
+            continue
+
+        # 다음 형제 → 없으면 부모로 올라가며 형제 탐색
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
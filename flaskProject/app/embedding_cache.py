@@ -0,0 +1,136 @@
+# embedding_cache.py
+"""
+청크 텍스트 + 모델 ID 해시를 키로 하는 로컬 SQLite 임베딩 캐시
+변경되지 않은 메서드는 MR 마다 다시 임베딩하지 않도록 함
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .metrics import register_cache
+
+DEFAULT_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', './embeddingCache/embeddings.sqlite3')
+DEFAULT_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '200000'))
+
+
+def make_cache_key(text, model_id):
+    return hashlib.sha256(f"{model_id}\0{text}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, model_id='', max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, texts, model_id=None):
+        """texts 순서대로 캐시된 벡터(없으면 None) 리스트 반환 (model_id 를 주면 해당 모델 기준)"""
+        model_id = model_id or self.model_id
+        keys = [make_cache_key(text, model_id) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite 변수 개수 제한 때문에 나눠서 조회
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ','.join('?' * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            # LRU: 조회된 항목의 접근 시간 갱신
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            vectors = [found.get(key) for key in keys]
+            hit_count = sum(1 for vector in vectors if vector is not None)
+            self.hits += hit_count
+            self.misses += len(vectors) - hit_count
+        return vectors
+
+    def put_many(self, texts, vectors, model_id=None):
+        # model_id: 벡터를 실제로 계산한 모델 (서버 → 로컬 대체 시 다른 키로 저장)
+        model_id = model_id or self.model_id
+        now = time.time()
+        rows = [
+            (make_cache_key(text, model_id), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", rows
+            )
+            self._size += self._conn.total_changes - before
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # 최대 개수 초과 시 가장 오래 접근하지 않은 항목부터 삭제
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._size -= overflow
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': self._size,
+            'max_entries': self.max_entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache(model_id):
+    """프로세스 당 하나의 공유 캐시 인스턴스"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(model_id=model_id)
+            register_cache('embedding', _default_cache.stats)
+        return _default_cache
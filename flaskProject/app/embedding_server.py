@@ -0,0 +1,278 @@
+# embedding_server.py
+"""
+공유 임베딩 서버
+- 별도 프로세스 하나가 GraphCodeBERT 를 로드하고 Unix 소켓으로 임베딩 요청을 받음
+- 여러 리뷰 작업/Flask 워커의 요청을 최대 대기 시간 안에서 모아 한 번에 배치 임베딩 (micro-batching)
+- EMBEDDING_SERVER_SOCKET 이 설정되면 GraphCodeBERTEmbeddings 가 자동으로 이 서버를 사용
+
+- 메시지를 pickle 로 주고받으므로 EMBEDDING_SERVER_AUTHKEY 가 없으면 서버를 시작하지 않고,
+  소켓 파일은 소유자만 접근 가능하도록 생성 (0600, 상위 디렉토리가 없으면 0700 으로 생성)
+
+실행:
+    EMBEDDING_SERVER_SOCKET=/run/edith/embedding.sock EMBEDDING_SERVER_AUTHKEY=... python -m app.embedding_server
+"""
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from .models.codebert_model import embedding_model_id, get_code_embeddings, load_model
+
+# 비어 있으면 서버를 쓰지 않고 각 프로세스에서 모델을 로드
+EMBEDDING_SERVER_SOCKET = os.getenv('EMBEDDING_SERVER_SOCKET', '')
+# 서버/클라이언트 공통 인증 키 (필수)
+EMBEDDING_SERVER_AUTHKEY = os.getenv('EMBEDDING_SERVER_AUTHKEY', '').encode('utf-8') or None
+# 배치를 모으기 위해 첫 요청 이후 기다리는 최대 시간(ms)과 한 배치의 최대 스니펫 수
+MICRO_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_SERVER_MAX_WAIT_MS', '10'))
+MICRO_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_SERVER_MAX_BATCH', '64'))
+# 클라이언트 응답 대기 시간(초)
+CLIENT_TIMEOUT = float(os.getenv('EMBEDDING_SERVER_TIMEOUT', '120'))
+# 서버에 연결할 수 없을 때 로컬 모델로 대신 임베딩할지 여부
+EMBEDDING_SERVER_FALLBACK = os.getenv('EMBEDDING_SERVER_FALLBACK', 'true').lower() in ('1', 'true', 'yes')
+
+
+class _Request:
+    __slots__ = ('texts', 'event', 'result', 'error')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """동시에 들어온 요청들을 max_wait 안에서 max_batch 개까지 모아 embed_fn 한 번으로 처리"""
+
+    def __init__(self, embed_fn, max_batch=MICRO_BATCH_MAX_SIZE, max_wait=MICRO_BATCH_WAIT_MS / 1000):
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='embedding-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        request = _Request(list(texts))
+        if not request.texts:
+            return []
+        self._queue.put(request)
+        request.event.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                count += len(request.texts)
+            self._run(batch)
+
+    def _run(self, batch):
+        # 요청 간 같은 스니펫은 한 번만 임베딩
+        positions = {}
+        for request in batch:
+            for text in request.texts:
+                positions.setdefault(text, len(positions))
+        try:
+            vectors = self.embed_fn(list(positions))
+            for request in batch:
+                request.result = [vectors[positions[text]] for text in request.texts]
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        self.requests += len(batch)
+        self.batches += 1
+        self.texts += len(positions)
+        for request in batch:
+            request.event.set()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'texts': self.texts,
+            'avg_batch_size': self.texts / self.batches if self.batches else 0.0,
+        }
+
+
+class EmbeddingServer:
+    def __init__(self, address=EMBEDDING_SERVER_SOCKET, authkey=EMBEDDING_SERVER_AUTHKEY, batcher=None):
+        # 인증 없이 열면 같은 호스트의 누구나 pickle 메시지로 서버 프로세스에서 코드를 실행할 수 있음
+        if not authkey:
+            raise ValueError("EMBEDDING_SERVER_AUTHKEY 가 설정되지 않아 임베딩 서버를 시작할 수 없습니다.")
+        self.address = address
+        self.authkey = authkey
+        self.batcher = batcher or MicroBatcher(get_code_embeddings)
+        self._listener = None
+
+    def serve_forever(self):
+        # 이전 실행에서 남은 소켓 파일 제거
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = self._listen()
+        print(f"임베딩 서버 시작: {self.address}")
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except (AuthenticationError, EOFError) as e:
+                    # 인증 키가 틀린 연결은 거부하고 계속 대기
+                    print(f"임베딩 서버 인증 실패: {e}")
+                    continue
+                except OSError as e:
+                    if self._listener is None:
+                        break
+                    print(f"임베딩 서버 연결 수락 실패: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), name='embedding-conn', daemon=True).start()
+        finally:
+            self.close()
+
+    def _listen(self):
+        # 소켓 파일을 소유자만 연결할 수 있도록 생성 (생성 시점부터 0600)
+        directory = os.path.dirname(os.path.abspath(self.address))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)
+        return listener
+
+    def close(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+
+    def _handle(self, conn):
+        # 연결 하나에서 요청을 순서대로 처리 (클라이언트는 스레드별로 연결)
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if op == 'embed':
+                        vectors = self.batcher.submit(payload)
+                        result = np.stack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), np.float32)
+                    elif op == 'model_id':
+                        result = embedding_model_id()
+                    elif op == 'stats':
+                        result = self.batcher.stats()
+                    else:
+                        raise ValueError(f"알 수 없는 요청: {op}")
+                    conn.send(('ok', result))
+                except Exception as e:
+                    print(f"임베딩 서버 요청 처리 실패: {e}")
+                    try:
+                        conn.send(('error', str(e)))
+                    except OSError:
+                        return
+
+
+class EmbeddingClient:
+    """스레드별 연결을 재사용하는 임베딩 서버 클라이언트"""
+
+    def __init__(self, address=EMBEDDING_SERVER_SOCKET, authkey=EMBEDDING_SERVER_AUTHKEY, timeout=CLIENT_TIMEOUT):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, op, payload=None):
+        # 서버 재시작 등으로 연결이 끊긴 경우 한 번 다시 연결
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, payload))
+                if not conn.poll(self.timeout):
+                    self._drop_connection()
+                    raise TimeoutError(f"임베딩 서버 응답 시간 초과: {self.address}")
+                status, result = conn.recv()
+                break
+            except (EOFError, ConnectionError, BrokenPipeError):
+                self._drop_connection()
+                if attempt:
+                    raise
+        if status != 'ok':
+            raise RuntimeError(f"임베딩 서버 오류: {result}")
+        return result
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        return list(self._call('embed', texts))
+
+    def model_id(self):
+        return self._call('model_id')
+
+    def stats(self):
+        return self._call('stats')
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_embedding_client():
+    """EMBEDDING_SERVER_SOCKET 이 설정된 경우 프로세스 당 하나의 클라이언트 (아니면 None)"""
+    global _client
+    if not EMBEDDING_SERVER_SOCKET:
+        return None
+    if not EMBEDDING_SERVER_AUTHKEY:
+        print("EMBEDDING_SERVER_AUTHKEY 가 설정되지 않아 임베딩 서버 대신 로컬 모델을 사용합니다.")
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = EmbeddingClient()
+        return _client
+
+
+def main():
+    if not EMBEDDING_SERVER_SOCKET:
+        raise SystemExit("EMBEDDING_SERVER_SOCKET 환경 변수를 설정해주세요.")
+    if not EMBEDDING_SERVER_AUTHKEY:
+        raise SystemExit("EMBEDDING_SERVER_AUTHKEY 환경 변수를 설정해주세요.")
+    load_model()
+    EmbeddingServer().serve_forever()
+
+
+if __name__ == '__main__':
+    main()
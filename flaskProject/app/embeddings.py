@@ -1,44 +1,283 @@
 # embeddings.py
-from langchain_chroma import Chroma
-from .models.codebert_model import get_code_embedding
+import hashlib
+import json
+import threading
+from .models.codebert_model import embedding_model_id, get_code_embeddings
+from .embedding_cache import get_default_cache
+from .embedding_server import EMBEDDING_SERVER_FALLBACK, get_embedding_client
+from .metrics import stage
+from .vector_store import VECTOR_STORE_BACKEND, create_vector_store
 from langchain.embeddings.base import Embeddings
 
+_server_model_ids = {}     # 임베딩 서버 클라이언트 → 서버 모델 id
+_server_model_ids_lock = threading.Lock()
+
+
+def get_server_model_id(client):
+    """임베딩 서버의 모델 id (프로세스 당 한 번만 조회, 연결할 수 없으면 None)"""
+    with _server_model_ids_lock:
+        model_id = _server_model_ids.get(client)
+    if model_id is not None:
+        return model_id
+    try:
+        model_id = client.model_id()
+    except Exception as e:
+        print(f"임베딩 서버 연결 실패: {e}")
+        return None
+    with _server_model_ids_lock:
+        return _server_model_ids.setdefault(client, model_id)
+
+
 # 래퍼 클래스 생성
 class GraphCodeBERTEmbeddings(Embeddings):
+    def __init__(self, batch_size=None, cache=None, use_cache=True, client=None):
+        self.batch_size = batch_size
+        # EMBEDDING_SERVER_SOCKET 설정 시 공유 임베딩 서버 사용 (이 프로세스에는 모델을 로드하지 않음)
+        self.client = client if client is not None else get_embedding_client()
+        # 캐시 조회에 쓰는 모델 id (저장은 실제로 계산한 모델 id 로)
+        self.model_id = self._model_id()
+        self.cache = cache if cache is not None else (get_default_cache(self.model_id) if use_cache else None)
+
+    def _model_id(self):
+        if self.client is not None:
+            model_id = get_server_model_id(self.client)
+            if model_id is not None:
+                return model_id
+            if EMBEDDING_SERVER_FALLBACK:
+                # 서버에 연결할 수 없으면 이 인스턴스는 처음부터 로컬 모델 사용
+                self.client = None
+        return embedding_model_id()
+
+    def _compute(self, texts):
+        """(벡터, 벡터를 계산한 모델 id)"""
+        if self.client is not None:
+            try:
+                return self.client.embed(texts), get_server_model_id(self.client)
+            except Exception as e:
+                if not EMBEDDING_SERVER_FALLBACK:
+                    raise
+                print(f"임베딩 서버 요청 실패, 로컬 모델 사용: {e}")
+        # 스니펫 단위 반복 대신 길이 정렬 배치로 한 번에 임베딩
+        return get_code_embeddings(texts, batch_size=self.batch_size), embedding_model_id()
+
     def embed_documents(self, texts):
-        return [self.embed_query(text) for text in texts]
+        texts = list(texts)
+        with stage('embed', items=len(texts), nbytes=sum(len(text) for text in texts)) as record:
+            if self.cache is None:
+                return self._compute(texts)[0]
+
+            # 캐시에 없는 청크만 모델에 전달
+            embeddings = self.cache.get_many(texts, model_id=self.model_id)
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            record.cache_hits = len(texts) - len(missing)
+            if missing:
+                missing_texts = [texts[i] for i in missing]
+                computed, computed_model_id = self._compute(missing_texts)
+                # 서버 → 로컬 대체로 계산한 벡터는 로컬 모델 id 로 저장 (서버 모델 캐시와 섞지 않음)
+                if computed_model_id:
+                    self.cache.put_many(missing_texts, computed, model_id=computed_model_id)
+                for i, embedding in zip(missing, computed):
+                    embeddings[i] = embedding
+            return embeddings
 
     def embed_query(self, code_snippet):
-        return get_code_embedding(code_snippet)
+        return self.embed_documents([code_snippet])[0]
 
 class CodeEmbeddingProcessor:
-    def __init__(self):
-        self.db = Chroma(
-            embedding_function=GraphCodeBERTEmbeddings(),
-            collection_name=f'code_embeddings',
-            persist_directory=None  # 메모리에만 저장
-        )
-
-    # Chunk 코드 임베딩
-    def store_embeddings(self, code_snippets):
+    def __init__(self, persist_directory=None, collection_name='code_embeddings', backend=None):
+        self.persist_directory = persist_directory  # None 이면 메모리에만 저장
+        self.collection_name = collection_name
+        self.embeddings = GraphCodeBERTEmbeddings()
+        # VECTOR_STORE_BACKEND: chroma(기본) / local(float16·int8 memmap + ANN)
+        self.backend = backend or VECTOR_STORE_BACKEND
+        self.store = create_vector_store(self.backend, persist_directory, collection_name)
+
+    # Chunk 코드 임베딩 (id 를 주지 않으면 내용 해시로 생성, 같은 id 는 한 번만 저장)
+    def store_embeddings(self, code_snippets, metadatas=None, ids=None):
         try:
-            self.db.add_texts(
-                texts=code_snippets,
-            )
+            ids, texts, metadatas = self._prepare(code_snippets, metadatas, ids)
+            if not ids:
+                return True
+            self.add_embeddings(ids, texts, self.embed_texts(texts), metadatas)
             return True
         except Exception as e:
             print(f"Error storing embeddings: {e}")
             return False
 
+    def _prepare(self, code_snippets, metadatas=None, ids=None):
+        code_snippets = list(code_snippets)
+        metadatas = list(metadatas) if metadatas else [{} for _ in code_snippets]
+        ids = list(ids) if ids else [chunk_id('', text) for text in code_snippets]
+
+        unique = {}
+        for item_id, text, metadata in zip(ids, code_snippets, metadatas):
+            unique[item_id] = (text, dict(metadata, content_hash=content_hash(text)))
+        return (list(unique),
+                [text for text, _ in unique.values()],
+                [metadata for _, metadata in unique.values()])
+
+    # (path, CodeChunk) 목록 → 저장할 (ids, texts, metadatas) (여러 파일의 청크를 한 배치로 묶을 때 사용)
+    def prepare_file_chunks(self, path_chunks):
+        texts, metadatas, ids = [], [], []
+        for path, chunk in path_chunks:
+            text = chunk.text
+            texts.append(text)
+            metadatas.append(dict(chunk.metadata(), path=path))
+            ids.append(chunk_id(path, text))
+        return self._prepare(texts, metadatas, ids)
+
+    def embed_texts(self, texts):
+        # 같은 내용(getter/setter 등 보일러플레이트)은 한 번만 임베딩
+        positions = {}
+        for text in texts:
+            positions.setdefault(text, len(positions))
+        vectors = self.embeddings.embed_documents(list(positions))
+        return [vectors[positions[text]] for text in texts]
+
+    def add_embeddings(self, ids, texts, embeddings, metadatas):
+        with stage('store', items=len(texts), nbytes=sum(len(text) for text in texts)):
+            self.store.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+
+    # 파일 단위 청크 레코드 저장 (path 메타데이터로 이후 삭제, 위치 정보로 원본 추적 가능)
+    def store_file_chunks(self, path, chunks):
+        if not chunks:
+            return True
+        texts = [chunk.text for chunk in chunks]
+        metadatas = [dict(chunk.metadata(), path=path) for chunk in chunks]
+        ids = [chunk_id(path, text) for text in texts]
+        return self.store_embeddings(texts, metadatas=metadatas, ids=ids)
+
+    # 파일에 속한 벡터 삭제
+    def delete_file(self, path):
+        try:
+            self.store.delete(where={'path': path})
+            return True
+        except Exception as e:
+            print(f"Error deleting embeddings: {e}")
+            return False
+
+    # 컬렉션 전체 초기화
+    def reset(self):
+        try:
+            self.store.reset()
+            return True
+        except Exception as e:
+            print(f"Error resetting collection: {e}")
+            return False
+
+    # 임시 저장소 삭제
+    def drop(self):
+        try:
+            self.store.drop()
+            return True
+        except Exception as e:
+            print(f"Error dropping collection: {e}")
+            return False
+
+    # 인덱싱 작업 종료 후 저장소 상태 저장
+    def flush(self):
+        try:
+            self.store.flush()
+            return True
+        except Exception as e:
+            print(f"Error flushing vector store: {e}")
+            return False
+
     # 유사 코드 검색
-    def query_similar_code(self, code_snippet, n_results=5):
+    def query_similar_code(self, code_snippet, n_results=5, language=None, exclude_path=None):
+        return self.query_similar_code_batch(
+            [code_snippet], n_results, filters=[{'language': language, 'exclude_path': exclude_path}]
+        )[0]
+
+    # 여러 스니펫을 한 번에 검색 (배치 임베딩 + 언어별 한 번의 k-NN 질의, 쿼리 간/내용 중복 제거)
+    # filters: 쿼리별 {'language', 'exclude_path'} 목록
+    def query_similar_code_batch(self, code_snippets, n_results=5, filters=None):
+        code_snippets = list(code_snippets)
+        if not code_snippets:
+            return []
+        filters = [query_filter or {} for query_filter in (filters or [{} for _ in code_snippets])]
         try:
-            results = self.db.similarity_search_with_score(
-                query=code_snippet,
-                k=n_results
-            )
-            related_codes = [doc.page_content for doc, score in results]
+            query_embeddings = self.embeddings.embed_documents(code_snippets)
+
+            # exclude_path 는 파일마다 달라 그대로 묶으면 파일 수만큼 질의하게 되므로
+            # 언어 필터로만 묶어 한 번에 검색하고, 리뷰 중인 파일은 결과에서 제외
+            groups = {}
+            for query_index, query_filter in enumerate(filters):
+                where = build_where(language=query_filter.get('language'))
+                key = json.dumps(where, sort_keys=True)
+                groups.setdefault(key, (where, []))[1].append(query_index)
+
+            # 같은 내용이 여러 번 저장된 경우를 고려해 넉넉히 가져온 뒤 내용 기준으로 합침
+            # (제외할 파일 자신의 청크가 상위에 오는 경우를 고려해 두 배로)
+            fetch_count = n_results * DUPLICATE_FETCH_FACTOR
+            best = {}
+            for where, query_indexes in groups.values():
+                with stage('query', items=len(query_indexes)):
+                    results = self.store.query(
+                        query_embeddings=[query_embeddings[i] for i in query_indexes],
+                        n_results=fetch_count * 2,
+                        where=where
+                    )
+                refetch = []
+                for query_index, hits in zip(query_indexes, results):
+                    exclude_path = filters[query_index].get('exclude_path')
+                    kept = [hit for hit in hits if not exclude_path or (hit[2] or {}).get('path') != exclude_path]
+                    if len(kept) < n_results and len(hits) == fetch_count * 2:
+                        # 제외한 파일의 청크로 결과가 모자라면 이 쿼리만 파일 제외 필터로 다시 검색
+                        refetch.append(query_index)
+                    else:
+                        collect_best(best, query_index, kept)
+
+                for query_index in refetch:
+                    with stage('query', items=1):
+                        hits = self.store.query(
+                            query_embeddings=[query_embeddings[query_index]],
+                            n_results=fetch_count,
+                            where=build_where(**filters[query_index])
+                        )[0]
+                    collect_best(best, query_index, hits)
+
+            related_codes = [[] for _ in code_snippets]
+            for distance, query_index, document in sorted(best.values(), key=lambda item: item[0]):
+                if len(related_codes[query_index]) < n_results:
+                    related_codes[query_index].append(document)
             return related_codes
         except Exception as e:
             print(f"Error querying similar code: {e}")
-            return []
+            return [[] for _ in code_snippets]
+
+
+def collect_best(best, query_index, hits):
+    """내용 해시별로 가장 가까운 (거리, 쿼리, 문서)만 남김"""
+    for doc_id, document, metadata, distance in hits:
+        key = (metadata or {}).get('content_hash') or content_hash(document)
+        # 같은 코드가 여러 쿼리에 걸리면 가장 가까운 쿼리에만 남김
+        if key not in best or distance < best[key][0]:
+            best[key] = (distance, query_index, document)
+
+
+# 검색 시 중복 제거를 위해 n_results 의 몇 배를 가져올지
+DUPLICATE_FETCH_FACTOR = 3
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+def chunk_id(path, text):
+    """경로 + 내용 기반의 안정적인 청크 id (같은 파일의 같은 코드는 같은 id)"""
+    return hashlib.sha256(f"{path}\0{text}".encode('utf-8')).hexdigest()
+
+
+def build_where(language=None, exclude_path=None):
+    """같은 언어만, 리뷰 중인 파일은 제외하는 메타데이터 필터"""
+    conditions = []
+    if language:
+        conditions.append({'language': language})
+    if exclude_path:
+        conditions.append({'path': {'$ne': exclude_path}})
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {'$and': conditions}
@@ -0,0 +1,217 @@
+# jobs.py
+"""
+코드 리뷰 비동기 작업 큐
+요청 스레드에서 파이프라인을 돌리지 않고 워커 풀에 제출한 뒤 jobId 로 상태를 조회
+같은 projectId + branch + commits 조합은 하나의 작업으로 합침
+같은 projectId + branch 작업은 미러/워크트리/인덱스를 공유하므로 한 번에 하나씩 실행
+"""
+import hashlib
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import track_pipeline
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# 완료된 작업 보관 시간(초)
+JOB_TTL = int(os.getenv('JOB_TTL', '3600'))
+# 콜백을 보낼 수 있는 호스트 (쉼표로 구분, '.example.com' 은 하위 도메인 포함)
+# 비어 있으면 공인 IP 로 확인되는 호스트에만 전송 (내부망/loopback/메타데이터 주소 차단)
+JOB_CALLBACK_ALLOWED_HOSTS = tuple(
+    host.strip().lower() for host in os.getenv('JOB_CALLBACK_ALLOWED_HOSTS', '').split(',') if host.strip()
+)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def make_job_key(project_id, branch, commits):
+    payload = json.dumps([project_id, branch, commits], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def check_callback_url(url):
+    """콜백 URL 을 쓸 수 없으면 사유, 쓸 수 있으면 None"""
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return 'callbackUrl 은 http(s) URL 이어야 합니다.'
+    host = parsed.hostname.lower()
+    if JOB_CALLBACK_ALLOWED_HOSTS:
+        if any(host == allowed or (allowed.startswith('.') and host.endswith(allowed))
+               for allowed in JOB_CALLBACK_ALLOWED_HOSTS):
+            return None
+        return f'허용되지 않은 콜백 호스트입니다: {host}'
+
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError):
+        return f'콜백 호스트를 확인할 수 없습니다: {host}'
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global:
+            return f'내부 주소로는 콜백을 보낼 수 없습니다: {host}'
+    return None
+
+
+class _NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    # 리다이렉트로 내부 주소에 요청하지 않도록 따라가지 않음
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirectHandler)
+
+
+class Job:
+    def __init__(self, key, callback_url=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.callback_url = callback_url
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.timings = None
+
+    def to_dict(self):
+        return {
+            'jobId': self.id,
+            'state': self.state,
+            'review': self.result,
+            'error': self.error,
+            'createdAt': self.created_at,
+            'finishedAt': self.finished_at,
+            'timings': self.timings.to_dict() if self.timings else None,
+        }
+
+
+class JobQueue:
+    def __init__(self, run_review, max_workers=JOB_WORKERS, ttl=JOB_TTL):
+        self.run_review = run_review
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='review-job')
+        self._jobs = {}         # jobId → Job
+        self._active = {}       # 중복 제거 키 → 진행 중/완료된 Job
+        self._running = set()   # 실행 중인 (projectId, branch)
+        self._waiting = {}      # (projectId, branch) → 앞 작업이 끝나길 기다리는 작업 인자
+        self._lock = threading.Lock()
+
+    def submit(self, url, token, project_id, branch, commits, callback_url=None):
+        """작업 제출, 동일한 작업이 이미 있으면 그 작업을 반환 (Job, 새로 생성 여부)"""
+        key = make_job_key(project_id, branch, commits)
+        with self._lock:
+            self._expire()
+            job = self._active.get(key)
+            if job is not None and job.state != FAILED:
+                return job, False
+
+            job = Job(key, callback_url)
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+            # 같은 projectId/branch 작업이 실행 중이면 워커를 점유하지 않고 대기열에 추가
+            project_key = (project_id, branch)
+            task = (job, url, token, project_id, branch, commits)
+            if project_key in self._running:
+                self._waiting.setdefault(project_key, deque()).append(task)
+                return job, True
+            self._running.add(project_key)
+
+        self._executor.submit(self._run_serialized, project_key, task)
+        return job, True
+
+    def _run_serialized(self, project_key, task):
+        try:
+            self._run(*task)
+        finally:
+            # 같은 projectId/branch 의 다음 작업 실행
+            with self._lock:
+                waiting = self._waiting.get(project_key)
+                next_task = waiting.popleft() if waiting else None
+                if waiting is not None and not waiting:
+                    del self._waiting[project_key]
+                if next_task is None:
+                    self._running.discard(project_key)
+            if next_task is not None:
+                self._executor.submit(self._run_serialized, project_key, next_task)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, url, token, project_id, branch, commits):
+        from .reviewers import ReviewError
+        job.state = RUNNING
+        try:
+            with track_pipeline() as job.timings:
+                try:
+                    job.result = self.run_review(url, token, project_id, branch, commits)
+                except ReviewError:
+                    # 처리 중 예외가 아닌 리뷰 실패로 집계
+                    job.timings.status = 'fail'
+                    raise
+            job.state = DONE
+        except Exception as e:
+            print(f"리뷰 작업 오류 발생: {e}")
+            job.error = str(e)
+            job.state = FAILED
+        job.finished_at = time.time()
+
+        if job.callback_url:
+            self._send_callback(job)
+
+    def _send_callback(self, job):
+        # 제출 이후 DNS 가 바뀐 경우를 고려해 전송 직전에 다시 확인
+        reason = check_callback_url(job.callback_url)
+        if reason:
+            print(f"콜백 전송 안 함: {reason}")
+            return
+        try:
+            request = urllib.request.Request(
+                job.callback_url,
+                data=json.dumps(job.to_dict(), ensure_ascii=False).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+            with _callback_opener.open(request, timeout=10):
+                pass
+        except Exception as e:
+            print(f"콜백 전송 실패: {job.callback_url} - {e}")
+
+    def _expire(self):
+        # 보관 시간이 지난 완료 작업 정리
+        now = time.time()
+        expired = [job for job in self._jobs.values()
+                   if job.finished_at is not None and now - job.finished_at > self.ttl]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """프로세스 당 하나의 작업 큐"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            from . import reviewers
+            _job_queue = JobQueue(reviewers.getCodeReview)
+        return _job_queue
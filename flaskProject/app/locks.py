@@ -0,0 +1,35 @@
+# locks.py
+"""
+잠금 파일 기반 스레드/프로세스 간 직렬화
+같은 프로세스에서는 경로별 스레드 잠금, 프로세스 간에는 flock 사용 (같은 스레드에서 중첩하지 않음)
+"""
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 스레드 잠금만 사용
+    fcntl = None
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(lock_path):
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    key = str(lock_path.resolve())
+    with _locks_guard:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(lock_path, 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,198 @@
+# metrics.py
+"""
+리뷰 파이프라인 단계별 계측
+- stage() 로 감싼 구간의 소요 시간, 처리 개수, 바이트, 캐시 적중 수를 기록
+- 프로세스 전체 누적값은 Prometheus 텍스트 형식(/metrics)으로, 요청별 값은 track_pipeline() 으로 수집
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ('clone', 'fetch', 'walk', 'parse', 'embed', 'store', 'query', 'review', 'summarize')
+
+# 소요 시간 히스토그램 구간(초)
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class StageRecord:
+    """stage() 블록 안에서 처리량을 채워 넣는 기록 객체"""
+    __slots__ = ('name', 'seconds', 'items', 'bytes', 'cache_hits')
+
+    def __init__(self, name, items=0, nbytes=0, cache_hits=0):
+        self.name = name
+        self.seconds = 0.0
+        self.items = items
+        self.bytes = nbytes
+        self.cache_hits = cache_hits
+
+
+class PipelineTimings:
+    """요청(작업) 하나의 단계별 누적 기록"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        # 호출 측에서 실패로 표시하지 않으면 success
+        self.status = None
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            stage = self._stages.setdefault(record.name, {
+                'seconds': 0.0, 'calls': 0, 'items': 0, 'bytes': 0, 'cache_hits': 0
+            })
+            stage['seconds'] += record.seconds
+            stage['calls'] += 1
+            stage['items'] += record.items
+            stage['bytes'] += record.bytes
+            stage['cache_hits'] += record.cache_hits
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            stages = {name: dict(values, seconds=round(values['seconds'], 4))
+                      for name, values in self._stages.items()}
+        end = self.finished_at or time.time()
+        return {'total_seconds': round(end - self.started_at, 4), 'stages': stages}
+
+
+class MetricsRegistry:
+    """프로세스 전체 단계별 누적 지표"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._pipelines = {}
+        self._cache_collectors = {}
+
+    def observe(self, record):
+        with self._lock:
+            stage = self._stages.get(record.name)
+            if stage is None:
+                stage = self._stages[record.name] = {
+                    'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0,
+                    'items': 0, 'bytes': 0, 'cache_hits': 0
+                }
+            for i, bound in enumerate(self.buckets):
+                if record.seconds <= bound:
+                    stage['buckets'][i] += 1
+            stage['sum'] += record.seconds
+            stage['count'] += 1
+            stage['items'] += record.items
+            stage['bytes'] += record.bytes
+            stage['cache_hits'] += record.cache_hits
+
+    def count_pipeline(self, status):
+        with self._lock:
+            self._pipelines[status] = self._pipelines.get(status, 0) + 1
+
+    def register_cache(self, name, stats):
+        """stats() 가 hits/misses/size 를 반환하는 캐시를 /metrics 에 노출"""
+        with self._lock:
+            self._cache_collectors[name] = stats
+
+    def render(self):
+        """Prometheus text exposition 형식"""
+        with self._lock:
+            stages = {name: dict(values, buckets=list(values['buckets'])) for name, values in self._stages.items()}
+            pipelines = dict(self._pipelines)
+            collectors = dict(self._cache_collectors)
+
+        lines = [
+            '# HELP review_stage_duration_seconds Duration of review pipeline stages.',
+            '# TYPE review_stage_duration_seconds histogram',
+        ]
+        for name, stage in sorted(stages.items()):
+            for bound, count in zip(self.buckets, stage['buckets']):
+                lines.append(f'review_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'review_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stage["count"]}')
+            lines.append(f'review_stage_duration_seconds_sum{{stage="{name}"}} {stage["sum"]}')
+            lines.append(f'review_stage_duration_seconds_count{{stage="{name}"}} {stage["count"]}')
+
+        for metric, key, help_text in (
+                ('review_stage_items_total', 'items', 'Items processed by review pipeline stages.'),
+                ('review_stage_bytes_total', 'bytes', 'Bytes processed by review pipeline stages.'),
+                ('review_stage_cache_hits_total', 'cache_hits', 'Cache hits in review pipeline stages.')):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for name, stage in sorted(stages.items()):
+                lines.append(f'{metric}{{stage="{name}"}} {stage[key]}')
+
+        lines.append('# HELP review_pipelines_total Finished review pipelines by status.')
+        lines.append('# TYPE review_pipelines_total counter')
+        for status, count in sorted(pipelines.items()):
+            lines.append(f'review_pipelines_total{{status="{status}"}} {count}')
+
+        cache_stats = {}
+        for name, stats in collectors.items():
+            try:
+                cache_stats[name] = stats()
+            except Exception as e:
+                print(f"캐시 지표 수집 실패: {name} - {e}")
+        for metric, key, metric_type, help_text in (
+                ('review_cache_hits_total', 'hits', 'counter', 'Cache hits by cache.'),
+                ('review_cache_misses_total', 'misses', 'counter', 'Cache misses by cache.'),
+                ('review_cache_entries', 'size', 'gauge', 'Entries stored by cache.')):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} {metric_type}')
+            for name, stats in sorted(cache_stats.items()):
+                lines.append(f'{metric}{{cache="{name}"}} {stats.get(key, 0)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# 현재 요청의 PipelineTimings (스레드/작업 별로 분리)
+_current_timings = contextvars.ContextVar('pipeline_timings', default=None)
+
+
+@contextmanager
+def stage(name, items=0, nbytes=0, cache_hits=0):
+    """
+    with stage('embed', items=len(texts)) as record:
+        record.cache_hits = ...
+    """
+    record = StageRecord(name, items, nbytes, cache_hits)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        record_stage(record)
+
+
+def record_stage(record):
+    registry.observe(record)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(record)
+
+
+@contextmanager
+def track_pipeline():
+    """블록 안에서 기록된 단계들을 모아 요청별 타이밍으로 반환"""
+    timings = PipelineTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    except Exception:
+        # 블록 안에서 지정한 상태(예: 리뷰 실패 'fail')가 있으면 유지
+        timings.status = timings.status or 'error'
+        raise
+    finally:
+        _current_timings.reset(token)
+        timings.finish()
+        registry.count_pipeline(timings.status or 'success')
+
+
+def register_cache(name, stats):
+    registry.register_cache(name, stats)
+
+
+def render_metrics():
+    return registry.render()
@@ -1,13 +1,125 @@
-from transformers import RobertaTokenizer, RobertaModel
+from transformers import RobertaTokenizerFast, RobertaModel
+import numpy as np
 import torch
+import os
+import threading
 
-# 모델 및 토크나이저 로드
-tokenizer = RobertaTokenizer.from_pretrained('microsoft/graphcodebert-base')
-model = RobertaModel.from_pretrained('microsoft/graphcodebert-base')
+MODEL_NAME = 'microsoft/graphcodebert-base'
 
-def get_code_embedding(code_snippet):
-    inputs = tokenizer(code_snippet, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
+MAX_LENGTH = 512
+# 배치 임베딩 시 한 번에 forward 하는 스니펫 수
+DEFAULT_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '16'))
+# torch: 기본 fp32 / quantized: int8 동적 양자화 / onnx: ONNX Runtime CPU (optimum 필요)
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch').lower()
+# 0 이면 torch 기본값 사용
+TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', '0'))
+# 512 토큰 초과 청크 처리: window(슬라이딩 윈도우 후 풀링) / truncate(앞부분만 사용)
+LONG_CODE_MODE = os.getenv('EMBEDDING_LONG_CODE_MODE', 'window').lower()
+# 인접 윈도우 간 겹치는 토큰 수
+WINDOW_STRIDE = int(os.getenv('EMBEDDING_WINDOW_STRIDE', '128'))
+# 윈도우 임베딩 풀링 방식: mean / max
+WINDOW_POOLING = os.getenv('EMBEDDING_WINDOW_POOLING', 'mean').lower()
+
+# 모델 및 토크나이저는 처음 사용할 때 한 번만 로드 (import 시 로드하지 않음)
+_tokenizer = None
+_model = None
+_load_lock = threading.Lock()
+
+def load_model():
+    """토크나이저와 모델을 스레드 안전하게 한 번만 로드"""
+    global _tokenizer, _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                if TORCH_NUM_THREADS > 0:
+                    torch.set_num_threads(TORCH_NUM_THREADS)
+                # Rust 기반 fast 토크나이저 (배치 인코딩, 윈도우 분할 지원)
+                _tokenizer = RobertaTokenizerFast.from_pretrained(MODEL_NAME)
+                _model = _load_backend(EMBEDDING_BACKEND)
+    return _tokenizer, _model
+
+def _load_backend(backend):
+    if backend == 'onnx':
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            return ORTModelForFeatureExtraction.from_pretrained(MODEL_NAME, export=True)
+        except ImportError as e:
+            print(f"ONNX Runtime 백엔드 로드 실패, torch 로 대체: {e}")
+
+    model = RobertaModel.from_pretrained(MODEL_NAME)
+    model.eval()
+    if backend == 'quantized':
+        # Linear 레이어를 int8 동적 양자화 (CPU 추론 속도 향상)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def embedding_model_id():
+    """임베딩 결과를 바꾸는 설정을 포함한 모델 식별자 (임베딩 캐시 키에 사용)"""
+    if LONG_CODE_MODE == 'window':
+        return f"{MODEL_NAME}:{EMBEDDING_BACKEND}:window-{WINDOW_STRIDE}-{WINDOW_POOLING}"
+    return f"{MODEL_NAME}:{EMBEDDING_BACKEND}:truncate"
+
+def warm_up():
+    """앱 시작 시 모델을 미리 로드하고 한 번 추론해 첫 요청 지연을 없앰"""
+    get_code_embedding('def warm_up():\n    pass')
+
+def _forward(inputs):
+    _, model = load_model()
+    with torch.inference_mode():
         outputs = model(**inputs)
-    embedding = outputs.last_hidden_state[:, 0, :].squeeze().numpy()
-    return embedding
+    return outputs.last_hidden_state[:, 0, :].numpy()
+
+def get_code_embedding(code_snippet):
+    return get_code_embeddings([code_snippet])[0]
+
+def get_code_embeddings(code_snippets, batch_size=None):
+    """여러 코드 스니펫을 배치로 임베딩 (입력 순서대로 반환)"""
+    code_snippets = list(code_snippets)
+    if not code_snippets:
+        return []
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    tokenizer, _ = load_model()
+
+    # 패딩 없이 먼저 배치 토큰화, 긴 코드는 stride 만큼 겹치는 512 토큰 윈도우로 분할
+    use_window = LONG_CODE_MODE == 'window'
+    encoded = tokenizer(
+        code_snippets,
+        truncation=True,
+        max_length=MAX_LENGTH,
+        stride=WINDOW_STRIDE if use_window else 0,
+        return_overflowing_tokens=use_window
+    )
+    input_ids = encoded['input_ids']
+    # 윈도우 → 원본 스니펫 인덱스
+    sample_map = encoded['overflow_to_sample_mapping'] if use_window else list(range(len(code_snippets)))
+
+    # 길이 기준 정렬해 비슷한 길이끼리 배치 구성
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+
+    window_embeddings = [None] * len(input_ids)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        # 버킷 내 최장 길이까지만 동적 패딩
+        inputs = tokenizer.pad(
+            {'input_ids': [input_ids[i] for i in bucket]},
+            padding='longest',
+            return_tensors="pt"
+        )
+        cls_embeddings = _forward(inputs)
+        for row, index in enumerate(bucket):
+            window_embeddings[index] = cls_embeddings[row]
+
+    # 스니펫별 윈도우 임베딩 풀링
+    windows = [[] for _ in code_snippets]
+    for index, sample in enumerate(sample_map):
+        windows[sample].append(window_embeddings[index])
+
+    embeddings = []
+    for sample_windows in windows:
+        if len(sample_windows) == 1:
+            embeddings.append(sample_windows[0])
+        elif WINDOW_POOLING == 'max':
+            embeddings.append(np.max(sample_windows, axis=0))
+        else:
+            embeddings.append(np.mean(sample_windows, axis=0))
+    return embeddings
@@ -0,0 +1,121 @@
+# pipeline.py
+"""
+walk → parse → embed → store 스트리밍 인덱싱 파이프라인
+- 파일 순회와 파싱은 지연 생성기 + 프로세스 풀 (제출 작업 수 제한)
+- 청크는 파일 경계와 무관하게 PIPELINE_EMBED_BATCH 개씩 묶어 임베딩 스레드로 전달
+- 임베딩 결과는 저장 스레드가 벡터 저장소에 추가
+단계 사이는 크기가 제한된 큐로 연결해 느린 단계가 앞 단계를 멈추게 함 (저장소 크기와 무관한 메모리 사용)
+"""
+import contextvars
+import os
+import queue
+import threading
+
+# 임베딩 한 번에 넘기는 청크 수
+PIPELINE_EMBED_BATCH = int(os.getenv('PIPELINE_EMBED_BATCH', '64'))
+# 단계 사이 큐에 대기할 수 있는 배치 수
+PIPELINE_QUEUE_DEPTH = int(os.getenv('PIPELINE_QUEUE_DEPTH', '4'))
+
+_DONE = object()
+
+
+class IndexingError(RuntimeError):
+    """일부 배치의 임베딩/저장 실패 (성공한 배치는 저장된 상태)"""
+
+    def __init__(self, failed, file_count):
+        super().__init__(f"인덱싱 중 {failed}개 배치 처리 실패")
+        self.failed = failed
+        self.file_count = file_count
+
+
+def iter_chunk_batches(file_chunks, batch_size):
+    """(path, chunks) 스트림 → (path, chunk) batch_size 개 단위 배치"""
+    batch = []
+    for path, chunks in file_chunks:
+        for chunk in chunks:
+            batch.append((path, chunk))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class _StageWorker(threading.Thread):
+    """입력 큐의 배치를 처리해 출력 큐로 넘기는 단계 스레드 (배치 단위 오류는 출력 후 건너뜀)"""
+
+    def __init__(self, name, handler, inbox, outbox=None):
+        super().__init__(name=name, daemon=True)
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.errors = 0
+        # 요청별 지표(contextvars)가 스레드 안에서도 기록되도록 현재 컨텍스트 복사
+        self._context = contextvars.copy_context()
+
+    def run(self):
+        self._context.run(self._loop)
+
+    def _loop(self):
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                break
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f"{self.name} 단계 오류 발생: {e}")
+                self.errors += 1
+                continue
+            if self.outbox is not None:
+                self.outbox.put(result)
+        if self.outbox is not None:
+            self.outbox.put(_DONE)
+
+
+def run_indexing_pipeline(vectorDB, file_chunks, batch_size=None, queue_depth=None):
+    """
+    file_chunks: (path, chunks) 생성기 (보통 chunk_files_parallel 결과)
+    vectorDB: CodeEmbeddingProcessor
+    처리한 파일 수 반환, 실패한 배치가 있으면 나머지 배치를 모두 처리한 뒤 IndexingError
+    """
+    batch_size = batch_size or PIPELINE_EMBED_BATCH
+    queue_depth = queue_depth or PIPELINE_QUEUE_DEPTH
+    embed_queue = queue.Queue(maxsize=queue_depth)
+    store_queue = queue.Queue(maxsize=queue_depth)
+
+    def embed(batch):
+        ids, texts, metadatas = vectorDB.prepare_file_chunks(batch)
+        return ids, texts, vectorDB.embed_texts(texts), metadatas
+
+    def store(prepared):
+        vectorDB.add_embeddings(*prepared)
+
+    workers = [
+        _StageWorker('embed', embed, embed_queue, store_queue),
+        _StageWorker('store', store, store_queue),
+    ]
+    for worker in workers:
+        worker.start()
+
+    file_count = 0
+
+    def count_files(stream):
+        nonlocal file_count
+        for path, chunks in stream:
+            file_count += 1
+            yield path, chunks
+
+    try:
+        # 큐가 가득 차면 put 에서 대기 → 파싱 결과 소비가 멈추고 풀 제출도 멈춤
+        for batch in iter_chunk_batches(count_files(file_chunks), batch_size):
+            embed_queue.put(batch)
+    finally:
+        embed_queue.put(_DONE)
+        for worker in workers:
+            worker.join()
+
+    failed = sum(worker.errors for worker in workers)
+    if failed:
+        raise IndexingError(failed, file_count)
+    return file_count
@@ -0,0 +1,179 @@
+# project_index.py
+"""
+projectId/branch 별로 유지되는 영구 벡터 인덱스
+마지막으로 인덱싱한 커밋 SHA 를 기록해 두고, 다음 리뷰에서는 그 이후 변경된 파일만 다시 청크/임베딩
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import git
+
+from app.chunking.parallel import chunk_files_parallel
+from app.chunking.scanner import RepositoryScanner
+from app.embeddings import CodeEmbeddingProcessor
+from app.locks import file_lock
+from app.metrics import StageRecord, record_stage
+from app.pipeline import IndexingError, run_indexing_pipeline
+from app.vector_store import VECTOR_STORE_BACKEND
+
+DEFAULT_INDEX_ROOT = os.getenv('VECTOR_INDEX_PATH', './vectorIndex')
+
+
+def index_lock(index_dir):
+    """같은 인덱스 디렉토리의 동기화를 스레드/프로세스 간 직렬화"""
+    return file_lock(Path(index_dir) / '.lock')
+
+
+def iter_source_files(project_path, chunker, scanner=None):
+    """리포지토리 내 인덱싱 대상 파일의 (상대 경로, 언어) 생성"""
+    scanner = scanner or RepositoryScanner(project_path, chunker.get_file_language)
+    return scanner.scan()
+
+
+class ProjectIndex:
+    def __init__(self, project_id, branch, index_root=DEFAULT_INDEX_ROOT):
+        safe_branch = re.sub(r'[^A-Za-z0-9._-]', '_', branch or 'default')
+        self.index_dir = Path(index_root) / str(project_id) / safe_branch
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.index_dir / 'state.json'
+        # 백엔드별로 디렉토리를 분리 (백엔드를 바꾸면 새로 인덱싱)
+        self.backend = VECTOR_STORE_BACKEND
+        self.vectorDB = CodeEmbeddingProcessor(persist_directory=str(self.index_dir / self.backend),
+                                               backend=self.backend)
+
+    def load_state(self):
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"인덱스 상태 읽기 실패: {e}")
+            return {}
+
+    def save_state(self, state):
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def is_built(self):
+        """현재 백엔드로 한 번 이상 인덱싱된 적이 있는지"""
+        state = self.load_state()
+        return bool(state.get('last_commit')) and state.get('backend', 'chroma') == self.backend
+
+    def sync(self, project_path, chunker):
+        """클론된 리포지토리의 HEAD 와 인덱스를 동기화, 처리한 파일 수 반환"""
+        # 같은 projectId/branch 리뷰가 동시에 삭제/추가하거나 state.json 을 덮어쓰지 않도록 직렬화
+        with index_lock(self.index_dir):
+            return self._sync(project_path, chunker)
+
+    def _sync(self, project_path, chunker):
+        repo = git.Repo(project_path)
+        head_sha = repo.head.commit.hexsha
+        state = self.load_state()
+        last_sha = state.get('last_commit') if state.get('backend', 'chroma') == self.backend else None
+
+        if last_sha == head_sha:
+            return 0
+
+        scanner = RepositoryScanner(project_path, chunker.get_file_language)
+        changes = self._changed_files(repo, last_sha, head_sha) if last_sha else None
+        ok = True
+        if changes is None:
+            # 최초 인덱싱 또는 이전 커밋을 찾을 수 없는 경우(force push 등) 전체 재구축
+            if not self.vectorDB.reset():
+                return 0
+            updated, ok = self._index_files(project_path, iter_source_files(project_path, chunker, scanner))
+        else:
+            changed, removed = changes
+            for rel_path in removed:
+                ok = self.vectorDB.delete_file(rel_path) and ok
+            targets = []
+            for rel_path in changed:
+                ok = self.vectorDB.delete_file(rel_path) and ok
+                language = chunker.get_file_language(rel_path)
+                if language and scanner.accepts(rel_path):
+                    targets.append((rel_path, language))
+            updated, indexed = self._index_files(project_path, targets)
+            updated += len(removed)
+            ok = indexed and ok
+
+        if scanner.skipped:
+            print(f"인덱싱 제외 파일/폴더: {dict(scanner.skipped)}")
+
+        ok = self.vectorDB.flush() and ok
+        if not ok:
+            # 실패한 파일이 다음 리뷰에서 다시 인덱싱되도록 마지막 커밋을 갱신하지 않음
+            print(f"인덱스 갱신 중 오류가 있어 마지막 인덱싱 커밋을 유지합니다: {last_sha}")
+            return updated
+        self.save_state({'last_commit': head_sha, 'backend': self.backend})
+        return updated
+
+    def _changed_files(self, repo, last_sha, head_sha):
+        """last_sha..head_sha 사이의 (변경/추가 파일, 삭제 파일), 비교 불가 시 None"""
+        try:
+            output = repo.git.diff('--name-status', '--no-renames', last_sha, head_sha)
+        except git.GitCommandError as e:
+            print(f"이전 인덱스 커밋 비교 실패: {e}")
+            return None
+
+        changed, removed = [], []
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            status, rel_path = line.split('\t', 1)
+            if status.startswith('D'):
+                removed.append(rel_path)
+            else:
+                changed.append(rel_path)
+        return changed, removed
+
+    def _index_files(self, project_path, files):
+        """(처리한 파일 수, 모든 배치 저장 성공 여부)"""
+        try:
+            return index_files(self.vectorDB, project_path, files), True
+        except IndexingError as e:
+            print(e)
+            return e.file_count, False
+
+
+def index_files(vectorDB, project_path, files):
+    """files: (상대 경로, 언어) 스트림, 처리한 파일 수 반환"""
+    # 순회 → 파싱(프로세스 풀) → 배치 임베딩 → 저장을 크기 제한 큐로 이어 동시에 진행
+    walk = StageRecord('walk')
+    parse = StageRecord('parse')
+    tasks = _iter_tasks(project_path, files, walk)
+
+    def timed_parse():
+        # 파싱 단계는 결과를 기다린 시간만 기록 (순회 시간 제외)
+        start = time.perf_counter()
+        for rel_path, language, chunks in chunk_files_parallel(tasks):
+            parse.seconds += time.perf_counter() - start
+            yield rel_path, chunks
+            start = time.perf_counter()
+        parse.seconds += time.perf_counter() - start
+
+    count = run_indexing_pipeline(vectorDB, timed_parse())
+    parse.seconds = max(parse.seconds - walk.seconds, 0.0)
+    parse.items, parse.bytes = walk.items, walk.bytes
+    record_stage(walk)
+    record_stage(parse)
+    return count
+
+
+def _iter_tasks(project_path, files, record):
+    """(상대 경로, 언어) 스트림 → 청크화 작업 (순회 시간/파일 수/바이트 기록)"""
+    start = time.perf_counter()
+    for rel_path, language in files:
+        file_path = Path(project_path) / rel_path
+        if file_path.is_file():
+            record.items += 1
+            record.bytes += file_path.stat().st_size
+            record.seconds += time.perf_counter() - start
+            yield rel_path, str(file_path), language
+            start = time.perf_counter()
+    record.seconds += time.perf_counter() - start
@@ -0,0 +1,132 @@
+# prompt_budget.py
+"""
+토큰 예산 기반 리뷰 프롬프트 구성
+- diff 가 예산을 넘으면 hunk 단위로 나눠 여러 번 리뷰
+- 유사 코드는 순위대로 예산 안에서만 포함
+- 요약 단계에는 파일별 리뷰를 예산에 맞게 줄여서 전달
+"""
+import os
+import re
+
+# gpt-4o 계열 토크나이저 (tiktoken 이 없으면 글자 수 기반 추정)
+TOKENIZER_ENCODING = os.getenv('PROMPT_TOKENIZER_ENCODING', 'o200k_base')
+# 리뷰 요청 하나에 넣을 diff / 참고 코드 토큰 수
+DIFF_TOKEN_BUDGET = int(os.getenv('REVIEW_DIFF_TOKEN_BUDGET', '6000'))
+SIMILAR_CODE_TOKEN_BUDGET = int(os.getenv('REVIEW_SIMILAR_CODE_TOKEN_BUDGET', '2000'))
+# 참고 코드 한 개의 최대 토큰 수
+SIMILAR_CODE_MAX_TOKENS = int(os.getenv('REVIEW_SIMILAR_CODE_MAX_TOKENS', '600'))
+# 요약 단계에 전달할 파일별 / 전체 리뷰 토큰 수
+SUMMARY_REVIEW_TOKEN_BUDGET = int(os.getenv('SUMMARY_REVIEW_TOKEN_BUDGET', '800'))
+SUMMARY_TOTAL_TOKEN_BUDGET = int(os.getenv('SUMMARY_TOTAL_TOKEN_BUDGET', '12000'))
+
+HUNK_HEADER = re.compile(r'^@@ ', re.MULTILINE)
+TRUNCATED_MARK = '\n... (생략)'
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"tiktoken 로드 실패, 토큰 수를 추정합니다: {e}")
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    # 코드 기준 대략 3글자 당 1토큰
+    return (len(text) + 2) // 3
+
+
+def truncate_tokens(text, budget):
+    """앞에서부터 budget 토큰까지만 남김"""
+    if count_tokens(text) <= budget:
+        return text
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:budget]) + TRUNCATED_MARK
+    return text[:budget * 3] + TRUNCATED_MARK
+
+
+def split_diff(diff, budget=DIFF_TOKEN_BUDGET):
+    """diff 를 예산 안의 조각들로 분할 (hunk 경계 기준, 너무 큰 hunk 는 잘라냄)"""
+    if count_tokens(diff) <= budget:
+        return [diff]
+
+    starts = [match.start() for match in HUNK_HEADER.finditer(diff)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    hunks = [diff[start:end] for start, end in zip(starts, starts[1:] + [len(diff)])]
+
+    parts, current, current_tokens = [], [], 0
+    for hunk in hunks:
+        hunk_tokens = count_tokens(hunk)
+        if hunk_tokens > budget:
+            hunk = truncate_tokens(hunk, budget)
+            hunk_tokens = budget
+        if current and current_tokens + hunk_tokens > budget:
+            parts.append(''.join(current))
+            current, current_tokens = [], 0
+        current.append(hunk)
+        current_tokens += hunk_tokens
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def select_similar_codes(similar_codes, budget=SIMILAR_CODE_TOKEN_BUDGET, max_tokens=SIMILAR_CODE_MAX_TOKENS):
+    """
+    쿼리별 유사 코드 목록(유사도 순)을 예산 안에서 골라 하나의 문자열로 구성
+    각 쿼리의 1순위부터 번갈아 채워 특정 함수의 참고 코드만 차지하지 않도록 함
+    """
+    selected, seen, used = [], set(), 0
+    depth = max((len(codes) for codes in similar_codes), default=0)
+    for rank in range(depth):
+        for codes in similar_codes:
+            if rank >= len(codes) or codes[rank] in seen:
+                continue
+            code = truncate_tokens(codes[rank], max_tokens)
+            tokens = count_tokens(code)
+            if used + tokens > budget:
+                continue
+            seen.add(codes[rank])
+            selected.append(code)
+            used += tokens
+    return '\n\n---\n\n'.join(selected)
+
+
+def build_review_inputs(review_queries, diff_budget=DIFF_TOKEN_BUDGET, similar_budget=SIMILAR_CODE_TOKEN_BUDGET):
+    """(file_path, diff, similar_codes) 목록 → 리뷰 체인 입력 목록 (파일 순서 유지)"""
+    review_inputs = []
+    for file_path, diff, similar_codes in review_queries:
+        similar_text = select_similar_codes(similar_codes, similar_budget)
+        parts = split_diff(diff, diff_budget)
+        for index, part in enumerate(parts):
+            label = file_path if len(parts) == 1 else f"{file_path} (part {index + 1}/{len(parts)})"
+            review_inputs.append({
+                "file_path": label,
+                "code_chunk": part,
+                "similar_codes": similar_text,
+                "source_path": file_path,
+            })
+    return review_inputs
+
+
+def compact_reviews(file_reviews, per_file_budget=SUMMARY_REVIEW_TOKEN_BUDGET,
+                    total_budget=SUMMARY_TOTAL_TOKEN_BUDGET):
+    """
+    (file_path, review) 목록을 요약 입력용으로 축소
+    파일 수가 많으면 파일당 예산을 전체 예산에 맞춰 줄임
+    """
+    if not file_reviews:
+        return []
+    per_file = min(per_file_budget, max(total_budget // len(file_reviews), 1))
+    return [(file_path, truncate_tokens(review, per_file)) for file_path, review in file_reviews]
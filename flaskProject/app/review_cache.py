@@ -0,0 +1,161 @@
+# review_cache.py
+"""
+LLM 리뷰 결과 로컬 SQLite 캐시
+모델 + 프롬프트 버전 + 파일 경로 + diff + 참고 코드 해시를 키로 사용해
+웹훅 재시도, 변경 없는 파일의 재리뷰 시 LLM 을 다시 호출하지 않도록 함
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .metrics import register_cache
+
+DEFAULT_CACHE_PATH = os.getenv('REVIEW_CACHE_PATH', './reviewCache/reviews.sqlite3')
+DEFAULT_MAX_ENTRIES = int(os.getenv('REVIEW_CACHE_MAX_ENTRIES', '20000'))
+# 캐시 유효 기간(초), 0 이면 만료 없음
+DEFAULT_TTL = int(os.getenv('REVIEW_CACHE_TTL', str(7 * 24 * 3600)))
+REVIEW_CACHE_ENABLED = os.getenv('REVIEW_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def make_review_key(model, prompt_version, file_path, diff, context):
+    payload = json.dumps([model, prompt_version, file_path, diff, context], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReviewCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                key TEXT PRIMARY KEY,
+                review TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_review_last_access ON reviews(last_access)")
+        self._conn.commit()
+        with self._lock:
+            self._expire()
+            self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    def get_many(self, keys):
+        """keys 순서대로 캐시된 리뷰(없거나 만료되면 None) 리스트 반환"""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ','.join('?' * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, review, created_at FROM reviews WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, review, created_at in rows:
+                    if not self.ttl or now - created_at <= self.ttl:
+                        found[key] = review
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE reviews SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            reviews = [found.get(key) for key in keys]
+            hit_count = sum(1 for review in reviews if review is not None)
+            self.hits += hit_count
+            self.misses += len(reviews) - hit_count
+        return reviews
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def put_many(self, keys, reviews):
+        now = time.time()
+        rows = [(key, review, now, now) for key, review in zip(keys, reviews)]
+        if not rows:
+            return
+        with self._lock:
+            before = self._conn.total_changes
+            # 만료된 항목을 덮어쓸 수 있도록 REPLACE (개수 변화 없음)
+            existing = self._count_existing([key for key, *_ in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reviews (key, review, created_at, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self._size += (self._conn.total_changes - before) - existing
+            self._evict()
+            self._conn.commit()
+
+    def put(self, key, review):
+        self.put_many([key], [review])
+
+    def _count_existing(self, keys):
+        count = 0
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            placeholders = ','.join('?' * len(part))
+            count += self._conn.execute(
+                f"SELECT COUNT(*) FROM reviews WHERE key IN ({placeholders})", part
+            ).fetchone()[0]
+        return count
+
+    def _expire(self):
+        if self.ttl:
+            self._conn.execute("DELETE FROM reviews WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def _evict(self):
+        # 최대 개수 초과 시 가장 오래 접근하지 않은 항목부터 삭제
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM reviews WHERE key IN "
+            "(SELECT key FROM reviews ORDER BY last_access ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._size -= overflow
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': self._size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_review_cache():
+    """프로세스 당 하나의 공유 캐시 인스턴스 (비활성화 시 None)"""
+    global _default_cache
+    if not REVIEW_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ReviewCache()
+            register_cache('review', _default_cache.stats)
+        return _default_cache
@@ -1,21 +1,65 @@
 # reviewers.py
 import os
+import uuid
+from contextlib import ExitStack
 from pathlib import Path
 from app.chunking.GetCode import GitLabCodeChunker
+from app.chunking.remote_files import BlobCache
+from app.chunking.diff_hunks import affected_chunks, hunk_text, parse_hunks
 from app.embeddings import CodeEmbeddingProcessor
-from langchain_core.prompts import ChatPromptTemplate
+from app.pipeline import IndexingError
+from app.project_index import ProjectIndex, index_files
+from app.prompt_budget import build_review_inputs, compact_reviews
+from app.review_cache import get_default_review_cache, make_review_key
+from app.metrics import stage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
-from langchain.chains import LLMChain  # 추가
 # import logging
 # logging.basicConfig(level=logging.DEBUG)
 from tqdm import tqdm
+from openai import RateLimitError
+
+# 파일별 LLM 리뷰 동시 요청 수 / rate limit 재시도 횟수
+REVIEW_CONCURRENCY = int(os.getenv('REVIEW_CONCURRENCY', '4'))
+REVIEW_MAX_RETRIES = int(os.getenv('REVIEW_MAX_RETRIES', '3'))
+# 리뷰/요약 프롬프트를 바꾸면 올려서 이전 캐시 결과를 쓰지 않도록 함
+REVIEW_PROMPT_VERSION = 'v2'
+# clone: 미러/워크트리 체크아웃 후 인덱스 동기화, api: clone 없이 변경 파일과 관련 파일만 API 로 가져옴
+# auto: 변경 파일 수가 CLONE_FREE_MAX_FILES 이하면 api
+REVIEW_FETCH_MODE = os.getenv('REVIEW_FETCH_MODE', 'clone').lower()
+CLONE_FREE_MAX_FILES = int(os.getenv('CLONE_FREE_MAX_FILES', '5'))
+
+
+class ReviewError(Exception):
+    """리뷰 생성 실패 (메시지는 iterCodeReview 의 error 이벤트 메시지)"""
 
 
 def getCodeReview(url, token, projectId, branch, commits):
-    # 0. DB 초기화
-    vectorDB = CodeEmbeddingProcessor()
+    """최종 리뷰 문자열 반환 (실패 시 ReviewError)"""
+    return collect_review(iterCodeReview(url, token, projectId, branch, commits))
+
+def collect_review(events):
+    """리뷰 이벤트 스트림 → 최종 요약 (error 이벤트는 ReviewError)"""
+    final_review = ''
+    for event, data in events:
+        if event == 'summary':
+            final_review = data['review']
+        elif event == 'error':
+            raise ReviewError(data['message'])
+    return final_review
+
+def iterCodeReview(url, token, projectId, branch, commits, llm=None):
+    """
+    리뷰 진행 이벤트 (이벤트 이름, 데이터) 생성
+    file_review: 파일별 리뷰 완료 / summary_token: 최종 요약 토큰 / summary: 최종 요약 / error: 실패
+    """
+    # 0. DB 초기화 (projectId/branch 별 영구 인덱스)
+    index = ProjectIndex(projectId, branch)
+    vectorDB = index.vectorDB
+    # clone 없는 리뷰에서 만든 임시 인덱스 (리뷰가 끝나면 삭제)
+    transient_db = None
 
     # 1. git Clone
     chunker = GitLabCodeChunker(
@@ -26,81 +70,110 @@ def getCodeReview(url, token, projectId, branch, commits):
         branch=branch
     )
     try:
-        # 2. 파일별 임베딩
-        project_path = chunker.clone_project()
-        if not project_path:
-            return ''
-
-        # 3. 리뷰 할 코드들 메서드 Chunking
-        file_chunks = []
-        for root, _, files in os.walk(project_path):
-            for file in files:
-                file_path = Path(root) / file
-
-                # 불필요한 파일/폴더 제외
-                if ('.git' in str(file_path)
-                        or any(part.startswith('.') for part in file_path.parts)
-                        or any(part.startswith('node_modules') for part in file_path.parts)):
-                    continue
-
-                # 파일 언어 확인
-                language = chunker.get_file_language(str(file_path))
-                if not language:
-                    continue
-
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    chunks = chunker.chunk_file(str(file_path), language)
-                    file_chunks.extend(chunks)
-
-        # vectorDB.store_embeddings(file_chunks)
+        # 같은 브랜치 워크트리를 체크아웃 ~ 검색하는 동안 다른 리뷰가 바꾸지 않도록 잠금 (LLM 리뷰는 잠금 밖에서)
+        with ExitStack() as locks:
+            changed_paths = [commit['new_path'] for commit in commits
+                             if not commit.get('deleted_file') and get_language_from_extension(commit['new_path'])]
+            if use_clone_free_review(changed_paths):
+                # 2. clone 없이 변경 파일과 같은 디렉토리의 파일만 가져와 참고 코드로 사용
+                project_path, vectorDB = fetch_review_context(chunker, index, changed_paths)
+                if vectorDB is not index.vectorDB:
+                    transient_db = vectorDB
+            else:
+                # 2. 파일별 임베딩
+                locks.enter_context(chunker.worktree_lock())
+                with stage('clone'):
+                    project_path = chunker.clone_project()
+                if not project_path:
+                    raise ReviewError('프로젝트 클론에 실패했습니다.')
+
+                # 3. 마지막 인덱싱 커밋 이후 변경된 파일만 Chunking, 임베딩
+                index.sync(project_path, chunker)
 # === Clone, Chunking, Embedding Logic
 #===============================================================================
 # === diff 기반 Chunking, Embedding, Code Review
-        # 4. commits 에서 코드 분리해 Chunk
-        file_extensions = {
-            'python': ['.py'],
-            'java': ['.java'],
-            'javascript': ['.js', '.jsx'],
-            'c': ['.c', '.h'],
-            'cpp': ['.cpp', '.hpp']
-        }
-
-        review_queries = [] # path, diff (전문), 참고할 코드 (메서드)
-        for commit in commits:
-            language = get_language_from_extension(commit['new_path'])
-
-            if (language == ''):
-                continue
-            # ++, -- 별로 파싱 하는 로직 필요
-            removed_lines, added_lines = parse_git_diff(commit['diff'])
-            similar_codes = []
-            code_chunks = []
-            # 청크화
-            for removed_line in removed_lines:
-                code_chunks.append(chunker.chunk_code(removed_line, language))
-            # -- 에 메서드와 유사한 메서드 추출
-            for code_chunk in code_chunks:
-                similar_codes.append(vectorDB.query_similar_code((code_chunk)))
-
-            review_queries.append((commit['new_path'], commit['diff'], similar_codes))
+            # 4. commits 에서 코드 분리해 Chunk
+            file_extensions = {
+                'python': ['.py'],
+                'java': ['.java'],
+                'javascript': ['.js', '.jsx'],
+                'c': ['.c', '.h'],
+                'cpp': ['.cpp', '.hpp']
+            }
+
+            review_targets = [] # path, diff (전문), 질의 텍스트 (메서드)
+            query_filters = []
+            for commit in commits:
+                language = get_language_from_extension(commit['new_path'])
+
+                if (language == ''):
+                    continue
+                # hunk 별 라인 범위 파싱 → 새 파일에서 변경을 감싸는 함수/클래스 찾기
+                query_texts = get_review_query_texts(chunker, project_path, commit, language)
+                review_targets.append((commit['new_path'], commit['diff'], query_texts))
+                # 같은 언어 코드만, 리뷰 중인 파일 자신은 제외하고 검색
+                query_filters.extend({'language': language, 'exclude_path': commit['new_path']} for _ in query_texts)
+
+            # 변경된 함수 전체를 한 번의 배치 임베딩 + k-NN 으로 검색
+            all_query_texts = [text for _, _, query_texts in review_targets for text in query_texts]
+            all_similar_codes = iter(vectorDB.query_similar_code_batch(all_query_texts, filters=query_filters))
+
+            review_queries = [] # path, diff (전문), 참고할 코드 (메서드)
+            for file_path, diff, query_texts in review_targets:
+                similar_codes = [next(all_similar_codes) for _ in query_texts]
+                review_queries.append((file_path, diff, similar_codes))
         # 5. 메서드 별 관련 코드 가져와 리트리버 생성, 질의
         openai_api_key = os.getenv('OPENAI_API_KEY')  # 환경 변수에서 API 키 가져오기
 
-        llm = ChatOpenAI(
+        llm = llm or ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
             openai_api_key=openai_api_key
         )
-        # 6. LLM 에 질의해 결과 반환
-        result = get_code_review(review_queries, llm)
-
-        # 7. 삭제
-        chunker.cleanup_project_directory()
-        return result
+        # 6. LLM 에 질의해 결과를 완료되는 대로 전달
+        yield from iter_code_review(review_queries, llm)
 
     except Exception as e:
         print(f"오류 발생: {e}")
-        return ''
+        yield 'error', {'message': str(e)}
+    finally:
+        # 7. 삭제 (스트리밍 중 연결이 끊겨도 정리)
+        chunker.cleanup_project_directory()
+        if transient_db is not None:
+            transient_db.drop()
+
+def use_clone_free_review(changed_paths):
+    if REVIEW_FETCH_MODE == 'api':
+        return True
+    if REVIEW_FETCH_MODE == 'auto':
+        return 0 < len(changed_paths) <= CLONE_FREE_MAX_FILES
+    return False
+
+def fetch_review_context(chunker, index, changed_paths):
+    """API 로 리뷰 파일을 가져오고 (프로젝트 경로, 참고 코드 검색용 벡터 DB) 반환"""
+    blob_cache = BlobCache()
+    with stage('fetch') as record:
+        project_path, changed, related = chunker.fetch_review_files(changed_paths, cache=blob_cache)
+        record.items = len(changed) + len(related)
+        record.bytes = sum((Path(project_path) / path).stat().st_size for path in changed + related)
+        record.cache_hits = blob_cache.hits
+
+    # 이전 clone 리뷰에서 만든 영구 인덱스가 있으면 그대로 검색 (동기화는 다음 clone 리뷰에서)
+    if index.is_built():
+        return project_path, index.vectorDB
+    # 없으면 가져온 파일만으로 메모리 임시 인덱스 생성
+    # (메모리 chroma 클라이언트는 프로세스 안에서 컬렉션을 공유하므로 리뷰마다 고유한 이름 사용)
+    vectorDB = CodeEmbeddingProcessor(collection_name=f'review-{uuid.uuid4().hex}', backend=index.backend)
+    files = [(path, chunker.get_file_language(path)) for path in changed + related]
+    try:
+        index_files(vectorDB, project_path, files)
+    except IndexingError as e:
+        # 임시 인덱스는 저장되지 않으므로 일부 실패해도 나머지로 검색
+        print(e)
+    except Exception:
+        vectorDB.drop()
+        raise
+    return project_path, vectorDB
 
 def get_language_from_extension(file_name: str) -> str:
     extension = file_name.split('.')[-1].lower()  # 확장자 추출
@@ -120,7 +193,13 @@ def get_language_from_extension(file_name: str) -> str:
 
     return language_map.get(extension, '')
 
-def get_code_review(review_queries, llm):
+def get_code_review(review_queries, llm, max_concurrency=None, max_retries=None, cache=None):
+    final_review = collect_review(iter_code_review(review_queries, llm, max_concurrency, max_retries, cache))
+    print(final_review)
+    return final_review
+
+def iter_code_review(review_queries, llm, max_concurrency=None, max_retries=None, cache=None):
+    """파일별 리뷰는 완료되는 순서대로, 최종 요약은 토큰 단위로 전달"""
     memory = ConversationBufferMemory(
         memory_key="chat_history",
         return_messages=True,
@@ -165,6 +244,8 @@ def get_code_review(review_queries, llm):
 
     summary_prompt = ChatPromptTemplate.from_messages([
         ("system", "이전에 진행한 MR의 코드 리뷰들을 종합하여 최종 리포트를 작성합니다."),
+        # 메모리에 저장된 (예산에 맞게 축소된) 파일별 리뷰
+        MessagesPlaceholder(variable_name="chat_history"),
         ("human", """지금까지 진행한 MR 내부 수정사항의 코드 리뷰 내용을 종합하여 수정 파일 별 Merge Request 코멘트를 작성해주세요.
             이떄 마크다운과 이모티콘을 사용해 이쁘게 꾸며 주세요
             아래 형식으로 작성해주세요:
@@ -191,77 +272,153 @@ def get_code_review(review_queries, llm):
 
 
     # 체인 구성
+    # rate limit 시 지수 백오프 재시도는 LLM 호출에만 적용
+    # (with_retry 결과는 RunnableBinding 이라 batch_as_completed 가 재시도 없이 내부 체인으로 바로 전달됨)
     review_chain = (
             review_prompt
-            | llm
+            | llm.with_retry(
+                retry_if_exception_type=(RateLimitError,),
+                wait_exponential_jitter=True,
+                stop_after_attempt=max_retries or REVIEW_MAX_RETRIES
+            )
             | StrOutputParser()
     )
 
-    # summary_chain을 LLMChain으로 생성
-    summary_chain = LLMChain(
-        llm=llm,
-        prompt=summary_prompt,
-        memory=memory,  # 여기서 메모리 연결
-        output_parser=StrOutputParser()
+    # 요약은 메모리의 파일별 리뷰를 chat_history 로 넣어 스트리밍
+    summary_chain = (
+            summary_prompt
+            | llm
+            | StrOutputParser()
     )
 
     try:
-
-        for file_path, code_chunk, similar_codes in review_queries:
-
-            # 입력을 정확히 전달하도록 확인
-            try:
-                review_result = review_chain.invoke({
-                    "file_path": file_path,
-                    "code_chunk": code_chunk,
-                    "similar_codes": similar_codes
-                })
-
-                # 메모리에 리뷰 결과 저장
-                memory.save_context(
-                    {"input": f"Review for {file_path}"},
-                    {"output": review_result}
-                )
-
-            except Exception as e:
-                print(f"개별 리뷰 중 오류 발생: {e}")
+        # 토큰 예산에 맞춰 diff 분할, 참고 코드 선별
+        review_inputs = build_review_inputs(review_queries)
+
+        # 같은 모델/프롬프트/파일/diff/참고 코드 조합은 캐시된 리뷰 재사용
+        cache = cache if cache is not None else get_default_review_cache()
+        model_name = get_model_name(llm)
+        cache_keys = [
+            make_review_key(model_name, REVIEW_PROMPT_VERSION, review_input['file_path'],
+                            review_input['code_chunk'], review_input['similar_codes'])
+            for review_input in review_inputs
+        ]
+        review_results = cache.get_many(cache_keys) if cache else [None] * len(review_inputs)
+        missing = [i for i, review_result in enumerate(review_results) if review_result is None]
+        missing_set = set(missing)
+
+        # 파일 하나가 여러 조각으로 나뉜 경우 모든 조각이 끝나면 파일 리뷰로 전달
+        indexes_by_path = {}
+        for i, review_input in enumerate(review_inputs):
+            indexes_by_path.setdefault(review_input['source_path'], []).append(i)
+        parts_left = {path: len(indexes) for path, indexes in indexes_by_path.items()}
+
+        def finish_part(i):
+            path = review_inputs[i]['source_path']
+            parts_left[path] -= 1
+            if parts_left[path]:
+                return None
+            results = [review_results[index] for index in indexes_by_path[path]]
+            return {
+                'file_path': path,
+                'review': '\n\n'.join(result for result in results if not isinstance(result, Exception)),
+                'cached': all(index not in missing_set for index in indexes_by_path[path]),
+                'errors': [str(result) for result in results if isinstance(result, Exception)],
+            }
+
+        with stage('review', items=len(review_inputs), cache_hits=len(review_inputs) - len(missing),
+                   nbytes=sum(len(review_input['code_chunk']) for review_input in review_inputs)):
+            for i in range(len(review_inputs)):
+                if i not in missing_set:
+                    file_review = finish_part(i)
+                    if file_review:
+                        yield 'file_review', file_review
+
+            # 완료되는 순서대로 결과 수신 (동시 요청 수 제한)
+            completed = review_chain.batch_as_completed(
+                [review_inputs[i] for i in missing],
+                config={"max_concurrency": max_concurrency or REVIEW_CONCURRENCY},
+                return_exceptions=True
+            ) if missing else []
+            for position, review_result in completed:
+                i = missing[position]
+                review_results[i] = review_result
+                if cache and not isinstance(review_result, Exception):
+                    cache.put(cache_keys[i], review_result)
+                file_review = finish_part(i)
+                if file_review:
+                    yield 'file_review', file_review
+
+        # 나눠서 리뷰한 diff 조각은 파일 단위로 합침 (요약 입력은 파일 순서 유지)
+        file_reviews = {}
+        for review_input, review_result in zip(review_inputs, review_results):
+            if isinstance(review_result, Exception):
+                print(f"개별 리뷰 중 오류 발생: {review_result}")
                 continue  # 오류 발생 시 다음 항목으로 건너뜀
-
-        response = summary_chain.invoke({"input": "Generate final review"})
-        final_review = response.get('text', '') if isinstance(response, dict) else str(response)
-
-        print(final_review)
-        return final_review
+            file_reviews.setdefault(review_input['source_path'], []).append(review_result)
+
+        # 메모리에 리뷰 결과 저장 (요약 입력 예산에 맞게 축소)
+        compacted = compact_reviews(
+            [(file_path, '\n\n'.join(results)) for file_path, results in file_reviews.items()])
+        for file_path, review_result in compacted:
+            memory.save_context(
+                {"input": f"Review for {file_path}"},
+                {"output": review_result}
+            )
+
+        # 파일별 리뷰가 모두 같으면 요약도 캐시에서 재사용
+        summary_key = make_review_key(model_name, REVIEW_PROMPT_VERSION, '', '', compacted)
+        with stage('summarize', items=len(compacted)) as record:
+            final_review = cache.get(summary_key) if cache else None
+            if final_review is None:
+                tokens = []
+                for token in summary_chain.stream(memory.load_memory_variables({})):
+                    tokens.append(token)
+                    yield 'summary_token', {'token': token}
+                final_review = ''.join(tokens)
+                if cache and final_review:
+                    cache.put(summary_key, final_review)
+            else:
+                record.cache_hits = 1
+                yield 'summary_token', {'token': final_review}
+        if cache:
+            print(f"리뷰 캐시: {cache.stats()}")
+
+        yield 'summary', {'review': final_review}
 
     except Exception as e:
         print(f"리뷰 중 오류 발생: {e}")
-        return str(e)
+        yield 'error', {'message': str(e)}
+
+def get_model_name(llm):
+    """캐시 키에 사용할 LLM 모델 이름"""
+    return getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or type(llm).__name__
+
+def get_review_query_texts(chunker, project_path, commit, language):
+    """diff 에서 변경된 함수(없으면 hunk) 별 유사 코드 검색 질의 텍스트"""
+    hunks = parse_hunks(commit['diff'])
+    new_file = Path(project_path) / commit['new_path']
+    if commit.get('deleted_file') or not new_file.is_file():
+        # 삭제된 파일은 새 파일 AST 가 없으므로 삭제된 코드를 청크화 (함수가 없으면 hunk 단위)
+        removed_lines, _ = parse_git_diff(commit['diff'])
+        chunks = chunker.chunk_code('\n'.join(removed_lines), language, commit['new_path'])
+        if chunks:
+            return [chunk.text for chunk in chunks]
+        return [text for text in map(hunk_text, hunks) if text.strip()]
+
+    chunks = chunker.chunk_file(str(new_file), language)
+    functions, orphan_hunks = affected_chunks(chunks, hunks)
+    texts = [chunk.text for chunk in functions]
+    texts.extend(text for text in map(hunk_text, orphan_hunks) if text.strip())
+    return texts
 
 def parse_git_diff(diff_string):
-    # diff 헤더(@@ -0,0 +1,30 @@) 이후부터 파싱
-    lines = diff_string.split('\n')
-    start_idx = 0
-
-    # diff 헤더 찾기
-    for i, line in enumerate(lines):
-        if line.startswith('@@'):
-            start_idx = i + 1
-            break
-
+    # 모든 hunk(@@ -a,b +c,d @@) 의 삭제/추가 라인 파싱
     removed_lines = []
     added_lines = []
 
-    # 실제 코드 변경사항 파싱
-    for line in lines[start_idx:]:
-        # 빈 줄 무시
-        if not line:
-            continue
-
-        # 삭제된 라인('-'로 시작)
-        if line.startswith('-'):
-            removed_lines.append(line[1:])  # '-' 제외하고 저장
-        # 추가된 라인('+'로 시작)
-        elif line.startswith('+'):
-            added_lines.append(line[1:])  # '+' 제외하고 저장
+    for hunk in parse_hunks(diff_string):
+        removed_lines.extend(content for _, content in hunk.removed_lines)
+        added_lines.extend(content for _, content in hunk.added_lines)
 
-    return removed_lines, added_lines
\ No newline at end of file
+    return removed_lines, added_lines
@@ -1,5 +1,9 @@
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from . import reviewers
+from .jobs import check_callback_url, get_job_queue
+from .metrics import render_metrics, track_pipeline
 
 # Blueprint 생성
 routes_bp = Blueprint('routes', __name__)
@@ -31,8 +35,81 @@ def code_review():
     branch = data.get('branch')
     commits = data.get('commits')
 
-    review = reviewers.getCodeReview(url, token, projectId, branch, commits)
-    if review:
-        return jsonify({'status': 'success', 'review': review})
-    else:
-        return jsonify({'status': 'fail', 'message': '코드 리뷰 생성 중 오류가 발생했습니다.'}), 500
+    # ?stream=sse|jsonl 또는 Accept 헤더로 스트리밍 응답 선택
+    stream_format = get_stream_format()
+    if stream_format:
+        return stream_code_review(stream_format, url, token, projectId, branch, commits)
+
+    with track_pipeline() as timings:
+        try:
+            review = reviewers.getCodeReview(url, token, projectId, branch, commits)
+        except reviewers.ReviewError as e:
+            timings.status = 'fail'
+            return jsonify({'status': 'fail', 'message': f'코드 리뷰 생성 중 오류가 발생했습니다: {e}',
+                            'timings': timings.to_dict()}), 500
+    return jsonify({'status': 'success', 'review': review, 'timings': timings.to_dict()})
+
+def get_stream_format():
+    stream_format = request.args.get('stream', '').lower()
+    if stream_format in ('sse', 'jsonl'):
+        return stream_format
+    accept = request.headers.get('Accept', '')
+    if 'text/event-stream' in accept:
+        return 'sse'
+    if 'application/x-ndjson' in accept:
+        return 'jsonl'
+    return None
+
+def format_stream_event(stream_format, event, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    if stream_format == 'sse':
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({'event': event, 'data': data}, ensure_ascii=False) + '\n'
+
+# 파일별 리뷰는 완료되는 대로, 최종 요약은 토큰 단위로 전송 (마지막에 timings, done)
+def stream_code_review(stream_format, url, token, projectId, branch, commits):
+    def generate():
+        with track_pipeline() as timings:
+            status = 'success'
+            for event, data in reviewers.iterCodeReview(url, token, projectId, branch, commits):
+                if event == 'error':
+                    status = 'fail'
+                    timings.status = 'fail'
+                yield format_stream_event(stream_format, event, data)
+        yield format_stream_event(stream_format, 'timings', timings.to_dict())
+        yield format_stream_event(stream_format, 'done', {'status': status})
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# 비동기 코드 리뷰: 작업 제출 후 jobId 로 조회 (callbackUrl 지정 시 완료 후 POST)
+@routes_bp.route('/flask/code-review/jobs', methods=['POST'])
+def submit_code_review_job():
+    data = request.get_json()
+    callback_url = data.get('callbackUrl')
+    if callback_url:
+        reason = check_callback_url(callback_url)
+        if reason:
+            return jsonify({'status': 'fail', 'message': reason}), 400
+    job, created = get_job_queue().submit(
+        data.get('url'),
+        data.get('token'),
+        data.get('projectId'),
+        data.get('branch'),
+        data.get('commits'),
+        callback_url=callback_url
+    )
+    return jsonify({'status': 'accepted', 'created': created, **job.to_dict()}), 202
+
+@routes_bp.route('/flask/code-review/jobs/<job_id>', methods=['GET'])
+def get_code_review_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'status': 'fail', 'message': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'status': 'success', **job.to_dict()})
+
+# Prometheus 수집용 단계별 지표
+@routes_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
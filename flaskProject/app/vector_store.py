@@ -0,0 +1,528 @@
+# vector_store.py
+"""
+벡터 저장소 인터페이스와 백엔드
+- chroma: 기존 Chroma 컬렉션 (float32 + 문서 원문)
+- local : memory-mapped float16 / int8 양자화 행렬 + SQLite 문서/메타데이터
+          작은 컬렉션은 NumPy 정확 검색, 큰 컬렉션은 HNSW(hnswlib 설치 시) 근사 검색
+
+검색 결과는 쿼리별 (id, document, metadata, distance) 목록이며 distance 가 작을수록 유사
+"""
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'chroma').lower()
+# local 백엔드 저장 형식: float16 / int8
+VECTOR_STORE_DTYPE = os.getenv('VECTOR_STORE_DTYPE', 'float16').lower()
+# 이 개수 이하면 ANN 인덱스 없이 정확 검색
+EXACT_SEARCH_MAX = int(os.getenv('VECTOR_STORE_EXACT_SEARCH_MAX', '20000'))
+# 필터가 있는 ANN 검색은 n_results 의 몇 배를 가져와 거를지 (부족하면 이 배수로 늘려 재검색)
+ANN_OVERSAMPLE = int(os.getenv('VECTOR_STORE_ANN_OVERSAMPLE', '4'))
+# 이 배수까지 늘려도 필터를 통과한 결과가 부족하면 (드문 필터) 후보 행만 정확 검색
+ANN_MAX_OVERSAMPLE = int(os.getenv('VECTOR_STORE_ANN_MAX_OVERSAMPLE', '64'))
+
+
+class VectorStore:
+    """벡터 저장소 공통 인터페이스"""
+
+    def add(self, ids, embeddings, documents, metadatas=None):
+        raise NotImplementedError
+
+    def delete(self, ids=None, where=None):
+        raise NotImplementedError
+
+    def query(self, query_embeddings, n_results=5, where=None):
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def flush(self):
+        """쓰기 작업 묶음이 끝난 뒤 호출 (필요한 백엔드만 구현)"""
+
+    def drop(self):
+        """저장소 자체를 삭제 (리뷰 한 번에만 쓰는 임시 저장소 정리용)"""
+        self.reset()
+
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, persist_directory=None, collection_name='code_embeddings'):
+        import chromadb
+
+        self.collection_name = collection_name
+        # persist_directory 가 None 이면 메모리에만 저장
+        self.client = chromadb.PersistentClient(path=persist_directory) if persist_directory else chromadb.Client()
+        self.collection = self.client.get_or_create_collection(collection_name)
+
+    def add(self, ids, embeddings, documents, metadatas=None):
+        self.collection.upsert(
+            ids=list(ids),
+            embeddings=[np.asarray(embedding, dtype=np.float32).tolist() for embedding in embeddings],
+            documents=list(documents),
+            metadatas=metadatas
+        )
+
+    def delete(self, ids=None, where=None):
+        if ids is None and where is None:
+            return
+        self.collection.delete(ids=ids, where=where)
+
+    def query(self, query_embeddings, n_results=5, where=None):
+        results = self.collection.query(
+            query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist() for embedding in query_embeddings],
+            n_results=n_results,
+            where=where,
+            include=['documents', 'metadatas', 'distances']
+        )
+        return [
+            list(zip(ids, documents, metadatas or [None] * len(ids), distances))
+            for ids, documents, metadatas, distances in zip(
+                results['ids'], results['documents'], results['metadatas'], results['distances'])
+        ]
+
+    def reset(self):
+        try:
+            self.client.delete_collection(self.collection_name)
+        except Exception as e:
+            print(f"Error resetting collection: {e}")
+        self.collection = self.client.get_or_create_collection(self.collection_name)
+
+    def drop(self):
+        # 메모리 클라이언트끼리도 같은 컬렉션을 공유하므로 다시 만들지 않고 삭제만
+        self.client.delete_collection(self.collection_name)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    양자화 벡터 행렬(행 단위) + SQLite(id, 행 번호, 문서, 메타데이터)
+    벡터는 정규화 후 저장하며 distance = 1 - cosine similarity
+    """
+
+    def __init__(self, persist_directory=None, collection_name='code_embeddings', dtype=VECTOR_STORE_DTYPE,
+                 exact_search_max=EXACT_SEARCH_MAX):
+        if dtype not in ('float16', 'int8'):
+            raise ValueError(f"지원하지 않는 벡터 저장 형식: {dtype}")
+        self.dtype = dtype
+        self.exact_search_max = exact_search_max
+        self.directory = Path(persist_directory) / collection_name if persist_directory else None
+        self._lock = threading.RLock()
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.directory / 'items.sqlite3'), check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL,
+                document TEXT,
+                metadata TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_row ON items(row)")
+        self._conn.commit()
+
+        self._matrix = None     # (capacity, dim) 양자화 행렬
+        self._alive = None      # 행 사용 여부
+        self._free_rows = []
+        self._size = 0          # 사용된 행 수(삭제 행 포함한 최대 행 번호 + 1)
+        self._ann = None        # hnswlib 인덱스 (필요할 때 생성)
+        self._version = 0       # 쓰기마다 증가, 저장된 ANN 인덱스가 최신인지 확인용
+        self._ann_version = -1
+        self._load()
+
+    # ---------- 저장 형식 ----------
+
+    def _encode(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        if self.dtype == 'int8':
+            return np.clip(np.rint(vectors * 127), -127, 127).astype(np.int8)
+        return vectors.astype(np.float16)
+
+    def _decode(self, rows):
+        if self.dtype == 'int8':
+            return rows.astype(np.float32) / 127
+        return rows.astype(np.float32)
+
+    def _np_dtype(self):
+        return np.int8 if self.dtype == 'int8' else np.float16
+
+    def _allocate(self, capacity, dim):
+        if self.directory:
+            path = self.directory / f'vectors-{capacity}.npy'
+            matrix = np.lib.format.open_memmap(path, mode='w+', dtype=self._np_dtype(), shape=(capacity, dim))
+        else:
+            matrix = np.zeros((capacity, dim), dtype=self._np_dtype())
+        return matrix
+
+    def _load(self):
+        rows = self._conn.execute("SELECT row FROM items").fetchall()
+        if not self.directory:
+            return
+        state_path = self.directory / 'state.json'
+        if not state_path.exists():
+            # 벡터 파일 없이 남은 항목은 사용할 수 없으므로 정리
+            if rows:
+                self._conn.execute("DELETE FROM items")
+                self._conn.commit()
+            return
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('dtype') != self.dtype:
+            print(f"저장 형식이 달라 벡터 저장소를 초기화합니다: {state.get('dtype')} → {self.dtype}")
+            # 행렬을 열지 않았으므로 reset 이 지우지 못하는 이전 벡터 파일은 직접 삭제
+            old_path = self.directory / state['file'] if state.get('file') else None
+            self.reset()
+            if old_path is not None and old_path.exists():
+                old_path.unlink()
+            return
+        self._matrix = np.load(self.directory / state['file'], mmap_mode='r+')
+        self._size = state['size']
+        self._version = state.get('version', 0)
+        self._ann_version = state.get('ann_version', -1)
+        self._alive = np.zeros(self._matrix.shape[0], dtype=bool)
+        for (row,) in rows:
+            self._alive[row] = True
+        self._free_rows = [row for row in range(self._size) if not self._alive[row]]
+
+    def _save_state(self):
+        if not self.directory or self._matrix is None:
+            return
+        self._matrix.flush()
+        state = {'dtype': self.dtype, 'size': self._size, 'file': Path(self._matrix.filename).name,
+                 'version': self._version, 'ann_version': self._ann_version}
+        tmp_path = self.directory / 'state.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.directory / 'state.json')
+
+    def flush(self):
+        """ANN 인덱스를 디스크에 저장 (인덱싱 작업이 끝난 뒤 한 번 호출)"""
+        with self._lock:
+            if self.directory and self._ann is not None and self._ann_version != self._version:
+                self._ann.save_index(str(self.directory / 'hnsw.bin'))
+                self._ann_version = self._version
+                self._save_state()
+
+    def _ensure_capacity(self, needed, dim):
+        if self._matrix is None:
+            self._matrix = self._allocate(max(1024, needed), dim)
+            self._alive = np.zeros(self._matrix.shape[0], dtype=bool)
+            return
+        if self._matrix.shape[1] != dim:
+            raise ValueError(f"벡터 차원 불일치: {self._matrix.shape[1]} != {dim}")
+        if needed <= self._matrix.shape[0]:
+            return
+        # 용량 2배 확장 (새 파일에 복사 후 이전 파일 삭제)
+        old_matrix = self._matrix
+        capacity = max(needed, old_matrix.shape[0] * 2)
+        self._matrix = self._allocate(capacity, dim)
+        self._matrix[:old_matrix.shape[0]] = old_matrix
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+        if self.directory:
+            old_path = old_matrix.filename
+            del old_matrix
+            self._save_state()
+            os.remove(old_path)
+        if self._ann is not None:
+            self._ann.resize_index(capacity)
+
+    # ---------- 쓰기 ----------
+
+    def add(self, ids, embeddings, documents, metadatas=None):
+        ids = list(ids)
+        if not ids:
+            return
+        documents = list(documents)
+        metadatas = metadatas or [None] * len(ids)
+        # 같은 호출 안에서 중복된 id 는 마지막 값만 사용
+        last_index = {item_id: i for i, item_id in enumerate(ids)}
+        if len(last_index) != len(ids):
+            keep = sorted(last_index.values())
+            ids = [ids[i] for i in keep]
+            documents = [documents[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            embeddings = [embeddings[i] for i in keep]
+        encoded = self._encode(embeddings)
+
+        with self._lock:
+            # 같은 id 는 덮어쓰기
+            self.delete(ids=ids)
+            needed_new = max(0, len(ids) - len(self._free_rows))
+            self._ensure_capacity(self._size + needed_new, encoded.shape[1])
+
+            rows = []
+            for _ in ids:
+                if self._free_rows:
+                    rows.append(self._free_rows.pop())
+                else:
+                    rows.append(self._size)
+                    self._size += 1
+            self._matrix[rows] = encoded
+            self._alive[rows] = True
+
+            self._conn.executemany(
+                "INSERT INTO items (id, row, document, metadata) VALUES (?, ?, ?, ?)",
+                [(item_id, row, document, json.dumps(metadata, ensure_ascii=False) if metadata else None)
+                 for item_id, row, document, metadata in zip(ids, rows, documents, metadatas)]
+            )
+            self._conn.commit()
+
+            if self._ann is not None:
+                self._ann.add_items(self._decode(encoded), rows)
+            self._version += 1
+            self._save_state()
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            rows = self._select_rows(ids=ids, where=where)
+            if not rows:
+                return
+            placeholders = ','.join('?' * len(rows))
+            self._conn.execute(f"DELETE FROM items WHERE row IN ({placeholders})", rows)
+            self._conn.commit()
+            self._alive[rows] = False
+            self._free_rows.extend(rows)
+            if self._ann is not None:
+                for row in rows:
+                    self._ann.mark_deleted(row)
+            self._version += 1
+            self._save_state()
+
+    def reset(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM items")
+            self._conn.commit()
+            if self._matrix is not None and self.directory:
+                path = self._matrix.filename
+                self._matrix = None
+                os.remove(path)
+            self._matrix = None
+            self._alive = None
+            self._free_rows = []
+            self._size = 0
+            self._ann = None
+            self._version = 0
+            self._ann_version = -1
+            if self.directory:
+                for name in ('state.json', 'hnsw.bin'):
+                    if (self.directory / name).exists():
+                        (self.directory / name).unlink()
+
+    # ---------- 검색 ----------
+
+    def query(self, query_embeddings, n_results=5, where=None):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if self._matrix is None or not self._alive.any():
+                return [[] for _ in queries]
+
+            alive_count = int(self._alive.sum())
+            if alive_count > self.exact_search_max and self._get_ann() is not None:
+                return self._ann_search(queries, n_results, where, alive_count)
+            if where is not None:
+                candidate_rows = np.array(sorted(self._select_rows(where=where)), dtype=np.int64)
+            else:
+                candidate_rows = np.flatnonzero(self._alive[:self._size])
+            hits = self._exact_search(queries, n_results, candidate_rows)
+            return [self._fetch(query_hits) for query_hits in hits]
+
+    def _exact_search(self, queries, n_results, candidate_rows, block_size=65536):
+        """후보 행을 블록 단위로 역양자화해 내적 → 쿼리별 상위 k"""
+        if len(candidate_rows) == 0:
+            return [[] for _ in queries]
+        k = min(n_results, len(candidate_rows))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, len(candidate_rows), block_size):
+            block_rows = candidate_rows[start:start + block_size]
+            scores = queries @ self._decode(self._matrix[block_rows]).T
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, np.broadcast_to(block_rows, scores.shape)], axis=1)
+            if best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [list(zip(rows.tolist(), (1 - scores).tolist())) for rows, scores in zip(best_rows, best_scores)]
+
+    def _get_ann(self):
+        if self._ann is not None:
+            return self._ann
+        try:
+            import hnswlib
+        except ImportError:
+            return None
+
+        dim = self._matrix.shape[1]
+        index = hnswlib.Index(space='ip', dim=dim)
+        index_path = self.directory / 'hnsw.bin' if self.directory else None
+        if index_path is not None and index_path.exists() and self._ann_version == self._version:
+            index.load_index(str(index_path), max_elements=self._matrix.shape[0])
+        else:
+            # 기존 행렬로부터 인덱스 구축
+            index.init_index(max_elements=self._matrix.shape[0], ef_construction=200, M=16)
+            alive_rows = np.flatnonzero(self._alive[:self._size])
+            for start in range(0, len(alive_rows), 65536):
+                block_rows = alive_rows[start:start + 65536]
+                index.add_items(self._decode(self._matrix[block_rows]), block_rows)
+            self._ann_version = -1
+        index.set_ef(100)
+        self._ann = index
+        return index
+
+    def _ann_search(self, queries, n_results, where, alive_count):
+        """
+        HNSW 근사 검색, 필터가 있으면 n_results 보다 넉넉히 가져와 메타데이터로 거름
+        (결과가 부족한 쿼리만 더 많이 가져와 재검색, 그래도 부족하면 후보 행 정확 검색)
+        """
+        results = [None] * len(queries)
+        pending = list(range(len(queries)))
+        k = min(n_results if where is None else n_results * ANN_OVERSAMPLE, alive_count)
+        while pending:
+            # ef 가 k 보다 작으면 hnswlib 가 k 개를 돌려주지 못함
+            self._ann.set_ef(max(100, k))
+            labels, distances = self._ann.knn_query(queries[pending], k=k)
+            short = []
+            for query_index, row_labels, row_distances in zip(pending, labels, distances):
+                # hnswlib 'ip' 거리 = 1 - 내적
+                hits = self._fetch(list(zip(row_labels.tolist(), row_distances.tolist())))
+                if where is not None:
+                    hits = [hit for hit in hits if matches_where(hit[2], where)]
+                if len(hits) >= n_results or k >= alive_count:
+                    results[query_index] = hits[:n_results]
+                else:
+                    short.append(query_index)
+            pending = short
+            if pending and k >= n_results * ANN_MAX_OVERSAMPLE:
+                candidate_rows = np.array(sorted(self._select_rows(where=where)), dtype=np.int64)
+                hits = self._exact_search(queries[pending], n_results, candidate_rows)
+                for query_index, query_hits in zip(pending, hits):
+                    results[query_index] = self._fetch(query_hits)
+                break
+            k = min(k * ANN_OVERSAMPLE, alive_count)
+        return results
+
+    def _fetch(self, hits):
+        if not hits:
+            return []
+        rows = [row for row, _ in hits]
+        placeholders = ','.join('?' * len(rows))
+        items = {
+            row: (item_id, document, json.loads(metadata) if metadata else None)
+            for item_id, row, document, metadata in self._conn.execute(
+                f"SELECT id, row, document, metadata FROM items WHERE row IN ({placeholders})", rows
+            )
+        }
+        return [(*items[row], distance) for row, distance in hits if row in items]
+
+    # ---------- 필터 ----------
+
+    def _select_rows(self, ids=None, where=None):
+        clauses, params = [], []
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return []
+            clauses.append(f"id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if where is not None:
+            clause, where_params = where_to_sql(where)
+            clauses.append(clause)
+            params.extend(where_params)
+        if not clauses:
+            return []
+        sql = "SELECT row FROM items WHERE " + " AND ".join(clauses)
+        return [row for (row,) in self._conn.execute(sql, params)]
+
+
+def matches_where(metadata, where):
+    """where_to_sql 과 같은 의미로 메타데이터 dict 에 필터 적용"""
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, expected in condition.items():
+            if operator == '$eq':
+                matched = value is not None and value == expected
+            elif operator == '$ne':
+                matched = value is None or value != expected
+            elif operator == '$in':
+                matched = value is not None and value in expected
+            elif operator == '$nin':
+                matched = value is None or value not in expected
+            else:
+                raise ValueError(f"지원하지 않는 필터 연산자: {operator}")
+            if not matched:
+                return False
+    return True
+
+
+def where_to_sql(where):
+    """Chroma 형식 where 필터({'key': v}, $eq/$ne/$in/$nin, $and/$or)를 SQL 조건으로 변환"""
+    clauses, params = [], []
+    for key, condition in where.items():
+        if key in ('$and', '$or'):
+            parts = [where_to_sql(sub) for sub in condition]
+            joiner = ' AND ' if key == '$and' else ' OR '
+            clauses.append('(' + joiner.join(part for part, _ in parts) + ')')
+            for _, part_params in parts:
+                params.extend(part_params)
+            continue
+
+        field = "json_extract(metadata, ?)"
+        path = f'$."{key}"'
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, value in condition.items():
+            if operator == '$eq':
+                clauses.append(f"{field} = ?")
+                params.extend([path, value])
+            elif operator == '$ne':
+                clauses.append(f"({field} IS NULL OR {field} != ?)")
+                params.extend([path, path, value])
+            elif operator in ('$in', '$nin'):
+                values = list(value)
+                placeholders = ','.join('?' * len(values))
+                if operator == '$in':
+                    clauses.append(f"{field} IN ({placeholders})")
+                    params.extend([path, *values])
+                else:
+                    clauses.append(f"({field} IS NULL OR {field} NOT IN ({placeholders}))")
+                    params.extend([path, path, *values])
+            else:
+                raise ValueError(f"지원하지 않는 필터 연산자: {operator}")
+    return ' AND '.join(clauses) or '1', params
+
+
+def create_vector_store(backend=VECTOR_STORE_BACKEND, persist_directory=None, collection_name='code_embeddings'):
+    if backend == 'local':
+        return LocalVectorStore(persist_directory, collection_name)
+    if backend == 'chroma':
+        return ChromaVectorStore(persist_directory, collection_name)
+    raise ValueError(f"지원하지 않는 벡터 저장소: {backend}")
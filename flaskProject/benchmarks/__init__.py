@@ -0,0 +1,5 @@
+"""
+리뷰 파이프라인 오프라인 벤치마크
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.compare base.json results.json
+"""
@@ -0,0 +1,57 @@
+# compare.py
+"""
+두 벤치마크 결과 JSON 의 중앙값 비교
+    python -m benchmarks.compare base.json new.json [--threshold 0.15]
+threshold 비율 이상 느려진 항목이 있으면 종료 코드 1
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base, new, threshold):
+    """(이름, 기준 중앙값, 새 중앙값, 비율, 회귀 여부) 목록"""
+    rows = []
+    for name in sorted(set(base['results']) & set(new['results'])):
+        base_median = base['results'][name]['median']
+        new_median = new['results'][name]['median']
+        ratio = new_median / base_median if base_median else float('inf')
+        rows.append((name, base_median, new_median, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='벤치마크 결과 비교')
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.15, help='회귀로 판단할 느려짐 비율')
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    if base['meta'].get('embeddings') != new['meta'].get('embeddings'):
+        print("경고: 두 결과의 임베딩 모드가 다릅니다 (store.* 항목 비교 불가)", file=sys.stderr)
+
+    rows = compare(base, new, args.threshold)
+    print(f"{'benchmark':<32} {'base(ms)':>10} {'new(ms)':>10} {'ratio':>7}")
+    for name, base_median, new_median, ratio, regressed in rows:
+        mark = '  << 회귀' if regressed else ''
+        print(f"{name:<32} {base_median * 1000:>10.2f} {new_median * 1000:>10.2f} {ratio:>7.2f}{mark}")
+
+    only_base = sorted(set(base['results']) - set(new['results']))
+    if only_base:
+        print(f"새 결과에 없는 항목: {', '.join(only_base)}")
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)}개 항목이 {args.threshold:.0%} 이상 느려졌습니다.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# fakes.py
+"""
+벤치마크용 로컬 대체 객체 (네트워크 없이 실행)
+- FakeGitLab: gitlab.Gitlab 대신 로컬 bare 저장소를 가리키는 프로젝트 정보 반환
+- FakeGitLabServer: 로컬 디렉토리를 GitLab REST API (프로젝트 / tree / raw blob) 로 제공하는 HTTP 서버
+- make_fake_llm: 고정 응답을 돌려주는 채팅 모델
+- hash_embeddings: 모델 없이 쓰는 결정적 임베딩
+"""
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+EMBEDDING_DIM = 768
+
+
+class FakeProject:
+    def __init__(self, path, repo_url, default_branch='main'):
+        self.path = path
+        self.http_url_to_repo = repo_url
+        self.default_branch = default_branch
+
+
+class FakeProjects:
+    def __init__(self, project):
+        self.project = project
+
+    def get(self, project_id):
+        return self.project
+
+
+class FakeGitLab:
+    """GitLabCodeChunker.gl 대체, clone_project 가 file:// 저장소에서 fetch 하도록 함"""
+
+    def __init__(self, bare_repo_path, project_name='sample', default_branch='main'):
+        self.projects = FakeProjects(FakeProject(project_name, f'file://{bare_repo_path}', default_branch))
+
+
+def git_blob_sha(data):
+    """git 과 같은 방식의 blob SHA"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+class _GitLabApiHandler(BaseHTTPRequestHandler):
+    # keep-alive 연결 재사용 여부를 확인할 수 있도록 HTTP/1.1 사용
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        fake = self.server.fake
+        if parts[:3] != ['api', 'v4', 'projects'] or len(parts) < 4:
+            return self._send(404, {'message': '404 Not Found'})
+
+        rest = parts[4:]
+        if not rest:
+            self.server.stats['project'] += 1
+            return self._send(200, fake.project_info())
+        if rest == ['repository', 'tree']:
+            self.server.stats['tree'] += 1
+            entries = fake.tree(query.get('path', ''))
+            if entries is None:
+                return self._send(404, {'message': '404 Tree Not Found'})
+            return self._send(200, entries)
+        if len(rest) == 4 and rest[:2] == ['repository', 'blobs'] and rest[3] == 'raw':
+            self.server.stats['blob'] += 1
+            data = fake.blobs.get(rest[2])
+            if data is None:
+                return self._send(404, {'message': '404 Blob Not Found'})
+            return self._send(200, data, 'application/octet-stream')
+        return self._send(404, {'message': '404 Not Found'})
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeGitLabServer:
+    """
+    root 디렉토리를 한 프로젝트의 브랜치 내용으로 제공
+    stats: 요청 종류별 횟수와 TCP 연결 수
+        with FakeGitLabServer(repo_path) as server:
+            gitlab.Gitlab(server.url, private_token='x')
+    """
+
+    def __init__(self, root, project_name='sample', default_branch='main'):
+        self.root = Path(root)
+        self.project_name = project_name
+        self.default_branch = default_branch
+        self.blobs = {}
+        self.reload()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _GitLabApiHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._server.stats = Counter()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def stats(self):
+        return self._server.stats
+
+    def reload(self):
+        """root 의 파일이 바뀐 경우 blob 목록 갱신"""
+        self.blobs = {}
+        for path in self.root.rglob('*'):
+            if path.is_file() and '.git' not in path.parts:
+                data = path.read_bytes()
+                self.blobs[git_blob_sha(data)] = data
+
+    def project_info(self):
+        return {'id': 1, 'path': self.project_name, 'default_branch': self.default_branch,
+                'http_url_to_repo': f'{self.url}/{self.project_name}.git'}
+
+    def tree(self, rel_dir):
+        directory = self.root / rel_dir if rel_dir else self.root
+        if not directory.is_dir():
+            return None
+        entries = []
+        for path in sorted(directory.iterdir()):
+            if path.name == '.git':
+                continue
+            rel_path = path.relative_to(self.root).as_posix()
+            if path.is_dir():
+                entries.append({'id': '0' * 40, 'name': path.name, 'type': 'tree', 'path': rel_path, 'mode': '040000'})
+            else:
+                entries.append({'id': git_blob_sha(path.read_bytes()), 'name': path.name, 'type': 'blob',
+                                'path': rel_path, 'mode': '100644'})
+        return entries
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-gitlab', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def make_fake_llm(review_length=1200):
+    """리뷰/요약 요청마다 같은 길이의 마크다운 응답을 반환"""
+    body = ('- 개선 사항: 변수 이름을 명확하게 변경하세요.\n' * (review_length // 30 + 1))[:review_length]
+    return FakeListChatModel(responses=[f"### 리뷰\n{body}"])
+
+
+def hash_embeddings(texts, batch_size=None):
+    """텍스트 해시 기반 정규화 벡터 (get_code_embeddings 와 같은 시그니처)"""
+    vectors = []
+    for text in texts:
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+        vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+        vectors.append(vector / np.linalg.norm(vector))
+    return vectors
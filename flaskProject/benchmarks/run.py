@@ -0,0 +1,309 @@
+# run.py
+"""
+리뷰 파이프라인 오프라인 벤치마크 실행 (flaskProject 디렉토리에서)
+    python -m benchmarks.run --output results.json [--scale 8] [--repeat 5] [--embeddings model|fake]
+
+GitLab 과 LLM 은 benchmarks.fakes 의 로컬 대체 객체를 사용
+--embeddings model 인데 GraphCodeBERT 를 로드할 수 없으면 임베딩 처리량 항목은 건너뛰고
+저장/검색 항목은 해시 임베딩으로 측정 (결과 meta.embeddings 에 기록)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 임베딩 캐시가 서비스용 캐시 파일을 건드리지 않도록 app import 전에 경로 지정
+os.environ.setdefault('EMBEDDING_CACHE_PATH',
+                      os.path.join(tempfile.gettempdir(), 'review-bench', 'embeddings.sqlite3'))
+
+from app.chunking.GetCode import GitLabCodeChunker
+from app.chunking.parallel import chunk_files_parallel
+from app.chunking.remote_files import BlobCache
+from app.chunking.registry import get_chunker
+from app import embeddings as embeddings_module
+from app.embeddings import CodeEmbeddingProcessor, GraphCodeBERTEmbeddings
+from app.models import codebert_model
+from app.reviewers import get_code_review, get_review_query_texts, parse_git_diff
+
+from .fakes import FakeGitLab, FakeGitLabServer, hash_embeddings, make_fake_llm
+from .workloads import SAMPLES, build_commits, build_sample_repo, load_sample, make_bare_clone
+
+RESULT_VERSION = 1
+
+
+def measure(fn, repeat, warmup=1, setup=None, items=None, quiet=True):
+    """setup() 결과를 인자로 fn 을 반복 실행 (setup 시간 제외), 초 단위 통계 반환"""
+    samples = []
+    for run in range(warmup + repeat):
+        argument = setup() if setup else None
+        output = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            start = time.perf_counter()
+            fn(argument) if setup else fn()
+            elapsed = time.perf_counter() - start
+        if run >= warmup:
+            samples.append(elapsed)
+
+    median = statistics.median(samples)
+    result = {
+        'repeat': repeat,
+        'min': min(samples),
+        'median': median,
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+    if items:
+        result['items'] = items
+        result['items_per_second'] = items / median if median else None
+    return result
+
+
+class BenchmarkRunner:
+    def __init__(self, args, work_dir):
+        self.args = args
+        self.work_dir = Path(work_dir)
+        self.results = {}
+        self.skipped = {}
+        self.embeddings_mode = args.embeddings
+
+    def run(self, name, fn, **kwargs):
+        if self.args.only and not any(name.startswith(prefix) for prefix in self.args.only):
+            return
+        print(f"- {name}", file=sys.stderr)
+        try:
+            self.results[name] = measure(fn, self.args.repeat, self.args.warmup, **kwargs)
+        except Exception as e:
+            print(f"  실패: {e}", file=sys.stderr)
+            self.skipped[name] = str(e)
+
+    def skip(self, name, reason):
+        if not self.args.only or any(name.startswith(prefix) for prefix in self.args.only):
+            self.skipped[name] = reason
+
+    # --- 입력 준비 -------------------------------------------------------
+    def prepare(self):
+        self.repo_path = self.work_dir / 'repo'
+        self.repo_files = build_sample_repo(self.repo_path, self.args.scale, init_git=True)
+        self.bare_path = make_bare_clone(self.repo_path, self.work_dir / 'sample.git')
+        self.commits = build_commits(self.args.scale, seed=self.args.seed)
+        # diff 적용 후 파일 (변경 함수 탐색용 새 파일 AST)
+        self.review_path = self.work_dir / 'review'
+        for commit in self.commits:
+            new_file = self.review_path / commit['new_path']
+            new_file.parent.mkdir(parents=True, exist_ok=True)
+            new_file.write_text(commit['new_source'], encoding='utf-8')
+        self.chunker = GitLabCodeChunker(
+            gitlab_url='http://gitlab.invalid', gitlab_token='bench', project_id='bench',
+            local_path=str(self.work_dir / 'clone'), branch='main',
+            mirror_path=str(self.work_dir / 'mirror'), keep_worktree=False
+        )
+        self.chunker.gl = FakeGitLab(self.bare_path)
+
+        tasks = [(rel_path, str(self.repo_path / rel_path), language) for rel_path, language in self.repo_files]
+        self.repo_chunks = [(rel_path, chunks) for rel_path, _, chunks in chunk_files_parallel(tasks, max_workers=1)]
+        self.chunk_texts = [chunk.text for _, chunks in self.repo_chunks for chunk in chunks]
+
+    def setup_embeddings(self):
+        if self.embeddings_mode == 'model':
+            try:
+                codebert_model.load_model()
+                return
+            except Exception as e:
+                print(f"임베딩 모델 로드 실패, 해시 임베딩 사용: {e}", file=sys.stderr)
+                self.embeddings_mode = 'fake'
+        # 저장/검색 측정용: GraphCodeBERTEmbeddings 가 호출하는 함수를 해시 임베딩으로 대체
+        embeddings_module.get_code_embeddings = hash_embeddings
+
+    # --- 측정 항목 -------------------------------------------------------
+    def bench_clone(self):
+        counter = iter(range(1_000_000))
+
+        def cold_setup():
+            index = next(counter)
+            self.chunker.mirror_path = self.work_dir / f'mirror-cold-{index}' / 'bench'
+            self.chunker.local_path = self.work_dir / f'clone-cold-{index}'
+
+        def clone(_=None):
+            if not self.chunker.clone_project():
+                raise RuntimeError('clone_project 실패')
+            self.chunker.cleanup_project_directory()
+
+        self.run('clone.cold', clone, setup=cold_setup)
+        # 미러가 이미 있는 경우 (fetch + 워크트리 생성)
+        self.run('clone.warm', clone)
+
+    def bench_fetch(self):
+        # clone 없는 리뷰: 로컬 가짜 GitLab API 에서 변경 파일 + 관련 파일 가져오기
+        changed_paths = sorted({commit['new_path'] for commit in self.commits})
+        counter = iter(range(1_000_000))
+        with FakeGitLabServer(self.repo_path) as server:
+            chunker = GitLabCodeChunker(
+                gitlab_url=server.url, gitlab_token='bench', project_id='1',
+                local_path=str(self.work_dir / 'fetch'), branch='main'
+            )
+            warm_cache = BlobCache(self.work_dir / 'blob-cache-warm')
+
+            def fetch(cache):
+                chunker.fetch_review_files(changed_paths, cache=cache)
+                chunker.cleanup_project_directory()
+
+            self.run('fetch.api.cold', fetch,
+                     setup=lambda: BlobCache(self.work_dir / f'blob-cache-cold-{next(counter)}'),
+                     items=len(changed_paths))
+            # 같은 blob 은 캐시에서 읽고 tree 목록만 조회
+            self.run('fetch.api.warm', lambda: fetch(warm_cache), items=len(changed_paths))
+            print(f"  가짜 GitLab 요청: {dict(server.stats)}", file=sys.stderr)
+
+    def bench_chunkers(self):
+        for language in SAMPLES:
+            source = load_sample(language).encode('utf-8')
+            chunker = get_chunker(language)
+            count = len(list(chunker(source, 'sample')))
+            self.run(f'chunk.{language}', lambda: list(chunker(source, 'sample')), items=count)
+
+        for language, (file_name, _) in SAMPLES.items():
+            file_path = str(Path(__file__).parent / 'samples' / file_name)
+            self.run(f'chunk_file.{language}', lambda: self.chunker.chunk_file(file_path, language))
+
+        tasks = [(rel_path, str(self.repo_path / rel_path), language) for rel_path, language in self.repo_files]
+        self.run('chunk.repo_serial', lambda: list(chunk_files_parallel(tasks, max_workers=1)), items=len(tasks))
+        self.run('chunk.repo_parallel', lambda: list(chunk_files_parallel(tasks)), items=len(tasks))
+
+    def bench_diff(self):
+        diffs = [commit['diff'] for commit in self.commits]
+        self.run('diff.parse_git_diff', lambda: [parse_git_diff(diff) for diff in diffs], items=len(diffs))
+
+        commits = [dict(commit) for commit in self.commits]
+        self.run('diff.query_texts', lambda: [
+            get_review_query_texts(self.chunker, str(self.review_path), commit, commit['language'])
+            for commit in commits
+        ], items=len(commits))
+
+    def bench_embeddings(self):
+        texts = self.chunk_texts[:self.args.embed_items]
+        if self.embeddings_mode != 'model':
+            for batch_size in self.args.batch_sizes:
+                self.skip(f'embed.batch_{batch_size}', 'GraphCodeBERT 모델 없음')
+            self.skip('embed.single', 'GraphCodeBERT 모델 없음')
+            return
+        self.run('embed.single', lambda: [codebert_model.get_code_embedding(text) for text in texts],
+                 items=len(texts))
+        for batch_size in self.args.batch_sizes:
+            self.run(f'embed.batch_{batch_size}',
+                     lambda: codebert_model.get_code_embeddings(texts, batch_size=batch_size),
+                     items=len(texts))
+
+    def bench_vector_store(self):
+        chunk_count = sum(len(chunks) for _, chunks in self.repo_chunks)
+        queries = self.chunk_texts[:self.args.query_items]
+        filters = [{'language': 'python', 'exclude_path': 'python/pkg0/inventory_0.py'} for _ in queries]
+
+        for backend in self.args.backends:
+            counter = iter(range(1_000_000))
+
+            def new_processor():
+                processor = CodeEmbeddingProcessor(
+                    persist_directory=str(self.work_dir / f'index-{backend}-{next(counter)}'), backend=backend
+                )
+                # 캐시 적중으로 임베딩 시간이 빠지지 않도록 캐시 없이 측정
+                processor.embeddings = GraphCodeBERTEmbeddings(use_cache=False)
+                return processor
+
+            def insert(processor):
+                for rel_path, chunks in self.repo_chunks:
+                    processor.store_file_chunks(rel_path, chunks)
+                processor.flush()
+
+            try:
+                self.run(f'store.insert.{backend}', insert, setup=new_processor, items=chunk_count)
+                processor = new_processor()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    insert(processor)
+                self.run(f'store.query.{backend}',
+                         lambda: processor.query_similar_code_batch(queries, filters=filters), items=len(queries))
+            except Exception as e:
+                self.skip(f'store.{backend}', str(e))
+
+    def bench_review(self):
+        review_queries = [
+            (commit['new_path'], commit['diff'], [self.chunk_texts[:3]])
+            for commit in self.commits
+        ]
+        llm = make_fake_llm()
+        # LLM 캐시 없이 프롬프트 구성 + 체인 실행 오버헤드만 측정
+        self.run('review.get_code_review', lambda: get_code_review(review_queries, llm, cache=False),
+                 items=len(review_queries))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='리뷰 파이프라인 오프라인 벤치마크')
+    parser.add_argument('--output', '-o', help='결과 JSON 경로 (없으면 stdout)')
+    parser.add_argument('--scale', type=int, default=8, help='언어별 샘플 파일 복제 수')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--embeddings', choices=['model', 'fake'], default='model')
+    parser.add_argument('--batch-sizes', type=lambda value: [int(v) for v in value.split(',')],
+                        default=[1, 8, 16, 32])
+    parser.add_argument('--embed-items', type=int, default=64, help='임베딩 처리량 측정 청크 수')
+    parser.add_argument('--query-items', type=int, default=16, help='검색 측정 질의 수')
+    parser.add_argument('--backends', type=lambda value: value.split(','), default=['local', 'chroma'])
+    parser.add_argument('--only', type=lambda value: value.split(','), default=None,
+                        help='이름이 이 접두어로 시작하는 항목만 실행 (예: chunk,diff)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix='review-bench-') as work_dir:
+        runner = BenchmarkRunner(args, work_dir)
+        runner.prepare()
+        runner.setup_embeddings()
+        runner.bench_clone()
+        runner.bench_fetch()
+        runner.bench_chunkers()
+        runner.bench_diff()
+        runner.bench_embeddings()
+        runner.bench_vector_store()
+        runner.bench_review()
+
+    report = {
+        'version': RESULT_VERSION,
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'embeddings': runner.embeddings_mode,
+            'options': {key: value for key, value in vars(args).items() if key != 'output'},
+        },
+        'results': runner.results,
+        'skipped': runner.skipped,
+    }
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(payload, encoding='utf-8')
+        print(f"결과 저장: {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+package com.example.order;
+
+import java.math.BigDecimal;
+import java.util.ArrayList;
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+import java.util.Optional;
+
+/**
+ * 주문 처리 서비스 (벤치마크용 샘플)
+ */
+public class OrderService {
+    private final Map<Long, Order> orders = new HashMap<>();
+    private final PaymentGateway paymentGateway;
+    private long sequence = 0;
+
+    public OrderService(PaymentGateway paymentGateway) {
+        this.paymentGateway = paymentGateway;
+    }
+
+    public Order createOrder(String customerId, List<OrderLine> lines) {
+        if (lines == null || lines.isEmpty()) {
+            throw new IllegalArgumentException("order must have at least one line");
+        }
+        Order order = new Order(++sequence, customerId, new ArrayList<>(lines));
+        orders.put(order.getId(), order);
+        return order;
+    }
+
+    public Optional<Order> findOrder(long id) {
+        return Optional.ofNullable(orders.get(id));
+    }
+
+    public BigDecimal calculateTotal(Order order) {
+        BigDecimal total = BigDecimal.ZERO;
+        for (OrderLine line : order.getLines()) {
+            total = total.add(line.getPrice().multiply(BigDecimal.valueOf(line.getQuantity())));
+        }
+        return total;
+    }
+
+    public boolean pay(long orderId, String cardToken) {
+        Order order = orders.get(orderId);
+        if (order == null || order.isPaid()) {
+            return false;
+        }
+        BigDecimal amount = calculateTotal(order);
+        boolean approved = paymentGateway.charge(cardToken, amount);
+        if (approved) {
+            order.markPaid();
+        }
+        return approved;
+    }
+
+    public void cancel(long orderId) {
+        Order order = orders.get(orderId);
+        if (order == null) {
+            throw new IllegalStateException("order not found: " + orderId);
+        }
+        if (order.isPaid()) {
+            paymentGateway.refund(orderId, calculateTotal(order));
+        }
+        orders.remove(orderId);
+    }
+
+    public List<Order> ordersOf(String customerId) {
+        List<Order> result = new ArrayList<>();
+        for (Order order : orders.values()) {
+            if (order.getCustomerId().equals(customerId)) {
+                result.add(order);
+            }
+        }
+        return result;
+    }
+
+    public interface PaymentGateway {
+        boolean charge(String cardToken, BigDecimal amount);
+
+        void refund(long orderId, BigDecimal amount);
+    }
+
+    public static class OrderLine {
+        private final String sku;
+        private final BigDecimal price;
+        private final int quantity;
+
+        public OrderLine(String sku, BigDecimal price, int quantity) {
+            this.sku = sku;
+            this.price = price;
+            this.quantity = quantity;
+        }
+
+        public String getSku() {
+            return sku;
+        }
+
+        public BigDecimal getPrice() {
+            return price;
+        }
+
+        public int getQuantity() {
+            return quantity;
+        }
+    }
+
+    public static class Order {
+        private final long id;
+        private final String customerId;
+        private final List<OrderLine> lines;
+        private boolean paid;
+
+        public Order(long id, String customerId, List<OrderLine> lines) {
+            this.id = id;
+            this.customerId = customerId;
+            this.lines = lines;
+        }
+
+        public long getId() {
+            return id;
+        }
+
+        public String getCustomerId() {
+            return customerId;
+        }
+
+        public List<OrderLine> getLines() {
+            return lines;
+        }
+
+        public boolean isPaid() {
+            return paid;
+        }
+
+        public void markPaid() {
+            this.paid = true;
+        }
+    }
+}
@@ -0,0 +1,94 @@
+// 장바구니 상태 관리 예제 (벤치마크용 샘플)
+const TAX_RATE = 0.1;
+
+export class Cart {
+  constructor(storage) {
+    this.storage = storage;
+    this.items = new Map();
+  }
+
+  add(product, quantity = 1) {
+    const current = this.items.get(product.id);
+    if (current) {
+      current.quantity += quantity;
+    } else {
+      this.items.set(product.id, { ...product, quantity });
+    }
+    this.persist();
+  }
+
+  remove(productId) {
+    this.items.delete(productId);
+    this.persist();
+  }
+
+  updateQuantity(productId, quantity) {
+    const item = this.items.get(productId);
+    if (!item) {
+      throw new Error(`unknown product ${productId}`);
+    }
+    if (quantity <= 0) {
+      this.remove(productId);
+      return;
+    }
+    item.quantity = quantity;
+    this.persist();
+  }
+
+  subtotal() {
+    let total = 0;
+    for (const item of this.items.values()) {
+      total += item.price * item.quantity;
+    }
+    return total;
+  }
+
+  total() {
+    const subtotal = this.subtotal();
+    return Math.round((subtotal + subtotal * TAX_RATE) * 100) / 100;
+  }
+
+  persist() {
+    const payload = JSON.stringify([...this.items.values()]);
+    this.storage.setItem('cart', payload);
+  }
+
+  static restore(storage) {
+    const cart = new Cart(storage);
+    const payload = storage.getItem('cart');
+    if (payload) {
+      for (const item of JSON.parse(payload)) {
+        cart.items.set(item.id, item);
+      }
+    }
+    return cart;
+  }
+}
+
+export function formatPrice(value, currency = 'KRW') {
+  return new Intl.NumberFormat('ko-KR', { style: 'currency', currency }).format(value);
+}
+
+export const groupByCategory = (items) => {
+  const groups = {};
+  for (const item of items) {
+    (groups[item.category] = groups[item.category] || []).push(item);
+  }
+  return groups;
+};
+
+export async function checkout(cart, api) {
+  if (cart.items.size === 0) {
+    throw new Error('cart is empty');
+  }
+  const response = await api.post('/orders', {
+    items: [...cart.items.values()].map(({ id, quantity }) => ({ id, quantity })),
+    total: cart.total(),
+  });
+  if (response.status !== 201) {
+    throw new Error(`checkout failed: ${response.status}`);
+  }
+  cart.items.clear();
+  cart.persist();
+  return response.data;
+}
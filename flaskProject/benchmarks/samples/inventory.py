@@ -0,0 +1,104 @@
+"""재고 관리 예제 (벤치마크용 샘플)"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Item:
+    sku: str
+    name: str
+    price: float
+    quantity: int = 0
+    tags: List[str] = field(default_factory=list)
+
+    def total_value(self) -> float:
+        return self.price * self.quantity
+
+    def is_low_stock(self, threshold: int = 5) -> bool:
+        return self.quantity < threshold
+
+
+class Inventory:
+    def __init__(self):
+        self.items: Dict[str, Item] = {}
+        self.history: List[dict] = []
+
+    def add_item(self, item: Item) -> None:
+        if item.sku in self.items:
+            raise ValueError(f"duplicate sku: {item.sku}")
+        self.items[item.sku] = item
+        self._log('add', item.sku, item.quantity)
+
+    def remove_item(self, sku: str) -> Optional[Item]:
+        item = self.items.pop(sku, None)
+        if item is not None:
+            self._log('remove', sku, item.quantity)
+        return item
+
+    def restock(self, sku: str, amount: int) -> int:
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        item = self.items[sku]
+        item.quantity += amount
+        self._log('restock', sku, amount)
+        return item.quantity
+
+    def sell(self, sku: str, amount: int) -> float:
+        item = self.items[sku]
+        if item.quantity < amount:
+            raise RuntimeError(f"not enough stock for {sku}")
+        item.quantity -= amount
+        self._log('sell', sku, amount)
+        return item.price * amount
+
+    def low_stock(self, threshold: int = 5) -> List[Item]:
+        return [item for item in self.items.values() if item.is_low_stock(threshold)]
+
+    def search(self, keyword: str) -> List[Item]:
+        keyword = keyword.lower()
+        results = []
+        for item in self.items.values():
+            if keyword in item.name.lower() or any(keyword in tag for tag in item.tags):
+                results.append(item)
+        return sorted(results, key=lambda item: item.name)
+
+    def total_value(self) -> float:
+        return sum(item.total_value() for item in self.items.values())
+
+    def _log(self, action: str, sku: str, amount: int) -> None:
+        self.history.append({'action': action, 'sku': sku, 'amount': amount})
+
+    def to_json(self) -> str:
+        return json.dumps({
+            sku: {'name': item.name, 'price': item.price, 'quantity': item.quantity, 'tags': item.tags}
+            for sku, item in self.items.items()
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, payload: str) -> 'Inventory':
+        inventory = cls()
+        for sku, data in json.loads(payload).items():
+            inventory.add_item(Item(sku, data['name'], data['price'], data['quantity'], data['tags']))
+        return inventory
+
+
+def summarize(inventory: Inventory) -> Dict[str, float]:
+    prices = [item.price for item in inventory.items.values()]
+    if not prices:
+        return {'count': 0, 'min': 0.0, 'max': 0.0, 'avg': 0.0}
+    return {
+        'count': len(prices),
+        'min': min(prices),
+        'max': max(prices),
+        'avg': sum(prices) / len(prices),
+    }
+
+
+def apply_discount(inventory: Inventory, tag: str, rate: float) -> int:
+    changed = 0
+    for item in inventory.items.values():
+        if tag in item.tags:
+            item.price = round(item.price * (1 - rate), 2)
+            changed += 1
+    return changed
@@ -0,0 +1,97 @@
+/* 고정 크기 링 버퍼 예제 (벤치마크용 샘플) */
+#include <stdlib.h>
+#include <string.h>
+
+typedef struct {
+    unsigned char *data;
+    size_t capacity;
+    size_t head;
+    size_t tail;
+    size_t size;
+} ring_buffer;
+
+struct stats {
+    size_t writes;
+    size_t reads;
+    size_t overflows;
+};
+
+static struct stats global_stats;
+
+ring_buffer *rb_create(size_t capacity)
+{
+    ring_buffer *rb = malloc(sizeof(ring_buffer));
+    if (rb == NULL) {
+        return NULL;
+    }
+    rb->data = malloc(capacity);
+    if (rb->data == NULL) {
+        free(rb);
+        return NULL;
+    }
+    rb->capacity = capacity;
+    rb->head = 0;
+    rb->tail = 0;
+    rb->size = 0;
+    return rb;
+}
+
+void rb_destroy(ring_buffer *rb)
+{
+    if (rb != NULL) {
+        free(rb->data);
+        free(rb);
+    }
+}
+
+size_t rb_write(ring_buffer *rb, const unsigned char *src, size_t len)
+{
+    size_t written = 0;
+    while (written < len) {
+        if (rb->size == rb->capacity) {
+            global_stats.overflows++;
+            break;
+        }
+        rb->data[rb->head] = src[written++];
+        rb->head = (rb->head + 1) % rb->capacity;
+        rb->size++;
+    }
+    global_stats.writes += written;
+    return written;
+}
+
+size_t rb_read(ring_buffer *rb, unsigned char *dst, size_t len)
+{
+    size_t read = 0;
+    while (read < len && rb->size > 0) {
+        dst[read++] = rb->data[rb->tail];
+        rb->tail = (rb->tail + 1) % rb->capacity;
+        rb->size--;
+    }
+    global_stats.reads += read;
+    return read;
+}
+
+size_t rb_peek(const ring_buffer *rb, unsigned char *dst, size_t len)
+{
+    size_t count = len < rb->size ? len : rb->size;
+    size_t index = rb->tail;
+    for (size_t i = 0; i < count; i++) {
+        dst[i] = rb->data[index];
+        index = (index + 1) % rb->capacity;
+    }
+    return count;
+}
+
+void rb_clear(ring_buffer *rb)
+{
+    rb->head = 0;
+    rb->tail = 0;
+    rb->size = 0;
+    memset(rb->data, 0, rb->capacity);
+}
+
+struct stats rb_stats(void)
+{
+    return global_stats;
+}
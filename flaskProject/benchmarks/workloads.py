@@ -0,0 +1,106 @@
+# workloads.py
+"""
+벤치마크 입력 생성
+samples/ 의 언어별 예제 파일을 식별자만 바꿔 복제해 임의 크기의 샘플 저장소와 diff 를 만듦
+(같은 --scale 이면 항상 같은 입력)
+"""
+import difflib
+import random
+import re
+import subprocess
+from pathlib import Path
+
+SAMPLES_DIR = Path(__file__).parent / 'samples'
+
+# 언어 → (샘플 파일, 저장소 내 확장자)
+SAMPLES = {
+    'python': ('inventory.py', '.py'),
+    'java': ('OrderService.java', '.java'),
+    'javascript': ('cart.js', '.js'),
+    'c': ('ring_buffer.c', '.c'),
+}
+
+# 복제본마다 이름을 바꿔 청크 내용이 서로 다르게 함
+RENAMED_IDENTIFIERS = re.compile(r'\b(quantity|price|total|size|item|order|amount|capacity|data)\b')
+
+COMMENT_PREFIX = {'python': '#', 'java': '//', 'javascript': '//', 'c': '//'}
+
+
+def load_sample(language):
+    file_name, _ = SAMPLES[language]
+    return (SAMPLES_DIR / file_name).read_text(encoding='utf-8')
+
+
+def variant(source, index):
+    if index == 0:
+        return source
+    return RENAMED_IDENTIFIERS.sub(lambda match: f'{match.group(1)}{index}', source)
+
+
+def build_sample_repo(root, copies, init_git=False):
+    """언어별 샘플을 copies 개씩 복제한 저장소 생성, (상대 경로, 언어) 목록 반환"""
+    root = Path(root)
+    files = []
+    for language, (file_name, extension) in SAMPLES.items():
+        source = load_sample(language)
+        stem = Path(file_name).stem
+        for index in range(copies):
+            rel_path = f'{language}/pkg{index % 8}/{stem}_{index}{extension}'
+            file_path = root / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(variant(source, index), encoding='utf-8')
+            files.append((rel_path, language))
+
+    if init_git:
+        git = ['git', '-C', str(root), '-c', 'user.name=bench', '-c', 'user.email=bench@localhost']
+        subprocess.run(git[:3] + ['init', '-q', '-b', 'main'], check=True)
+        subprocess.run(git + ['add', '-A'], check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'sample'], check=True)
+    return files
+
+
+def make_bare_clone(repo_path, bare_path):
+    subprocess.run(['git', 'clone', '-q', '--bare', str(repo_path), str(bare_path)], check=True)
+    return str(bare_path)
+
+
+def mutate(source, language, rng, edits=4):
+    """라인 수정/추가/삭제를 섞은 새 버전"""
+    lines = source.split('\n')
+    comment = COMMENT_PREFIX[language]
+    for _ in range(edits):
+        position = rng.randrange(1, len(lines) - 1)
+        action = rng.random()
+        if action < 0.4:
+            lines[position] = lines[position] + f' {comment} changed'
+        elif action < 0.8:
+            indent = re.match(r'\s*', lines[position]).group(0)
+            lines.insert(position, f'{indent}{comment} added line {rng.randrange(1000)}')
+        else:
+            del lines[position]
+    return '\n'.join(lines)
+
+
+def synthetic_diff(old, new):
+    """GitLab commits[].diff 형식 (파일 헤더 없이 hunk 부터)"""
+    lines = difflib.unified_diff(old.split('\n'), new.split('\n'), lineterm='', n=3)
+    return '\n'.join(line for line in lines if not line.startswith(('---', '+++')))
+
+
+def build_commits(copies, seed=0, edits=4):
+    """리뷰 요청의 commits 와 같은 형식의 diff 목록"""
+    rng = random.Random(seed)
+    commits = []
+    for language, (file_name, extension) in SAMPLES.items():
+        source = load_sample(language)
+        stem = Path(file_name).stem
+        for index in range(copies):
+            old = variant(source, index)
+            new = mutate(old, language, rng, edits)
+            commits.append({
+                'new_path': f'{language}/pkg{index % 8}/{stem}_{index}{extension}',
+                'diff': synthetic_diff(old, new),
+                'language': language,
+                'new_source': new,
+            })
+    return commits
@@ -0,0 +1,18 @@
+# conftest.py
+"""
+테스트 공통 설정
+- flaskProject 를 import 경로에 추가
+- 캐시/인덱스 경로를 임시 디렉토리로 바꾼 뒤 app 을 import (모듈 로드 시 환경 변수를 읽음)
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_work_dir = tempfile.mkdtemp(prefix='edith-test-')
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(_work_dir, 'embeddings.sqlite3'))
+os.environ.setdefault('REVIEW_CACHE_ENABLED', 'false')
+os.environ.setdefault('VECTOR_INDEX_PATH', os.path.join(_work_dir, 'vectorIndex'))
+os.environ.setdefault('GITLAB_BLOB_CACHE_PATH', os.path.join(_work_dir, 'blobCache'))
@@ -0,0 +1,48 @@
+from app.chunking import JavaScript_Chunking
+from app.chunking.GetCode import GitLabCodeChunker
+from app.chunking.records import CodeChunk
+from app.chunking.registry import get_chunker
+
+
+def js_chunks(source):
+    return [(chunk.kind, chunk.name, chunk.text) for chunk in JavaScript_Chunking.iter_chunks(source, 'app.js')]
+
+
+def test_javascript_function_expressions_are_chunked():
+    chunks = js_chunks(b'var a = function() { return 1; };\nfunction b() {}\n')
+
+    assert chunks == [
+        ('function_expression', 'a', 'function() { return 1; }'),
+        ('function_declaration', 'b', 'function b() {}'),
+    ]
+
+
+def test_javascript_iife_chunks_skip_function_keyword_tokens():
+    chunks = js_chunks(b'(function(){ var f = () => 2; (function(){ g(); })(); })();')
+
+    assert [kind for kind, _, _ in chunks] == ['function_expression', 'arrow_function', 'function_expression']
+    assert all(text != 'function' for _, _, text in chunks)
+
+
+def test_every_language_chunks_into_code_chunk_records():
+    sources = {
+        'python': b'def f(x):\n    return x\n',
+        'java': b'class A { int f(int x) { return x; } }\n',
+        'javascript': b'function f(x) { return x; }\n',
+        'c': b'int f(int x) { return x; }\n',
+        'cpp': b'int f(int x) { return x; }\n',
+    }
+    for language, source in sources.items():
+        chunks = list(get_chunker(language)(source, 'src/file'))
+        assert [type(chunk) for chunk in chunks] == [CodeChunk], language
+        assert chunks[0].language == language
+        assert 'return x' in chunks[0].text
+
+
+def test_chunk_code_returns_records_for_c():
+    chunker = GitLabCodeChunker.__new__(GitLabCodeChunker)
+
+    chunks = chunker.chunk_code('int f(int x) {\n    return x;\n}\n', 'c', 'src/f.c')
+
+    assert [(chunk.kind, chunk.name, chunk.path) for chunk in chunks] == [('function_definition', 'f', 'src/f.c')]
+    assert chunks[0].text == 'int f(int x) {\n    return x;\n}'
@@ -0,0 +1,86 @@
+import subprocess
+import threading
+import time
+
+import pytest
+
+from app.chunking.GetCode import GitLabCodeChunker
+from benchmarks.fakes import FakeGitLab
+
+BRANCHES = [f'feature-{i}' for i in range(5)]
+
+
+def git(*args, cwd):
+    subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def bare_repo(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    git('init', '-q', '-b', 'main', cwd=source)
+    git('config', 'user.email', 'test@example.com', cwd=source)
+    git('config', 'user.name', 'test', cwd=source)
+    (source / 'main.py').write_text('BRANCH = "main"\n')
+    git('add', '.', cwd=source)
+    git('commit', '-q', '-m', 'init', cwd=source)
+    for branch in BRANCHES:
+        git('checkout', '-q', '-b', branch, 'main', cwd=source)
+        (source / 'main.py').write_text(f'BRANCH = "{branch}"\n')
+        git('commit', '-q', '-am', branch, cwd=source)
+    bare = tmp_path / 'sample.git'
+    git('clone', '-q', '--bare', str(source), str(bare), cwd=tmp_path)
+    return bare
+
+
+def make_chunker(tmp_path, bare_repo, branch):
+    chunker = GitLabCodeChunker('http://gitlab.invalid', 'token', '1', str(tmp_path / 'clone'), branch,
+                                mirror_path=str(tmp_path / 'mirror'))
+    chunker.gl = FakeGitLab(bare_repo)
+    return chunker
+
+
+def run_threads(target, args_list):
+    errors = []
+
+    def run(*args):
+        try:
+            target(*args)
+        except Exception as e:  # 스레드 예외를 테스트 실패로 전달
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=args) for args in args_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_branches_of_one_project_clone_concurrently(tmp_path, bare_repo):
+    def clone(branch):
+        chunker = make_chunker(tmp_path, bare_repo, branch)
+        with chunker.worktree_lock():
+            project_path = chunker.clone_project()
+            assert project_path, branch
+            assert (tmp_path / 'clone' / branch / 'sample' / 'main.py').read_text() == f'BRANCH = "{branch}"\n'
+        chunker.cleanup_project_directory()
+
+    # 미러가 없는 상태(init 경쟁)와 있는 상태(fetch 경쟁) 모두
+    for _ in range(2):
+        run_threads(clone, [(branch,) for branch in BRANCHES])
+
+
+def test_same_branch_worktree_is_not_reset_while_in_use(tmp_path, bare_repo):
+    def review(name):
+        chunker = make_chunker(tmp_path, bare_repo, 'feature-0')
+        with chunker.worktree_lock():
+            project_path = chunker.clone_project()
+            assert project_path
+            # 인덱싱/검색 중인 워크트리를 다른 리뷰가 checkout --force / clean -fdx 하지 않음
+            scratch = tmp_path / 'clone' / 'feature-0' / 'sample' / f'{name}.tmp'
+            scratch.write_text(name)
+            time.sleep(0.2)
+            assert scratch.read_text() == name
+
+    run_threads(review, [(f'review-{i}',) for i in range(3)])
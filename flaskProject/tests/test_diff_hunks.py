@@ -0,0 +1,108 @@
+from app.chunking.GetCode import GitLabCodeChunker
+from app.chunking.diff_hunks import affected_chunks, hunk_text, parse_hunks
+from app.chunking.registry import get_chunker
+from app.reviewers import get_review_query_texts
+
+SOURCE = '''import os
+
+def outer(x):
+    def inner(y):
+        return y * 2
+    return inner(x)
+
+
+def other():
+    a = 1
+    b = 2
+    return a + b
+'''
+
+
+def python_chunks(source=SOURCE):
+    return list(get_chunker('python')(source, 'pkg/mod.py'))
+
+
+def make_chunker():
+    # 청크화 메서드만 사용 (GitLab 연결 없음)
+    return GitLabCodeChunker.__new__(GitLabCodeChunker)
+
+
+def test_parse_hunks_tracks_line_numbers_across_hunks():
+    diff = ("diff --git a/f.py b/f.py\n"
+            "@@ -1,3 +1,3 @@\n"
+            " a\n"
+            "-b\n"
+            "+B\n"
+            " c\n"
+            "@@ -10 +10,2 @@\n"
+            " j\n"
+            "+k\n"
+            "\\ No newline at end of file\n")
+
+    first, second = parse_hunks(diff)
+
+    assert (first.old_start, first.old_count, first.new_start, first.new_count) == (1, 3, 1, 3)
+    assert first.removed_lines == [(2, 'b')]
+    assert first.added_lines == [(2, 'B')]
+    # 삭제 직후 추가는 교체이므로 삭제 위치로 기록하지 않음
+    assert first.deletion_gaps == []
+    assert (second.old_start, second.old_count, second.new_count) == (10, 1, 2)
+    assert second.added_lines == [(11, 'k')]
+
+
+def test_parse_hunks_records_pure_deletion_position():
+    diff = "@@ -5,4 +5,2 @@\n e\n-f\n-g\n h\n"
+
+    hunk, = parse_hunks(diff)
+
+    assert hunk.removed_lines == [(6, 'f'), (7, 'g')]
+    assert hunk.added_lines == []
+    # 새 파일 기준 5번째 라인과 6번째 라인 사이에서 삭제됨
+    assert hunk.deletion_gaps == [(5, 6)]
+    assert hunk_text(hunk) == 'f\ng'
+
+
+def test_affected_chunks_maps_changes_to_innermost_chunk():
+    # inner 본문 수정 + 모듈 수준 import 수정
+    diff = ("@@ -1 +1 @@\n-import sys\n+import os\n"
+            "@@ -5 +5 @@\n-        return y\n+        return y * 2\n")
+
+    functions, orphans = affected_chunks(python_chunks(), parse_hunks(diff))
+
+    assert [chunk.name for chunk in functions] == ['inner']
+    assert [hunk_text(hunk) for hunk in orphans] == ['import os']
+
+
+def test_affected_chunks_maps_pure_deletion_to_spanning_function():
+    # other() 안에서 'c = 3' 라인 삭제 (새 파일 11~12 라인 사이)
+    diff = "@@ -11,3 +11,2 @@\n     b = 2\n-    c = 3\n     return a + b\n"
+
+    functions, orphans = affected_chunks(python_chunks(), parse_hunks(diff))
+
+    assert [chunk.name for chunk in functions] == ['other']
+    assert orphans == []
+
+
+def test_query_texts_for_changed_file_use_enclosing_functions(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'mod.py').write_text(SOURCE)
+    commit = {'new_path': 'pkg/mod.py', 'diff': "@@ -12 +12 @@\n-    return a - b\n+    return a + b\n"}
+
+    texts = get_review_query_texts(make_chunker(), tmp_path, commit, 'python')
+
+    assert texts == ['def other():\n    a = 1\n    b = 2\n    return a + b']
+
+
+def test_query_texts_for_deleted_c_file_are_function_code(tmp_path):
+    commit = {'new_path': 'src/calc.c', 'deleted_file': True,
+              'diff': "@@ -1,4 +0,0 @@\n-#include <stdio.h>\n-int f(int x) {\n-    return x + 1;\n-}\n"}
+
+    texts = get_review_query_texts(make_chunker(), tmp_path, commit, 'c')
+
+    assert texts == ['int f(int x) {\n    return x + 1;\n}']
+
+
+def test_query_texts_for_deleted_file_without_functions_fall_back_to_hunks(tmp_path):
+    commit = {'new_path': 'conf.py', 'deleted_file': True, 'diff': "@@ -1,2 +0,0 @@\n-A = 1\n-B = 2\n"}
+
+    assert get_review_query_texts(make_chunker(), tmp_path, commit, 'python') == ['A = 1\nB = 2']
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import stat
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app import embeddings
+from app.embedding_cache import EmbeddingCache
+from app.embedding_server import EmbeddingClient, EmbeddingServer, MicroBatcher
+from app.embeddings import GraphCodeBERTEmbeddings
+from app.models.codebert_model import embedding_model_id
+from benchmarks.fakes import hash_embeddings
+
+AUTHKEY = b'test-key'
+
+
+@pytest.fixture
+def server(tmp_path):
+    address = str(tmp_path / 'run' / 'embedding.sock')
+    server = EmbeddingServer(address, AUTHKEY, MicroBatcher(hash_embeddings, max_wait=0.01))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    deadline = time.time() + 5
+    while not os.path.exists(address) and time.time() < deadline:
+        time.sleep(0.01)
+    yield server
+    server.close()
+
+
+def test_server_requires_authkey(tmp_path):
+    with pytest.raises(ValueError):
+        EmbeddingServer(str(tmp_path / 'embedding.sock'), None)
+
+
+def test_socket_is_private_to_owner(server):
+    assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(server.address)).st_mode) == 0o700
+
+
+def test_client_embeds_through_server(server):
+    client = EmbeddingClient(server.address, AUTHKEY)
+    texts = ['def a(): pass', 'def b(): pass']
+    vectors = client.embed(texts)
+    assert all(np.allclose(vector, expected) for vector, expected in zip(vectors, hash_embeddings(texts)))
+
+
+def test_client_with_wrong_authkey_is_rejected(server):
+    client = EmbeddingClient(server.address, b'wrong-key')
+    with pytest.raises(multiprocessing.AuthenticationError):
+        client.embed(['def a(): pass'])
+    # 거부된 연결 이후에도 서버는 계속 요청을 받음
+    assert len(EmbeddingClient(server.address, AUTHKEY).embed(['def a(): pass'])) == 1
+
+
+class FakeClient:
+    def __init__(self, model_id='server-model', fail_embed=False):
+        self._model_id = model_id
+        self.fail_embed = fail_embed
+        self.model_id_calls = 0
+
+    def model_id(self):
+        self.model_id_calls += 1
+        return self._model_id
+
+    def embed(self, texts):
+        if self.fail_embed:
+            raise ConnectionError('server down')
+        return hash_embeddings(texts)
+
+
+def test_server_model_id_is_resolved_once_per_process(tmp_path):
+    client = FakeClient()
+    cache = EmbeddingCache(tmp_path / 'cache.sqlite3')
+    for _ in range(3):
+        assert GraphCodeBERTEmbeddings(cache=cache, client=client).model_id == 'server-model'
+    assert client.model_id_calls == 1
+
+
+def test_fallback_vectors_are_cached_under_local_model_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(embeddings, 'get_code_embeddings', hash_embeddings)
+    cache = EmbeddingCache(tmp_path / 'cache.sqlite3')
+    client = FakeClient(model_id='fallback-test-model', fail_embed=True)
+    GraphCodeBERTEmbeddings(cache=cache, client=client).embed_documents(['def a(): pass'])
+
+    assert cache.get_many(['def a(): pass'], model_id='fallback-test-model') == [None]
+    assert cache.get_many(['def a(): pass'], model_id=embedding_model_id())[0] is not None
@@ -0,0 +1,63 @@
+import pytest
+
+from app import embeddings
+from app.embeddings import CodeEmbeddingProcessor
+from benchmarks.fakes import hash_embeddings
+
+HELPER = 'def helper():\n    return 1'
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(embeddings, 'get_code_embeddings', hash_embeddings)
+    processor = CodeEmbeddingProcessor(backend='local')
+    calls = []
+    query = processor.store.query
+
+    def counting_query(query_embeddings, n_results=5, where=None):
+        calls.append(where)
+        return query(query_embeddings, n_results, where)
+
+    processor.store.query = counting_query
+    processor.query_calls = calls
+    return processor
+
+
+def store(processor, path, texts, language='python'):
+    processor.store_embeddings(texts, metadatas=[{'path': path, 'language': language} for _ in texts],
+                               ids=[embeddings.chunk_id(path, text) for text in texts])
+
+
+def test_batch_query_excludes_own_file_and_dedups_by_content(processor):
+    # 같은 보일러플레이트가 여러 파일에 있는 경우
+    for path in ('a.py', 'b.py', 'c.py'):
+        store(processor, path, [HELPER, f'def only_{path[0]}():\n    return "{path}"'])
+    store(processor, 'Main.java', [HELPER], language='java')
+
+    queries = [HELPER, 'def only_a():\n    return "a.py"', HELPER]
+    filters = [{'language': 'python', 'exclude_path': 'a.py'},
+               {'language': 'python', 'exclude_path': 'a.py'},
+               {'language': 'python', 'exclude_path': 'b.py'}]
+    results = processor.query_similar_code_batch(queries, n_results=5, filters=filters)
+
+    # 파일마다 exclude_path 가 달라도 언어별로 한 번만 검색
+    assert processor.query_calls == [{'language': 'python'}]
+    # 각 쿼리 결과에는 리뷰 중인 파일 자신의 코드가 없음
+    assert 'def only_a():\n    return "a.py"' not in results[0] + results[1]
+    assert 'def only_b():\n    return "b.py"' not in results[2]
+    # 같은 내용은 여러 파일/쿼리에 걸려도 한 번만 (가장 가까운 쿼리에)
+    documents = [document for related in results for document in related]
+    assert documents.count(HELPER) == 1
+    assert len(documents) == len(set(documents))
+
+
+def test_query_refetches_when_own_file_fills_the_results(processor):
+    store(processor, 'big.py', [f'def f{i}():\n    return {i}' for i in range(40)])
+    store(processor, 'other.py', ['def other():\n    return 0'])
+
+    results = processor.query_similar_code_batch(
+        ['def f1():\n    return 1'], n_results=2, filters=[{'language': 'python', 'exclude_path': 'big.py'}])
+
+    assert results == [['def other():\n    return 0']]
+    assert processor.query_calls == [{'language': 'python'},
+                                     {'$and': [{'language': 'python'}, {'path': {'$ne': 'big.py'}}]}]
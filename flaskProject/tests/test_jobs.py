@@ -0,0 +1,73 @@
+import threading
+import time
+
+from app import jobs
+from app.jobs import DONE, JobQueue, check_callback_url
+
+
+def wait_for(pending, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(job.finished_at is not None for job in pending):
+            return
+        time.sleep(0.01)
+    raise AssertionError('작업이 끝나지 않음')
+
+
+def test_jobs_for_same_project_branch_run_one_at_a_time():
+    lock = threading.Lock()
+    active = {}
+    max_active = {}
+
+    def run_review(url, token, project_id, branch, commits):
+        key = (project_id, branch)
+        with lock:
+            active[key] = active.get(key, 0) + 1
+            max_active[key] = max(max_active.get(key, 0), active[key])
+        time.sleep(0.05)
+        with lock:
+            active[key] -= 1
+        return f'review {commits}'
+
+    queue = JobQueue(run_review, max_workers=4)
+    jobs = [queue.submit('url', 'token', '1', 'main', [i])[0] for i in range(3)]
+    jobs.append(queue.submit('url', 'token', '1', 'dev', [0])[0])
+    wait_for(jobs)
+
+    assert [job.state for job in jobs] == [DONE] * 4
+    assert max_active == {('1', 'main'): 1, ('1', 'dev'): 1}
+    # 대기열에 들어간 작업은 제출 순서대로 실행
+    main_jobs = jobs[:3]
+    assert [job.finished_at for job in main_jobs] == sorted(job.finished_at for job in main_jobs)
+
+
+def test_failed_job_does_not_block_next_job():
+    def run_review(url, token, project_id, branch, commits):
+        if commits == ['bad']:
+            raise RuntimeError('boom')
+        return 'ok'
+
+    queue = JobQueue(run_review, max_workers=2)
+    failed, _ = queue.submit('url', 'token', '1', 'main', ['bad'])
+    ok, _ = queue.submit('url', 'token', '1', 'main', ['good'])
+    wait_for([failed, ok])
+
+    assert failed.error == 'boom'
+    assert ok.state == DONE
+
+
+def test_callback_url_rejects_internal_and_non_http_targets():
+    for url in ('file:///etc/passwd', 'ftp://example.com/hook', 'http://127.0.0.1:8080/hook',
+                'http://169.254.169.254/latest/meta-data', 'http://10.0.0.5/hook', 'http://[::1]/hook',
+                'http://[::ffff:192.168.0.1]/hook', 'http://localhost/hook'):
+        assert check_callback_url(url), url
+    assert check_callback_url('https://93.184.216.34/hook') is None
+
+
+def test_callback_url_allowlist(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_CALLBACK_ALLOWED_HOSTS', ('backend.internal', '.example.com'))
+
+    assert check_callback_url('http://backend.internal/hook') is None
+    assert check_callback_url('https://api.example.com/hook') is None
+    assert check_callback_url('https://93.184.216.34/hook')
+    assert check_callback_url('https://evil-example.com/hook')
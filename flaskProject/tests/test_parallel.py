@@ -0,0 +1,67 @@
+import os
+import signal
+
+import pytest
+
+from app.chunking import parallel
+from app.chunking.parallel import chunk_files_parallel
+
+
+@pytest.fixture
+def tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, 'PARALLEL_MIN_FILES', 2)
+    tasks = []
+    for i in range(12):
+        file_path = tmp_path / f'm{i}.py'
+        file_path.write_text(f'def f{i}():\n    return {i}\n')
+        tasks.append((f'm{i}.py', str(file_path), 'python'))
+    yield tasks
+    with parallel._pool_lock:
+        pool, parallel._pool = parallel._pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def chunk_names(results):
+    return sorted((path, [chunk.name for chunk in chunks]) for path, _, chunks in results)
+
+
+def expected(tasks):
+    return sorted((path, [f'f{path[1:-3]}']) for path, _, _ in tasks)
+
+
+def kill_workers(pool):
+    for process in list(pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+
+
+def test_broken_pool_is_replaced_for_in_flight_and_later_work(tasks):
+    results = chunk_files_parallel(tasks, max_workers=2)
+    first = [next(results)]
+    broken = parallel._pool
+    kill_workers(broken)
+
+    # 진행 중이던 작업은 새 풀에서 다시 실행
+    assert chunk_names(first + list(results)) == expected(tasks)
+    assert parallel._pool is not broken
+
+    # 이후 요청도 깨진 풀을 다시 쓰지 않음
+    kill_workers(parallel._pool)
+    assert chunk_names(chunk_files_parallel(tasks, max_workers=2)) == expected(tasks)
+    assert not parallel._pool_users
+
+
+def test_resized_pool_is_shut_down_after_in_flight_work(tasks):
+    results = chunk_files_parallel(tasks, max_workers=2)
+    first = [next(results)]
+    old = parallel._pool
+
+    # 다른 요청이 워커 수를 바꿔도 진행 중인 청크화는 이전 풀에서 끝까지 진행
+    assert chunk_names(chunk_files_parallel(tasks, max_workers=3)) == expected(tasks)
+    assert parallel._pool is not old
+    assert not old._shutdown_thread
+
+    assert chunk_names(first + list(results)) == expected(tasks)
+    assert old._shutdown_thread
+    assert not parallel._pool_users
@@ -0,0 +1,54 @@
+import git
+import pytest
+
+from app import embeddings, project_index
+from app.chunking.GetCode import GitLabCodeChunker
+from app.project_index import ProjectIndex
+from benchmarks.fakes import hash_embeddings
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / 'repo'
+    path.mkdir()
+    repo = git.Repo.init(path)
+    for name in ('a.py', 'b.py'):
+        (path / name).write_text(f"def {name[0]}():\n    return 1\n")
+    repo.index.add(['a.py', 'b.py'])
+    repo.index.commit('init')
+    return repo
+
+
+@pytest.fixture
+def chunker(tmp_path):
+    return GitLabCodeChunker('http://gitlab.invalid', 'token', 'p', str(tmp_path / 'clone'), 'main')
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    monkeypatch.setattr(embeddings, 'get_code_embeddings', hash_embeddings)
+    monkeypatch.setattr(project_index, 'VECTOR_STORE_BACKEND', 'local')
+
+
+def test_failed_store_keeps_last_commit_for_retry(tmp_path, repo, chunker, monkeypatch):
+    index = ProjectIndex('p', 'main', index_root=str(tmp_path / 'index'))
+    assert index.sync(repo.working_dir, chunker) == 2
+    first_commit = index.load_state()['last_commit']
+
+    (tmp_path / 'repo' / 'a.py').write_text("def a():\n    return 2\n")
+    repo.index.add(['a.py'])
+    head = repo.index.commit('change a').hexsha
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('store down')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(index.vectorDB, 'add_embeddings', fail)
+        index.sync(repo.working_dir, chunker)
+    # 변경 파일의 벡터가 저장되지 않았으므로 다음 동기화에서 다시 인덱싱
+    assert index.load_state()['last_commit'] == first_commit
+    assert not index.vectorDB.query_similar_code('def a():\n    return 2\n', exclude_path='b.py')
+
+    assert index.sync(repo.working_dir, chunker) == 1
+    assert index.load_state()['last_commit'] == head
+    assert index.vectorDB.query_similar_code('def a():\n    return 2\n', exclude_path='b.py')
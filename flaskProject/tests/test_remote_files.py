@@ -0,0 +1,184 @@
+import os
+import threading
+
+import chromadb
+import gitlab
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from app import embeddings, project_index, reviewers
+from app.chunking.remote_files import BlobCache, GitLabFileFetcher
+from benchmarks.fakes import FakeGitLabServer, hash_embeddings
+
+LANGUAGES = {'.py': 'python', '.js': 'javascript'}
+DIFF = "@@ -1,2 +1,2 @@\n def add(a, b):\n-    return b + a\n+    return a + b\n"
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / 'repo'
+    (root / 'pkg').mkdir(parents=True)
+    (root / 'pkg' / 'a.py').write_text("def add(a, b):\n    return a + b\n")
+    (root / 'pkg' / 'b.py').write_text("def sub(a, b):\n    return a - b\n")
+    return root
+
+
+@pytest.fixture
+def server(repo):
+    with FakeGitLabServer(repo) as server:
+        yield server
+
+
+def language_of(path):
+    return LANGUAGES.get(os.path.splitext(path)[1])
+
+
+def make_fetcher(server, tmp_path, **kwargs):
+    project = gitlab.Gitlab(server.url, private_token='x').projects.get(1, lazy=True)
+    kwargs.setdefault('cache', BlobCache(tmp_path / 'blobs'))
+    return GitLabFileFetcher(project, 'main', language_of, **kwargs)
+
+
+def write_files(root, files):
+    for path, data in files.items():
+        file_path = root / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(data)
+
+
+def test_fetch_changed_file_with_related_files(tmp_path, server):
+    changed, related = make_fetcher(server, tmp_path).fetch_review_files(['pkg/a.py'], tmp_path / 'out')
+
+    assert changed == ['pkg/a.py']
+    assert related == ['pkg/b.py']
+    assert (tmp_path / 'out' / 'pkg' / 'b.py').read_text() == "def sub(a, b):\n    return a - b\n"
+
+
+def test_fetch_root_level_changed_file(tmp_path, repo, server):
+    write_files(repo, {'setup.py': b'setup()\n', 'util.py': b'X = 1\n', 'README.md': b'# sample\n'})
+    server.reload()
+
+    changed, related = make_fetcher(server, tmp_path).fetch_review_files(['setup.py'], tmp_path / 'out')
+
+    assert changed == ['setup.py']
+    # 루트 디렉토리의 지원 언어 파일만, 하위 디렉토리 파일은 제외
+    assert related == ['util.py']
+
+
+def test_fetch_skips_paths_in_deleted_directory(tmp_path, server):
+    changed, related = make_fetcher(server, tmp_path).fetch_review_files(
+        ['gone/removed.py', 'pkg/a.py'], tmp_path / 'out')
+
+    assert changed == ['pkg/a.py']
+    assert related == ['pkg/b.py']
+    assert not (tmp_path / 'out' / 'gone').exists()
+
+
+def test_related_files_filters(tmp_path, repo, server):
+    write_files(repo, {
+        'pkg/notes.txt': b'notes\n',
+        'pkg/app.min.js': b'var a=1;\n',
+        'pkg/messages_pb2.py': b'X = 1\n',
+        'pkg/big.py': b'x = 1\n' * 500,
+        'pkg/binary.py': b'\0\1\2\n',
+        'pkg/minified.js': b'var a=1;' * 200 + b'\n' + b'var b=2;\n',
+        'pkg/c.js': b'const c = 1;\n',
+    })
+    server.reload()
+
+    fetcher = make_fetcher(server, tmp_path, related_max_bytes=2000)
+    changed, related = fetcher.fetch_review_files(['pkg/a.py'], tmp_path / 'out')
+
+    assert changed == ['pkg/a.py']
+    assert sorted(related) == ['pkg/b.py', 'pkg/c.js']
+
+
+def test_related_files_are_limited_per_directory(tmp_path, repo, server):
+    write_files(repo, {f'pkg/m{i}.py': f'X = {i}\n'.encode() for i in range(5)})
+    server.reload()
+
+    fetcher = make_fetcher(server, tmp_path, related_max_files=2)
+    changed, related = fetcher.fetch_review_files(['pkg/m3.py'], tmp_path / 'out')
+
+    assert changed == ['pkg/m3.py']
+    # 경로 순으로 앞의 파일부터
+    assert sorted(related) == ['pkg/a.py', 'pkg/b.py']
+
+
+def test_changed_file_is_fetched_regardless_of_size(tmp_path, repo, server):
+    write_files(repo, {'pkg/a.py': b'x = 1\n' * 200})
+    server.reload()
+
+    changed, _ = make_fetcher(server, tmp_path, related_max_bytes=100).fetch_review_files(
+        ['pkg/a.py'], tmp_path / 'out')
+
+    assert changed == ['pkg/a.py']
+
+
+def test_blob_cache_is_reused_across_reviews(tmp_path, server):
+    cache = BlobCache(tmp_path / 'blobs')
+    make_fetcher(server, tmp_path, cache=cache).fetch_review_files(['pkg/a.py'], tmp_path / 'first')
+    blob_requests = server.stats['blob']
+
+    changed, related = make_fetcher(server, tmp_path, cache=cache).fetch_review_files(
+        ['pkg/a.py'], tmp_path / 'second')
+
+    assert (changed, related) == (['pkg/a.py'], ['pkg/b.py'])
+    assert server.stats['blob'] == blob_requests == 2
+    assert cache.stats()['hits'] == 2
+    assert (tmp_path / 'second' / 'pkg' / 'a.py').read_text() == "def add(a, b):\n    return a + b\n"
+
+
+def review_collections():
+    return [collection.name for collection in chromadb.Client().list_collections()
+            if collection.name.startswith('review-')]
+
+
+def test_clone_free_review_drops_transient_index(tmp_path, server, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(reviewers, 'REVIEW_FETCH_MODE', 'api')
+    monkeypatch.setattr(project_index, 'VECTOR_STORE_BACKEND', 'chroma')
+    monkeypatch.setattr(embeddings, 'get_code_embeddings', hash_embeddings)
+    commits = [{'new_path': 'pkg/a.py', 'diff': DIFF}]
+
+    for _ in range(2):
+        llm = FakeListChatModel(responses=['review', 'SUMMARY'])
+        events = list(reviewers.iterCodeReview(server.url, 'token', '1', 'main', commits, llm=llm))
+        assert events[-1] == ('summary', {'review': 'SUMMARY'})
+        assert review_collections() == []
+
+
+def test_blob_cache_counts_concurrent_lookups(tmp_path):
+    cache = BlobCache(tmp_path / 'blobs')
+    cache.put('a' * 40, b'data')
+
+    def lookup():
+        for _ in range(500):
+            cache.get('a' * 40)
+            cache.get('b' * 40)
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats()['hits'] == 4000
+    assert cache.stats()['misses'] == 4000
+
+
+def test_blob_cache_evicts_least_recently_used_blobs(tmp_path):
+    cache = BlobCache(tmp_path / 'blobs')
+    shas = [f'{i:02x}' * 20 for i in range(10)]
+    for i, sha in enumerate(shas):
+        cache.put(sha, b'x' * 300)
+        # 수정 시간 해상도에 의존하지 않도록 순서를 명시
+        os.utime(cache._blob_path(sha), (i, i))
+    cache.get(shas[0])   # 가장 오래된 blob 을 다시 사용
+
+    cache.max_bytes = 1000
+    cache.put('ff' * 20, b'x' * 300)
+
+    remaining = [sha for sha in shas + ['ff' * 20] if cache._blob_path(sha).exists()]
+    assert sum(cache._blob_path(sha).stat().st_size for sha in remaining) <= 1000
+    assert shas[0] in remaining and 'ff' * 20 in remaining
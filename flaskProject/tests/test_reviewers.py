@@ -0,0 +1,152 @@
+import re
+import threading
+import time
+
+import httpx
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from openai import RateLimitError
+
+from app import create_app, project_index, reviewers
+from app.chunking.GetCode import GitLabCodeChunker
+from app.reviewers import ReviewError, get_code_review, getCodeReview, iter_code_review
+
+SUMMARY = 'SUMMARY'
+
+
+class RecordingChatModel(FakeListChatModel):
+    """
+    파일별 리뷰 요청에는 'review:<파일 경로>' 로 응답 (delays 만큼 지연, rate_limits 횟수만큼 429)
+    요약 요청은 responses 를 그대로 스트리밍
+    """
+    delays: dict = {}
+    rate_limits: dict = {}
+    calls: list = []
+    summary_inputs: list = []
+    active: int = 0
+    max_active: int = 0
+
+    def _call(self, messages, *args, **kwargs):
+        file_path = re.search(r'리뷰 대상 파일 경로: (\S+)', messages[-1].content).group(1)
+        with _lock:
+            self.calls.append(file_path)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delays.get(file_path, 0))
+            with _lock:
+                if self.rate_limits.get(file_path, 0) > 0:
+                    self.rate_limits[file_path] -= 1
+                    raise make_rate_limit_error()
+            return f'review:{file_path}'
+        finally:
+            with _lock:
+                self.active -= 1
+
+    def _stream(self, messages, *args, **kwargs):
+        self.summary_inputs.append([message.content for message in messages])
+        yield from super()._stream(messages, *args, **kwargs)
+
+
+_lock = threading.Lock()
+
+
+def make_rate_limit_error():
+    response = httpx.Response(429, request=httpx.Request('POST', 'http://llm.invalid/v1/chat/completions'))
+    return RateLimitError('rate limited', response=response, body=None)
+
+
+def make_queries(count):
+    return [(f'src/file{i}.py', f'@@ -1 +1 @@\n-x = {i}\n+x = {i + 1}\n', [[]]) for i in range(count)]
+
+
+def reviewed_paths(summary_input):
+    return re.findall(r'review:(\S+)', '\n'.join(summary_input))
+
+
+def test_summary_keeps_file_order_when_reviews_finish_out_of_order():
+    queries = make_queries(4)
+    # 앞 파일일수록 늦게 끝나도록 지연
+    llm = RecordingChatModel(responses=[SUMMARY],
+                             delays={path: 0.05 * (len(queries) - i) for i, (path, _, _) in enumerate(queries)})
+
+    assert get_code_review(queries, llm, max_concurrency=4, cache=False) == SUMMARY
+    assert reviewed_paths(llm.summary_inputs[0]) == [path for path, _, _ in queries]
+
+
+def test_review_requests_respect_concurrency_limit():
+    queries = make_queries(8)
+    llm = RecordingChatModel(responses=[SUMMARY], delays={path: 0.05 for path, _, _ in queries})
+
+    get_code_review(queries, llm, max_concurrency=2, cache=False)
+    assert len(llm.calls) == len(queries)
+    assert llm.max_active == 2
+
+
+def test_rate_limited_review_is_retried():
+    queries = make_queries(2)
+    llm = RecordingChatModel(responses=[SUMMARY], rate_limits={'src/file1.py': 1})
+
+    assert get_code_review(queries, llm, max_retries=2, cache=False) == SUMMARY
+    assert llm.calls.count('src/file1.py') == 2
+    assert reviewed_paths(llm.summary_inputs[0]) == ['src/file0.py', 'src/file1.py']
+
+
+def test_review_dropped_after_retries_are_exhausted():
+    queries = make_queries(2)
+    llm = RecordingChatModel(responses=[SUMMARY], rate_limits={'src/file1.py': 5})
+
+    assert get_code_review(queries, llm, max_retries=2, cache=False) == SUMMARY
+    assert llm.calls.count('src/file1.py') == 2
+    assert reviewed_paths(llm.summary_inputs[0]) == ['src/file0.py']
+
+
+def test_events_stream_file_reviews_then_summary_tokens():
+    queries = make_queries(3)
+    llm = RecordingChatModel(responses=[SUMMARY])
+
+    events = list(iter_code_review(queries, llm, cache=False))
+    names = [event for event, _ in events]
+
+    assert names == ['file_review'] * 3 + ['summary_token'] * len(SUMMARY) + ['summary']
+    assert sorted(data['file_path'] for event, data in events if event == 'file_review') == \
+        sorted(path for path, _, _ in queries)
+    assert ''.join(data['token'] for event, data in events if event == 'summary_token') == SUMMARY
+    assert events[-1][1] == {'review': SUMMARY}
+
+
+def test_summary_failure_ends_with_error_event():
+    llm = RecordingChatModel(responses=[SUMMARY], error_on_chunk_number=2)
+
+    events = list(iter_code_review(make_queries(1), llm, cache=False))
+
+    assert events[-1][0] == 'error'
+    assert 'summary' not in [event for event, _ in events]
+    with pytest.raises(ReviewError):
+        get_code_review(make_queries(1), RecordingChatModel(responses=[SUMMARY], error_on_chunk_number=2),
+                        cache=False)
+
+
+def test_get_code_review_raises_error_message(monkeypatch):
+    monkeypatch.setattr(project_index, 'VECTOR_STORE_BACKEND', 'local')
+    monkeypatch.setattr(GitLabCodeChunker, 'clone_project', lambda self: None)
+
+    with pytest.raises(ReviewError, match='클론'):
+        getCodeReview('http://gitlab.invalid', 'token', 'p', 'main', [])
+
+
+def test_code_review_route_reports_failure_reason(monkeypatch):
+    def failing_review(url, token, projectId, branch, commits):
+        yield 'error', {'message': 'clone failed'}
+
+    monkeypatch.setattr(reviewers, 'iterCodeReview', failing_review)
+    client = create_app().test_client()
+
+    response = client.post('/flask/code-review', json={'projectId': 'p', 'branch': 'main', 'commits': []})
+    assert response.status_code == 500
+    assert 'clone failed' in response.get_json()['message']
+
+    response = client.post('/flask/code-review?stream=jsonl', json={'projectId': 'p', 'commits': []})
+    lines = response.get_data(as_text=True).splitlines()
+    assert '"event": "error"' in lines[0]
+    assert lines[-1] == '{"event": "done", "data": {"status": "fail"}}'
@@ -0,0 +1,140 @@
+import pytest
+
+from app.chunking.scanner import RepositoryScanner, is_ignored, parse_gitignore, sniff_content
+
+LANGUAGES = {'.py': 'python', '.js': 'javascript'}
+
+
+def language_of(name):
+    return LANGUAGES.get(name[name.rfind('.'):]) if '.' in name else None
+
+
+def ignored(tmp_path, lines, rel_path, is_dir=False, base=''):
+    gitignore = tmp_path / 'gitignore'
+    gitignore.write_text('\n'.join(lines) + '\n')
+    return is_ignored(parse_gitignore(gitignore, base), rel_path, is_dir)
+
+
+@pytest.mark.parametrize('lines, rel_path, is_dir, expected', [
+    # 슬래시 없는 패턴은 모든 깊이의 이름과 비교
+    (['*.log'], 'a/b/x.log', False, True),
+    (['*.log'], 'x.log.py', False, False),
+    # 앞/중간 슬래시는 .gitignore 위치 기준으로 고정
+    (['/gen.py'], 'gen.py', False, True),
+    (['/gen.py'], 'pkg/gen.py', False, False),
+    (['docs/api'], 'docs/api', True, True),
+    (['docs/api'], 'x/docs/api', True, False),
+    # **
+    (['**/fixtures'], 'fixtures', True, True),
+    (['**/fixtures'], 'a/b/fixtures', True, True),
+    (['a/**/b.py'], 'a/b.py', False, True),
+    (['a/**/b.py'], 'a/x/y/b.py', False, True),
+    (['a/**/b.py'], 'c/a/x/b.py', False, False),
+    (['logs/**'], 'logs/x/y.py', False, True),
+    # 디렉토리 전용 패턴
+    (['out/'], 'out', True, True),
+    (['out/'], 'out', False, False),
+    # 부정 패턴은 마지막으로 일치한 규칙이 결정
+    (['*.py', '!keep.py'], 'keep.py', False, False),
+    (['*.py', '!keep.py'], 'other.py', False, True),
+    (['*.py', '!keep.py', 'keep.py'], 'keep.py', False, True),
+    # 문자 클래스, ?, 이스케이프, 주석/빈 줄
+    (['[ab].py'], 'a.py', False, True),
+    (['[ab].py'], 'c.py', False, False),
+    (['[!ab].py'], 'c.py', False, True),
+    (['?.py'], 'ab.py', False, False),
+    (['\\#file.py'], '#file.py', False, True),
+    (['# comment', '', '   '], 'comment', False, False),
+])
+def test_gitignore_patterns(tmp_path, lines, rel_path, is_dir, expected):
+    assert ignored(tmp_path, lines, rel_path, is_dir) is expected
+
+
+def test_nested_gitignore_is_relative_to_its_directory(tmp_path):
+    assert ignored(tmp_path, ['/local.py'], 'pkg/local.py', base='pkg')
+    assert not ignored(tmp_path, ['/local.py'], 'local.py', base='pkg')
+    assert not ignored(tmp_path, ['*.py'], 'other/a.py', base='pkg')
+
+
+@pytest.mark.parametrize('head, expected', [
+    (b'def f():\n    return 1\n', None),
+    (b'\x7fELF\0\0\0', 'binary'),
+    (b'var a=1;' * 200 + b'\nvar b;\n', 'minified'),
+    # 잘렸을 수 있는 마지막 라인은 길어도 판단하지 않음
+    (b'x = 1\n' + b'y' * 2000, None),
+    (b'# Code generated by protoc-gen-go. DO NOT EDIT.\npackage x\n', 'generated'),
+    (b'// @generated\nconst a = 1;\n', 'generated'),
+])
+def test_sniff_content(head, expected):
+    assert sniff_content(head) == expected
+
+
+@pytest.fixture
+def repo(tmp_path):
+    files = {
+        '.gitignore': b'ignored/\n*.tmp.py\n!keep.tmp.py\n',
+        '.hidden/x.py': b'x = 1\n',
+        '.hidden.py': b'x = 1\n',
+        'node_modules/lib/index.js': b'module.exports = 1;\n',
+        'docs/conf.py': b'x = 1\n',
+        'ignored/x.py': b'x = 1\n',
+        'a.tmp.py': b'x = 1\n',
+        'keep.tmp.py': b'x = 1\n',
+        'app.min.js': b'var a = 1;\n',
+        'proto_pb2.py': b'x = 1\n',
+        'gen.py': b'# Code generated by a tool. DO NOT EDIT.\nx = 1\n',
+        'big.py': b'x = 1\n' * 400,
+        'limit.py': b'x = 1\n' * 333 + b'#\n',   # 크기 제한과 같은 크기는 포함
+        'blob.py': b'\0\1\2\n',
+        'bundle.js': b'var a=1;' * 200 + b'\nvar b;\n',
+        'README.md': b'# sample\n',
+        'src/ok.py': b'x = 1\n',
+        'src/local.py': b'x = 1\n',
+        'src/.gitignore': b'local.py\n',
+        'src/sub/ok2.js': b'const a = 1;\n',
+    }
+    for path, data in files.items():
+        file_path = tmp_path / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(data)
+    return tmp_path
+
+
+def make_scanner(root):
+    return RepositoryScanner(root, language_of, exclude_globs=('docs/*',), max_file_bytes=2000,
+                             respect_gitignore=True)
+
+
+def test_scan_yields_sources_and_counts_each_skip_reason(repo):
+    scanner = make_scanner(repo)
+
+    assert list(scanner.scan()) == [
+        ('keep.tmp.py', 'python'), ('limit.py', 'python'),
+        ('src/ok.py', 'python'), ('src/sub/ok2.js', 'javascript'),
+    ]
+    assert scanner.skipped == {
+        'hidden': 2,            # .hidden/, .hidden.py
+        'excluded_dir': 1,      # node_modules/
+        'excluded_glob': 1,     # docs/conf.py
+        'gitignore': 3,         # ignored/, a.tmp.py, src/local.py
+        'generated': 3,         # app.min.js, proto_pb2.py (이름), gen.py (내용)
+        'too_large': 1,         # big.py
+        'binary': 1,            # blob.py
+        'minified': 1,          # bundle.js
+    }
+
+
+def test_gitignore_can_be_disabled(repo):
+    paths = [path for path, _ in RepositoryScanner(repo, language_of, respect_gitignore=False).scan()]
+
+    assert {'ignored/x.py', 'a.tmp.py', 'src/local.py'} <= set(paths)
+
+
+def test_accepts_applies_the_same_rules_to_single_paths(repo):
+    scanner = make_scanner(repo)
+
+    assert scanner.accepts('src/ok.py')
+    assert scanner.accepts('keep.tmp.py')
+    for rel_path in ('ignored/x.py', 'src/local.py', 'node_modules/lib/index.js', '.hidden/x.py',
+                     'docs/conf.py', 'big.py', 'blob.py', 'gen.py', 'missing.py'):
+        assert not scanner.accepts(rel_path), rel_path
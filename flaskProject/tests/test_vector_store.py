@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from app import vector_store
+from app.vector_store import LocalVectorStore
+
+DIM = 32
+
+
+def make_vectors(count, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def add_items(store, vectors, languages=('python', 'java')):
+    ids = [f'id{i}' for i in range(len(vectors))]
+    metadatas = [{'path': f'src/f{i % 10}', 'language': languages[i % len(languages)]} for i in range(len(vectors))]
+    store.add(ids, vectors, [f'doc{i}' for i in range(len(vectors))], metadatas)
+    return ids
+
+
+def top_ids(results):
+    return [[doc_id for doc_id, _, _, _ in hits] for hits in results]
+
+
+@pytest.mark.parametrize('dtype, atol', [('float16', 1e-3), ('int8', 1 / 127)])
+def test_quantized_vectors_round_trip(tmp_path, dtype, atol):
+    vectors = make_vectors(50)
+    store = LocalVectorStore(tmp_path, dtype=dtype)
+    add_items(store, vectors)
+
+    decoded = store._decode(store._matrix[:50])
+    assert np.allclose(decoded, vectors, atol=atol)
+    # 자기 자신이 가장 가까움
+    results = store.query(vectors[:5], n_results=1)
+    assert top_ids(results) == [[f'id{i}'] for i in range(5)]
+    assert all(distance < 0.01 for hits in results for _, _, _, distance in hits)
+
+
+@pytest.mark.parametrize('dtype', ['float16', 'int8'])
+def test_add_delete_and_reload(tmp_path, dtype):
+    vectors = make_vectors(30)
+    store = LocalVectorStore(tmp_path, dtype=dtype)
+    add_items(store, vectors)
+    store.delete(where={'path': 'src/f3'})
+    # 같은 id 는 덮어쓰기
+    store.add(['id0'], [vectors[1]], ['doc0-new'], [{'path': 'src/f0', 'language': 'python'}])
+    store.flush()
+
+    reloaded = LocalVectorStore(tmp_path, dtype=dtype)
+    hits = reloaded.query(vectors, n_results=30)[0]
+    found = {doc_id: document for doc_id, document, _, _ in hits}
+    assert len(found) == 27
+    assert not {'id3', 'id13', 'id23'} & set(found)
+    assert found['id0'] == 'doc0-new'
+    # 삭제된 행은 재사용
+    reloaded.add(['new'], [vectors[3]], ['new-doc'], [{'path': 'src/new', 'language': 'python'}])
+    assert reloaded._size == 30
+    assert top_ids(reloaded.query([vectors[3]], n_results=1)) == [['new']]
+
+
+def test_dtype_change_removes_old_vectors_file(tmp_path):
+    store = LocalVectorStore(tmp_path, dtype='float16')
+    add_items(store, make_vectors(10))
+    store.flush()
+    old_file = store._matrix.filename
+
+    reloaded = LocalVectorStore(tmp_path, dtype='int8')
+
+    assert not (tmp_path / 'code_embeddings' / old_file).exists()
+    assert list((tmp_path / 'code_embeddings').glob('vectors-*.npy')) == []
+    assert reloaded.query(make_vectors(1), n_results=3) == [[]]
+
+
+def test_filtered_query_uses_ann_index(tmp_path, monkeypatch):
+    vectors = make_vectors(400)
+    exact = LocalVectorStore(tmp_path / 'exact')
+    ann = LocalVectorStore(tmp_path / 'ann', exact_search_max=50)
+    for store in (exact, ann):
+        add_items(store, vectors)
+    where = {'$and': [{'language': 'python'}, {'path': {'$ne': 'src/f2'}}]}
+    queries = make_vectors(5, seed=1)
+    expected = exact.query(queries, n_results=5, where=where)
+
+    # ANN 경로에서는 json_extract 전체 스캔을 하지 않음
+    def no_scan(*args, **kwargs):
+        raise AssertionError('필터 전체 스캔')
+    monkeypatch.setattr(ann, '_select_rows', no_scan)
+    results = ann.query(queries, n_results=5, where=where)
+
+    assert ann._ann is not None
+    for hits in results:
+        assert len(hits) == 5
+        assert all(metadata['language'] == 'python' and metadata['path'] != 'src/f2'
+                   for _, _, metadata, _ in hits)
+    recall = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(top_ids(results), top_ids(expected))])
+    assert recall >= 0.8
+
+
+def test_selective_filter_falls_back_to_exact_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, 'ANN_MAX_OVERSAMPLE', 8)
+    vectors = make_vectors(300)
+    store = LocalVectorStore(tmp_path, exact_search_max=50)
+    languages = ['c'] * 2 + ['python'] * 298
+    store.add([f'id{i}' for i in range(300)], vectors, [f'doc{i}' for i in range(300)],
+              [{'path': f'src/f{i}', 'language': language} for i, language in enumerate(languages)])
+
+    results = store.query(make_vectors(2, seed=1), n_results=5, where={'language': 'c'})
+
+    assert [sorted(ids) for ids in top_ids(results)] == [['id0', 'id1'], ['id0', 'id1']]